@@ -3,6 +3,7 @@ from .geometry import init_geometry
 from .classify_cells import init_classify_cells
 from .initial_conditions import init_initial_cell_conditions
 from .busbar_connections import define_busbar_connections
+from .schedule import CompiledSchedule
 import pandas as pd
 
 def create_setup_from_configs(pack: dict, dc_table: pd.DataFrame, sim_config: dict):
@@ -102,7 +103,11 @@ def create_setup_from_configs(pack: dict, dc_table: pd.DataFrame, sim_config: di
     # Validate DC table; fallback to old-style if missing cols
     required_cols = ["Global Step Index", "Day_of_year", "DriveCycle_ID", "Value Type", "Value", "Unit", "Step Type", "Step Duration (s)", "Timestep (s)"]
     missing = [c for c in required_cols if c not in dc_table.columns]
-    if missing:
+    if isinstance(dc_table, CompiledSchedule):
+        # Compiled from a validated simulation table; no fallback for a schedule
+        if missing:
+            raise ValueError(f"Compiled schedule missing columns {missing}.")
+    elif missing:
         print(f"Warning: Missing cols {missing}; falling back to time/current extraction.")
         if 'Time' in dc_table.columns and 'Current' in dc_table.columns:
             # Old-style: treat as direct array
@@ -117,7 +122,8 @@ def create_setup_from_configs(pack: dict, dc_table: pd.DataFrame, sim_config: di
             dc_table['Timestep (s)'] = time_gap
         else:
             raise ValueError(f"DC table invalid; missing {missing} and no Time/Current fallback.")
-    print(f"Drive cycle table validated with {len(dc_table)} steps over {dc_table['Day_of_year'].max()} days.")
+    max_day = dc_table.last_day if isinstance(dc_table, CompiledSchedule) else dc_table['Day_of_year'].max()
+    print(f"Drive cycle table validated with {len(dc_table)} steps over {max_day} days.")
     return {
         'cells': cells,
         'capacity': capacity,
@@ -133,5 +139,12 @@ def create_setup_from_configs(pack: dict, dc_table: pd.DataFrame, sim_config: di
         },
         'masses': masses,
         'dc_table': dc_table, # Pass full table
-        'Frequency': time_gap
+        'Frequency': time_gap,
+        'step_metadata': sim_config.get('step_metadata', 'inline'),
+        'result_layout': sim_config.get('result_layout', 'long'),
+        'timestep_mode': sim_config.get('timestep_mode', 'fixed'),
+        'event_max_dt': sim_config.get('event_max_dt', 3600.0),
+        'rest_fast_forward': sim_config.get('rest_fast_forward', False),
+        'rest_sample_dt': sim_config.get('rest_sample_dt', 600.0),
+        'logging': sim_config.get('logging', {})
     }
\ No newline at end of file
@@ -5,15 +5,126 @@ import pandas as pd
 import os
 import zipfile
 import json
+import re
 from pathlib import Path
-from .battery_params import get_battery_params
+from .battery_params import get_rc_table
 from .next_soc import calculate_next_soc
 from .reversible_heat import calculate_reversible_heat
-from .triggers import parse_trigger_list_from_row, evaluate_triggers, advance_row_idx_for_action, check_hard_cutoffs
+from .triggers import CompiledTriggers, check_hard_cutoffs
 from .conversion import compute_module_current_from_step
-from typing import Dict, List, Any, Optional
+from .history_buffer import HistoryBuffer, META_FIELDS
+from .logging_policy import build_logging_policy
+from .schedule import CompiledSchedule, compile_drive_table
+from .day_calendar import DAYS_PER_YEAR
+from .solver_control import SolverControl, REQUEST_STOP, REQUEST_PAUSE
+from .result_ring import ResultRing
+from typing import Dict, List, Any, Optional, Union
 from io import StringIO
 import pprint 
+
+# Significant digits for physical quantities in result CSVs (None = full precision)
+CSV_FLOAT_DIGITS = 10
+
+# Result metadata layouts: 'inline' repeats row metadata on every result row,
+# 'dictionary' writes it once per drive-cycle row to a side table joined on step_key
+STEP_METADATA_MODES = ('inline', 'dictionary')
+
+
+def step_table_path(filename: str) -> str:
+    """Path of the step metadata side table that belongs to a results CSV."""
+    root, ext = os.path.splitext(str(filename))
+    return f"{root}_steps{ext or '.csv'}"
+
+
+def join_step_metadata(df: pd.DataFrame, steps_df: pd.DataFrame) -> pd.DataFrame:
+    """Expand a dictionary-encoded result frame back to the inline metadata layout."""
+    if 'step_key' not in df.columns or steps_df.empty:
+        return df
+    steps_df = steps_df.drop_duplicates('step_key', keep='last')
+    merged = df.merge(steps_df, on='step_key', how='left')
+    inline_order = [c for c in df.columns if c not in ('step_key', 'termination_msg')]
+    inline_order += [c for c in META_FIELDS if c in merged.columns]
+    inline_order += [c for c in ('termination_msg',) if c in merged.columns]
+    return merged[inline_order]
+
+
+# Timestep selection: 'fixed' steps every row at its 'Timestep (s)'; 'event' takes large
+# steps through trigger_only and trigger-terminated rows and bisects onto the trigger or
+# cutoff crossing; 'adaptive' additionally sizes the steps of fixed-duration current rows
+# from a local error estimate and resamples them onto the row's 'Timestep (s)' grid
+TIMESTEP_MODES = ('fixed', 'event', 'adaptive')
+EVENT_MAX_DT_S = 3600.0
+# Largest per-cell SOC change allowed in one event step (keeps balancing currents stable)
+EVENT_MAX_DSOC = 0.005
+# Local error tolerances per adaptive step (step-doubling estimate)
+ADAPTIVE_SOC_TOL = 1e-4
+ADAPTIVE_VRC_TOL = 1e-3  # V
+# Rest fast-forward: zero-current stretches whose cell balancing currents have died
+# down below REST_CURRENT_TOL_A relax analytically, logged every REST_SAMPLE_DT_S
+REST_CURRENT_TOL_A = 1e-3
+REST_SAMPLE_DT_S = 600.0
+
+# Result row layouts: 'long' is one row per timestep per cell, 'wide' one row per
+# timestep with each per-cell quantity as a block of N_cells columns ('SOC[0]', ...)
+RESULT_LAYOUTS = ('long', 'wide')
+
+# (result column, history key) for per-cell quantities
+CELL_RESULT_FIELDS = (
+    ('SOC', 'SOC'), ('Vterm', 'Vterm'), ('OCV', 'OCV'), ('V_RC1', 'V_RC1'), ('V_RC2', 'V_RC2'),
+    ('R0', 'V_R0'), ('R1', 'V_R1'), ('R2', 'V_R2'), ('C1', 'V_C1'), ('C2', 'V_C2'),
+    ('Qgen_cumulative', 'Qgen_cumulative'), ('energy_throughput', 'energy_throughput'),
+)
+_WIDE_CELL_COLUMN = re.compile(r'^(.+)\[(\d+)\]$')
+
+
+def wide_cell_column(name: str, cell_id: int) -> str:
+    """Column holding a per-cell quantity for one cell in the wide layout."""
+    return f"{name}[{cell_id}]"
+
+
+def is_wide_layout(columns) -> bool:
+    return 'cell_id' not in columns and wide_cell_column('SOC', 0) in columns
+
+
+def wide_cell_ids(columns) -> List[int]:
+    """Cell ids present in a wide results header."""
+    ids = []
+    for c in columns:
+        match = _WIDE_CELL_COLUMN.match(str(c))
+        if match and match.group(1) == 'SOC':
+            ids.append(int(match.group(2)))
+    return sorted(ids)
+
+
+def read_wide_cell_frame(source, cell_id: int, cell_fields=('SOC', 'Vterm', 'Qgen_cumulative'), **read_csv_kwargs) -> pd.DataFrame:
+    """
+    Read the pack scalars and one cell's block columns from a wide results CSV,
+    renamed to the long-layout column names.
+    """
+    cell_columns = {wide_cell_column(name, cell_id): name for name in cell_fields}
+    usecols = ['time_global_s', 'dt', 'I_module', 'V_module'] + list(cell_columns)
+    df = pd.read_csv(source, usecols=lambda c: c in usecols, **read_csv_kwargs)
+    df = df.rename(columns=cell_columns)
+    df.insert(0, 'cell_id', cell_id)
+    return df
+
+
+def wide_to_long(df: pd.DataFrame) -> pd.DataFrame:
+    """Reshape a wide results frame to the long layout (one row per timestep per cell)."""
+    cell_ids = np.asarray(wide_cell_ids(df.columns))
+    n_steps, n_cells = len(df), len(cell_ids)
+    scalar_columns = [c for c in df.columns if not _WIDE_CELL_COLUMN.match(str(c))]
+    
+    columns = {'cell_id': np.tile(cell_ids, n_steps)}
+    for c in scalar_columns:
+        columns[c] = np.repeat(df[c].to_numpy(), n_cells)
+    for name, _ in CELL_RESULT_FIELDS:
+        block = [wide_cell_column(name, cell_id) for cell_id in cell_ids]
+        if block and block[0] in df.columns:
+            columns[name] = df[block].to_numpy().reshape(n_steps * n_cells)
+    return pd.DataFrame(columns)
+
+
 def initialize_simulation(setup, dc_table, filename, sim_id=None):
    
     # Extract cell configuration
@@ -40,35 +151,27 @@ def initialize_simulation(setup, dc_table, filename, sim_id=None):
     print(f"   Voltage limits: cell [{HARD_V_cell_min:.2f}, {HARD_V_cell_max:.2f}]V, "
           f"pack [{HARD_V_pack_min:.2f}, {HARD_V_pack_max:.2f}]V")
     
-    # Prepare drive cycle table
-    dc_table = dc_table.copy()
+    # Prepare drive cycle table (a CompiledSchedule loaded from its artifact is used as is)
+    if not isinstance(dc_table, CompiledSchedule):
+        dc_table = dc_table.copy()
     n_rows = len(dc_table)
     if n_rows == 0:
         raise ValueError("Empty DC table")
     
     # Detect existing CSV for resume (append mode)
     csv_mode = 'w'
-    last_written_timestep = 0
     if os.path.exists(filename) and os.path.getsize(filename) > 0:
         csv_mode = 'a'
         print(f"   Detected existing CSV on resume: {os.path.getsize(filename)} bytes")
     
-    # Setup signal files
-    stop_signal_file = f"simulations/{sim_id}.stop" if sim_id else None
-    pause_signal_file = f"simulations/{sim_id}.pause" if sim_id else None
-    
-    # Clean old signal files
-    if stop_signal_file and os.path.exists(stop_signal_file):
-        os.remove(stop_signal_file)
-    if pause_signal_file and os.path.exists(pause_signal_file):
-        os.remove(pause_signal_file)
-    
     return {
         'cells': cells,
         'N_cells': N_cells,
         'capacity_Ah': capacity_Ah,
         'coulombic_eff': coulombic_eff,
         'parallel_groups': parallel_groups,
+        'group_idx': build_group_index(cells, parallel_groups),
+        'rc_tables': build_rc_tables(cells),
         'n_series': n_series,
         'R_p': R_p,
         'R_s': R_s,
@@ -78,188 +181,199 @@ def initialize_simulation(setup, dc_table, filename, sim_id=None):
         'HARD_V_pack_min': HARD_V_pack_min,
         'dc_table': dc_table,
         'n_rows': n_rows,
-        'csv_mode': csv_mode,
-        'last_written_timestep': last_written_timestep,
-        'stop_signal_file': stop_signal_file,
-        'pause_signal_file': pause_signal_file
+        'csv_mode': csv_mode
     }
 
 def write_partial_history(
-    history: Dict,
-    from_idx: int,
-    to_idx: int,
-    filename: str,
-    csv_mode: str,
-    last_written_timestep: int,
+    history: HistoryBuffer,
     N_cells: int,
     n_series: int
-) -> tuple[str, int]:
-    
-    if to_idx <= from_idx:
-        return csv_mode, last_written_timestep
-    
-    # Extract slice of history
-    partial_history = {
-        'dt': history['dt'][from_idx:to_idx],
-        't_global_s': history['t_global_s'][from_idx:to_idx],
-        'SOC': history['SOC'][from_idx:to_idx],
-        'Vterm': history['Vterm'][from_idx:to_idx],
-        'OCV': history['OCV'][from_idx:to_idx],
-        'V_RC1': history['V_RC1'][from_idx:to_idx],
-        'V_RC2': history['V_RC2'][from_idx:to_idx],
-        'V_R0': history['V_R0'][from_idx:to_idx],
-        'V_R1': history['V_R1'][from_idx:to_idx],
-        'V_R2': history['V_R2'][from_idx:to_idx],
-        'V_C1': history['V_C1'][from_idx:to_idx],
-        'V_C2': history['V_C2'][from_idx:to_idx],
-        'I_module': history['I_module'][from_idx:to_idx],
-        'V_module': history['V_module'][from_idx:to_idx],
-        'Qgen_cumulative': history['Qgen_cumulative'][from_idx:to_idx],
-        'energy_throughput': history['energy_throughput'][from_idx:to_idx],
-        'Global Step Index': history['Global Step Index'][from_idx:to_idx],
-        'Day_of_year': history['Day_of_year'][from_idx:to_idx],
-        'DriveCycle_ID': history['DriveCycle_ID'][from_idx:to_idx],
-        'Subcycle_ID': history['Subcycle_ID'][from_idx:to_idx],
-        'Subcycle Step Index': history['Subcycle Step Index'][from_idx:to_idx],
-        'Value Type': history['Value Type'][from_idx:to_idx],
-        'Value': history['Value'][from_idx:to_idx],
-        'Unit': history['Unit'][from_idx:to_idx],
-        'Step Type': history['Step Type'][from_idx:to_idx],
-        'Label': history['Label'][from_idx:to_idx],
-        'Ambient Temp (°C)': history['Ambient Temp (°C)'][from_idx:to_idx],
-        'Location': history['Location'][from_idx:to_idx],
-        'drive cycle trigger': history['drive cycle trigger'][from_idx:to_idx],
-        'step Trigger(s)': history['step Trigger(s)'][from_idx:to_idx],
-        'termination_msg': history['termination_msg'][from_idx:to_idx],
-    }
+) -> int:
+    """
+    Append all buffered timesteps to the history CSV and empty the buffer.
+    
+    Returns:
+    --------
+    int
+        Number of timesteps written
+    """
+    n_steps = len(history)
+    if n_steps == 0:
+        return 0
+    
+    from_idx = history.written_steps
+    
+    # Step metadata first, so every step_key in the results already resolves
+    if history.step_metadata == 'dictionary':
+        write_step_metadata(history)
     
     # Convert to DataFrame
-    df_chunk = _history_to_long_dataframe(partial_history, N_cells, n_series)
-    if df_chunk.empty:
-        return csv_mode, last_written_timestep
+    to_dataframe = _history_to_wide_dataframe if history.result_layout == 'wide' else _history_to_long_dataframe
+    df_chunk = to_dataframe(
+        history.as_dict(), N_cells, n_series,
+        float_digits=CSV_FLOAT_DIGITS, step_metadata=history.step_metadata
+    )
     
     # Append to CSV
-    df_chunk.to_csv(filename, mode=csv_mode, index=False, header=(csv_mode == 'w'))
+    if not df_chunk.empty:
+        df_chunk.to_csv(history.filename, mode=history.csv_mode, index=False, header=(history.csv_mode == 'w'))
+        history.csv_mode = 'a'
     
-    # Update mode and timestamp
-    updated_csv_mode = 'a' if csv_mode == 'w' else csv_mode
-    updated_last_written = to_idx
+    history.clear()
     
     # Progress logging
-    progress = (to_idx / max(1, len(history['dt']))) * 100
-    print(f"📝 Wrote timesteps [{from_idx}, {to_idx}) to CSV ({len(df_chunk)} rows, {progress:.1f}% complete)")
-    
-    return updated_csv_mode, updated_last_written
-
-def find_col(columns, candidates):
-    """Find column name case-insensitively, ignoring spaces."""
-    lower_cols = [c.lower().replace(" ", "") for c in columns]
-    for cand in candidates:
-        cand_norm = cand.lower().replace(" ", "")
-        try:
-            idx = lower_cols.index(cand_norm)
-            return columns[idx]
-        except ValueError:
-            continue
-    return None
-
-def _history_to_long_dataframe(history: Dict, N_cells: int, n_series: int) -> pd.DataFrame:
-    """Convert history dict to long DF with cell_id. Fixed I_cell scaling. Added energy_throughput."""
-    if N_cells == 0:
-        df = pd.DataFrame({
-            'cell_id': [],
-            'time_global_s': history['t_global_s'],
-            'I_module': history['I_module'],
-            'V_module': history['V_module'],
-        })
-        for key in ['Global Step Index', 'Day_of_year', 'DriveCycle_ID', 'Subcycle_ID', 'Subcycle Step Index',
-                    'Value Type', 'Value', 'Unit', 'Step Type', 'Label', 'Ambient Temp (°C)', 'Location',
-                    'drive cycle trigger', 'step Trigger(s)', 'termination_msg']:
-            if key in history:
-                df[key] = history[key]
-        return df
-    rows = []
+    print(f"📝 Wrote timesteps [{from_idx}, {history.written_steps}) to CSV ({len(df_chunk)} rows)")
+    
+    return n_steps
+
+def write_step_metadata(history: HistoryBuffer) -> None:
+    """Append metadata of drive-cycle rows not yet in the step table."""
+    records = history.pending_step_records()
+    if not records:
+        return
+    df_steps = pd.DataFrame.from_records(records, columns=('step_key',) + META_FIELDS)
+    df_steps.to_csv(history.steps_filename, mode=history.steps_csv_mode, index=False, header=(history.steps_csv_mode == 'w'))
+    history.steps_csv_mode = 'a'
+    history.last_step_key = records[-1][0]
+
+
+def round_significant(values, digits: Optional[int]) -> np.ndarray:
+    """
+    Round floats to a number of significant digits so to_csv writes short reprs.
+    digits=None keeps full precision; NaN/inf pass through unchanged.
+    """
+    values = np.asarray(values, dtype=float)
+    if digits is None or values.size == 0:
+        return values
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        magnitude = np.floor(np.log10(np.abs(values)))
+        magnitude[~np.isfinite(magnitude)] = 0.0
+        scale = 10.0 ** (digits - 1 - magnitude)
+        rounded = np.round(values * scale) / scale
+    return np.where(np.isfinite(rounded), rounded, values)
+
+
+def _history_to_long_dataframe(
+    history: Dict,
+    N_cells: int,
+    n_series: int,
+    float_digits: Optional[int] = None,
+    step_metadata: str = 'inline'
+) -> pd.DataFrame:
+    """
+    Convert history columns to long DF with cell_id (one row per timestep per cell).
+    Pack scalars are repeated per cell, per-cell (timestep x cell) arrays are flattened
+    row-major, so rows are ordered by timestep then cell. Time columns are never rounded.
+    With step_metadata='dictionary' row metadata is replaced by its integer step_key.
+    """
+    n_steps = len(history['dt'])
     n_p_avg = N_cells / n_series if n_series > 0 else 1
-    for t_idx in range(len(history['dt'])):
-        for cell_id in range(N_cells):
-            row = {
-                'cell_id': cell_id,
-                'time_global_s': history['t_global_s'][t_idx],
-                'dt': history['dt'][t_idx],
-                'SOC': history['SOC'][t_idx][cell_id],
-                'Vterm': history['Vterm'][t_idx][cell_id],
-                'OCV': history['OCV'][t_idx][cell_id],
-                'V_RC1': history['V_RC1'][t_idx][cell_id],
-                'V_RC2': history['V_RC2'][t_idx][cell_id],
-                'R0': history['V_R0'][t_idx][cell_id],
-                'R1': history['V_R1'][t_idx][cell_id],
-                'R2': history['V_R2'][t_idx][cell_id],
-                'C1': history['V_C1'][t_idx][cell_id],
-                'C2': history['V_C2'][t_idx][cell_id],
-                'I_cell': history['I_module'][t_idx] / n_p_avg,
-                'I_module': history['I_module'][t_idx],
-                'V_module': history['V_module'][t_idx],
-                'Qgen_cumulative': history['Qgen_cumulative'][t_idx][cell_id],
-                'energy_throughput': history['energy_throughput'][t_idx][cell_id],
-            }
-            # Metadata
-            for key in ['Global Step Index', 'Day_of_year', 'DriveCycle_ID', 'Subcycle_ID', 'Subcycle Step Index',
-                        'Value Type', 'Value', 'Unit', 'Step Type', 'Label', 'Ambient Temp (°C)', 'Location',
-                        'drive cycle trigger', 'step Trigger(s)', 'termination_msg']:
-                row[key] = history.get(key, [np.nan])[t_idx]
-            rows.append(row)
-    return pd.DataFrame(rows)
+    
+    def per_step(key, digits=float_digits):
+        values = history[key]
+        if digits is not None:
+            values = round_significant(values, digits)
+        return np.repeat(np.asarray(values), N_cells)
+    
+    def per_cell(key):
+        values = np.asarray(history[key], dtype=float).reshape(n_steps * N_cells)
+        return round_significant(values, float_digits)
+    
+    I_module = np.asarray(history['I_module'], dtype=float)
+    columns = {
+        'cell_id': np.tile(np.arange(N_cells), n_steps),
+        'time_global_s': per_step('t_global_s', digits=None),
+        'dt': per_step('dt', digits=None),
+        'SOC': per_cell('SOC'),
+        'Vterm': per_cell('Vterm'),
+        'OCV': per_cell('OCV'),
+        'V_RC1': per_cell('V_RC1'),
+        'V_RC2': per_cell('V_RC2'),
+        'R0': per_cell('V_R0'),
+        'R1': per_cell('V_R1'),
+        'R2': per_cell('V_R2'),
+        'C1': per_cell('V_C1'),
+        'C2': per_cell('V_C2'),
+        'I_cell': np.repeat(round_significant(I_module / n_p_avg, float_digits), N_cells),
+        'I_module': per_step('I_module'),
+        'V_module': per_step('V_module'),
+        'Qgen_cumulative': per_cell('Qgen_cumulative'),
+        'energy_throughput': per_cell('energy_throughput'),
+    }
+    # Metadata
+    meta_keys = ('step_key',) if step_metadata == 'dictionary' else META_FIELDS
+    for key in meta_keys + ('termination_msg',):
+        columns[key] = per_step(key, digits=None) if key in history else np.full(n_steps * N_cells, np.nan)
+    return pd.DataFrame(columns)
 
-def finalize_simulation(
+def _history_to_wide_dataframe(
     history: Dict,
-    last_written_timestep: int,
-    filename: str,
-    csv_mode: str,
+    N_cells: int,
+    n_series: int,
+    float_digits: Optional[int] = None,
+    step_metadata: str = 'inline'
+) -> pd.DataFrame:
+    """
+    Convert history columns to wide DF (one row per timestep).
+    Pack scalars and row metadata appear once per timestep; each per-cell quantity is
+    a fixed-width block of N_cells columns named like 'SOC[0]'.
+    """
+    n_steps = len(history['dt'])
+    n_p_avg = N_cells / n_series if n_series > 0 else 1
+    
+    I_module = np.asarray(history['I_module'], dtype=float)
+    scalars = {
+        'time_global_s': np.asarray(history['t_global_s'], dtype=float),
+        'dt': np.asarray(history['dt'], dtype=float),
+        'I_cell': round_significant(I_module / n_p_avg, float_digits),
+        'I_module': round_significant(I_module, float_digits),
+        'V_module': round_significant(history['V_module'], float_digits),
+    }
+    # Metadata
+    meta_keys = ('step_key',) if step_metadata == 'dictionary' else META_FIELDS
+    for key in meta_keys + ('termination_msg',):
+        scalars[key] = history[key] if key in history else np.full(n_steps, np.nan)
+    
+    blocks = [pd.DataFrame(scalars)]
+    for name, key in CELL_RESULT_FIELDS:
+        values = np.asarray(history[key], dtype=float).reshape(n_steps, N_cells)
+        blocks.append(pd.DataFrame(
+            round_significant(values, float_digits),
+            columns=[wide_cell_column(name, cell_id) for cell_id in range(N_cells)]
+        ))
+    return pd.concat(blocks, axis=1)
+
+
+def finalize_simulation(
+    history: HistoryBuffer,
     N_cells: int,
     n_series: int,
     t_global: float,
     stop_requested: bool,
     sim_terminated: bool,
-    stop_signal_file: Optional[str],
-    sim_id: Optional[str]
+    sim_id: Optional[str],
+    paused: bool = False
 ) -> tuple[str, int, str]:
     
     print(f"💾 Writing final results...")
-    current_timestep = len(history['dt'])
     
     # Write remaining data
-    csv_mode, last_written_timestep = write_partial_history(
-        history=history,
-        from_idx=last_written_timestep,
-        to_idx=current_timestep,
-        filename=filename,
-        csv_mode=csv_mode,
-        last_written_timestep=last_written_timestep,
-        N_cells=N_cells,
-        n_series=n_series
-    )
-    
-    # Clean up stop signal if present
-    cleanup_stop_signal(stop_requested, stop_signal_file)
+    write_partial_history(history, N_cells=N_cells, n_series=n_series)
+    total_timesteps = history.total_steps
     
     # Determine final status
-    status = determine_simulation_status(stop_requested, sim_terminated, sim_id)
+    status = determine_simulation_status(stop_requested, sim_terminated, sim_id, paused)
     
-    print(f"🏁 Solver {status}: {filename} ({current_timestep} timesteps, t_final={t_global:.1f}s)")
+    print(f"🏁 Solver {status}: {history.filename} ({total_timesteps} timesteps, t_final={t_global:.1f}s)")
     
-    return filename, current_timestep, status
-
-
-def cleanup_stop_signal(stop_requested: bool, stop_signal_file: Optional[str]) -> None:
-    if stop_requested and stop_signal_file and os.path.exists(stop_signal_file):
-        os.remove(stop_signal_file)
-        print(f"🗑️ Removed stop signal file")
+    return history.filename, total_timesteps, status
 
 
 def determine_simulation_status(
     stop_requested: bool,
     sim_terminated: bool,
-    sim_id: Optional[str]
+    sim_id: Optional[str],
+    paused: bool = False
 ) -> str:
     """
     Determine final simulation status based on termination conditions.
@@ -272,14 +386,16 @@ def determine_simulation_status(
         Whether simulation terminated early
     sim_id : str, optional
         Simulation ID
+    paused : bool
+        Whether the solver stopped on a pause request
         
     Returns:
     --------
     str
         Status string ('paused', 'stopped by user', 'terminated early', or 'completed')
     """
-    # Check if paused (pause ZIP exists)
-    if sim_id and os.path.exists(f"simulations/{sim_id}_pause.zip"):
+    # Check if paused (the API validates the continuation ZIP)
+    if paused:
         return 'paused'
     
     # Check other termination conditions
@@ -291,53 +407,37 @@ def determine_simulation_status(
         return 'completed'
 
 def handle_pause_signal(
-    pause_signal_file: Optional[str],
+    control: Optional[SolverControl],
     t_global: float,
     row_idx: int,
-    history: Dict,
-    last_written_timestep: int,
-    filename: str,
-    csv_mode: str,
+    history: HistoryBuffer,
     N_cells: int,
     n_series: int,
     pack_id: Optional[str],
     dc_id: Optional[str],
     sim_id: Optional[str],
     original_start_row: int
-) -> tuple[bool, str, int]:
+) -> bool:
     """
-    Handle pause signal detection and create continuation ZIP.
+    Handle a pause request on the control channel and create continuation ZIP.
     
     Returns:
     --------
-    tuple[bool, str, int]
-        (should_terminate, csv_mode, last_written_timestep)
+    bool
+        True if the solver should terminate
     """
-    if not (pause_signal_file and os.path.exists(pause_signal_file)):
-        return False, csv_mode, last_written_timestep
+    if control is None or control.requested != REQUEST_PAUSE:
+        return False
     
     print(f"⏸️ Pause signal detected at t={t_global:.1f}s, row {row_idx}")
     
     # Flush remaining history to CSV
-    current_timestep = len(history['dt'])
-    csv_mode, last_written_timestep = write_partial_history(
-        history=history,
-        from_idx=last_written_timestep,
-        to_idx=current_timestep,
-        filename=filename,
-        csv_mode=csv_mode,
-        last_written_timestep=last_written_timestep,
-        N_cells=N_cells,
-        n_series=n_series
-    )
+    write_partial_history(history, N_cells=N_cells, n_series=n_series)
     
     # Create continuation ZIP
-    create_pause_zip(pack_id, dc_id, sim_id, row_idx, original_start_row, t_global, filename)
+    create_pause_zip(pack_id, dc_id, sim_id, row_idx, original_start_row, t_global, history.filename)
     
-    # Remove signal
-    os.remove(pause_signal_file)
-    
-    return True, csv_mode, last_written_timestep
+    return True
 
 
 def create_pause_zip(
@@ -365,6 +465,8 @@ def create_pause_zip(
     try:
         with zipfile.ZipFile(zip_path, 'w') as zf:
             zf.write(filename, "simulation_data.csv")
+            if os.path.exists(step_table_path(filename)):
+                zf.write(step_table_path(filename), "step_metadata.csv")
             zf.writestr("metadata.json", json.dumps(metadata))
         print(f"⏸️ Pause ZIP created: {zip_path}, last_row={row_idx + original_start_row}")
     except Exception as e:
@@ -372,19 +474,19 @@ def create_pause_zip(
 
 
 def handle_stop_signal(
-    stop_signal_file: Optional[str],
+    control: Optional[SolverControl],
     t_global: float,
     row_idx: int
 ) -> bool:
     """
-    Handle stop signal detection.
+    Handle a stop request on the control channel.
     
     Returns:
     --------
     bool
-        True if stop signal detected, False otherwise
+        True if stop requested, False otherwise
     """
-    if stop_signal_file and os.path.exists(stop_signal_file):
+    if control is not None and control.requested == REQUEST_STOP:
         print(f"🛑 Stop signal detected at t={t_global:.1f}s, row {row_idx}")
         return True
     return False
@@ -394,79 +496,23 @@ def handle_periodic_write(
     current_time: float,
     last_write_time: float,
     write_interval: float,
-    history: Dict,
-    last_written_timestep: int,
-    filename: str,
-    csv_mode: str,
+    history: HistoryBuffer,
     N_cells: int,
     n_series: int
-) -> tuple[float, str, int]:
+) -> float:
     """
     Handle periodic CSV writes.
     
     Returns:
     --------
-    tuple[float, str, int]
-        (last_write_time, csv_mode, last_written_timestep)
+    float
+        Wall-clock time of the last write
     """
     if current_time - last_write_time >= write_interval:
-        current_timestep = len(history['dt'])
-        csv_mode, last_written_timestep = write_partial_history(
-            history=history,
-            from_idx=last_written_timestep,
-            to_idx=current_timestep,
-            filename=filename,
-            csv_mode=csv_mode,
-            last_written_timestep=last_written_timestep,
-            N_cells=N_cells,
-            n_series=n_series
-        )
-        return current_time, csv_mode, last_written_timestep
-    
-    return last_write_time, csv_mode, last_written_timestep
-
-
-def parse_row_data(row: pd.Series, dc_trigger_col: Optional[str], step_trigger_col: Optional[str], dt_base: float) -> Optional[Dict]:
-   
-    # Validate row
-    if pd.isna(row.get('Value Type')) or pd.isna(row.get('Value')):
-        return None
-    
-    step_type = str(row.get("Step Type", "fixed")).strip().lower()
-    step_duration = float(row.get("Step Duration (s)", np.inf)) if step_type != "trigger_only" else 0.0
-    dt_step = float(row.get("Timestep (s)", dt_base))
-    value_type = str(row.get("Value Type", "current")).strip().lower()
-    value = float(row.get("Value", 0.0))
-    unit = str(row.get("Unit", "")).strip().lower()
-    current_day = int(row.get("Day_of_year", 1))
-    current_dc = row.get("DriveCycle_ID", "")
-    current_subcycle = str(row.get("Subcycle_ID", "")) or ""
-    
-    step_triggers = []
-    if step_type == "fixed":
-        step_triggers = parse_trigger_list_from_row(row, column=step_trigger_col)
+        write_partial_history(history, N_cells=N_cells, n_series=n_series)
+        return current_time
     
-    dc_triggers = parse_trigger_list_from_row(row, column=dc_trigger_col)
-    
-    has_triggers = len(step_triggers + dc_triggers) > 0
-    use_batching = step_type == 'fixed' and not has_triggers
-    
-    return {
-        'step_type': step_type,
-        'step_duration': step_duration,
-        'dt_step': dt_step,
-        'value_type': value_type,
-        'value': value,
-        'unit': unit,
-        'current_day': current_day,
-        'current_dc': current_dc,
-        'current_subcycle': current_subcycle,
-        'step_triggers': step_triggers,
-        'dc_triggers': dc_triggers,
-        'has_triggers': has_triggers,
-        'use_batching': use_batching,
-        'row': row
-    }
+    return last_write_time
 
 
 def compute_timestep(
@@ -493,100 +539,116 @@ def compute_timestep(
         return dt_step if not use_batching else step_duration
 
 
-def solve_parallel_group(
-    group_id: int,
-    cells: List[Dict],
+def build_group_index(cells: List[Dict], parallel_groups: List) -> np.ndarray:
+    """Map every cell to the position of its parallel group in parallel_groups."""
+    group_pos = {group_id: i for i, group_id in enumerate(parallel_groups)}
+    return np.array([group_pos[c["parallel_group"]] for c in cells], dtype=np.intp)
+
+
+def build_rc_tables(cells: List[Dict]) -> List[tuple]:
+    """
+    Compile one RC lookup table per distinct rc_data and the cells that use it.
+    
+    Returns:
+    --------
+    List[tuple]
+        [(RCParameterTable, cell_indices), ...]; cell_indices is None when the
+        table covers every cell in order
+    """
+    groups = {}
+    for i, c in enumerate(cells):
+        groups.setdefault(id(c['rc_data']), (c['rc_data'], []))[1].append(i)
+    
+    if len(groups) == 1:
+        rc_data, _ = next(iter(groups.values()))
+        return [(get_rc_table(rc_data), None)]
+    return [(get_rc_table(rc_data), np.array(idx, dtype=np.intp)) for rc_data, idx in groups.values()]
+
+
+def lookup_cell_params(
+    rc_tables: List[tuple],
     sim_SOC: np.ndarray,
     sim_TempK: np.ndarray,
     sim_SOH: np.ndarray,
     sim_DCIR: np.ndarray,
+    mode: str
+) -> tuple:
+    """
+    Interpolate RC parameters for every cell of the pack.
+    
+    Returns:
+    --------
+    tuple
+        (OCV, R0, R1, R2, C1, C2) arrays of length N_cells
+    """
+    Temp_C = sim_TempK - 273.15
+    if len(rc_tables) == 1 and rc_tables[0][1] is None:
+        return rc_tables[0][0].lookup(sim_SOC, Temp_C, mode, sim_SOH, sim_DCIR)
+    
+    params = np.empty((6, len(sim_SOC)))
+    for table, idx in rc_tables:
+        params[:, idx] = table.lookup(sim_SOC[idx], Temp_C[idx], mode, sim_SOH[idx], sim_DCIR[idx])
+    return tuple(params)
+
+
+def solve_pack_step(
+    group_idx: np.ndarray,
+    n_groups: int,
+    OCV: np.ndarray,
+    R0: np.ndarray,
+    R1: np.ndarray,
+    R2: np.ndarray,
+    C1: np.ndarray,
+    C2: np.ndarray,
     sim_V_RC1: np.ndarray,
     sim_V_RC2: np.ndarray,
     I_module_current: float,
     dt: float,
-    R_p: float,
-    mode: str
-) -> Optional[tuple]:
+    R_p: float
+) -> tuple:
     """
-    Solve electrical equations for a parallel group.
+    Solve electrical equations for all parallel groups at once.
+    
+    Each group is the arrowhead system R_eff_i * I_i + V_g = K_i, sum(I_i) = I_module,
+    whose closed-form solution is V_g = (sum(K_i / R_eff_i) - I_module) / sum(1 / R_eff_i).
     
     Returns:
     --------
-    Optional[tuple]
-        (V_parallel, cell_updates) where cell_updates is a list of dicts with cell results,
-        or None if solving failed
+    tuple
+        (V_groups, I_cells, exp1, exp2) where V_groups is NaN for groups that could not
+        be solved and exp1/exp2 are the RC decay factors exp(-dt / tau) per cell
     """
-    group_cells = [i for i, c in enumerate(cells) if c["parallel_group"] == group_id]
-    N = len(group_cells)
-    
-    if N == 0:
-        return None
-    
-    A = np.zeros((N + 1, N + 1))
-    b = np.zeros(N + 1)
-    
-    cell_params = []
-    
-    for i, cell_idx in enumerate(group_cells):
-        SOC = sim_SOC[cell_idx]
-        Temp_C = sim_TempK[cell_idx] - 273.15
-        SOH = sim_SOH[cell_idx]
-        DCIR = sim_DCIR[cell_idx]
-        V_rc1_prev = sim_V_RC1[cell_idx]
-        V_rc2_prev = sim_V_RC2[cell_idx]
+    tau1 = np.where(C1 > 0, R1 * C1, 1e-6)
+    tau2 = np.where(C2 > 0, R2 * C2, 1e-6)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exp1 = np.exp(-dt / tau1)
+        exp2 = np.exp(-dt / tau2)
+        K = OCV - (sim_V_RC1 * exp1 + sim_V_RC2 * exp2)
+        R_eff = R0 + 2.0 * R_p + R1 * (1.0 - exp1) + R2 * (1.0 - exp2)
+        G = 1.0 / R_eff
         
-        OCV, R0, R1, R2, C1, C2 = get_battery_params(
-            cells[cell_idx]['rc_data'], SOC, Temp_C, mode, SOH, DCIR
-        )
-        
-        tau1 = R1 * C1 if C1 > 0 else 1e-6
-        tau2 = R2 * C2 if C2 > 0 else 1e-6
-        K = OCV - (V_rc1_prev * np.exp(-dt / tau1) + V_rc2_prev * np.exp(-dt / tau2))
-        R_eff = R0 + 2.0 * R_p + R1 * (1.0 - np.exp(-dt / tau1)) + R2 * (1.0 - np.exp(-dt / tau2))
-        
-        A[i, i] = R_eff
-        A[i, -1] = 1.0
-        b[i] = K
-        
-        cell_params.append({
-            'cell_idx': cell_idx,
-            'OCV': OCV,
-            'R0': R0,
-            'R1': R1,
-            'R2': R2,
-            'C1': C1,
-            'C2': C2,
-            'tau1': tau1,
-            'tau2': tau2
-        })
-    
-    A[-1, :N] = 1.0
-    b[-1] = I_module_current
+        sum_G = np.bincount(group_idx, weights=G, minlength=n_groups)
+        sum_KG = np.bincount(group_idx, weights=K * G, minlength=n_groups)
+        V_groups = (sum_KG - I_module_current) / sum_G
+        I_cells = (K - V_groups[group_idx]) * G
     
-    try:
-        x = np.linalg.solve(A, b)
-        V_parallel = x[-1]
-        
-        cell_updates = []
-        for i, params in enumerate(cell_params):
-            I_cell = x[i]
-            cell_updates.append({
-                'cell_idx': params['cell_idx'],
-                'I_cell': I_cell,
-                'params': params
-            })
-        
-        return V_parallel, cell_updates
+    V_groups[~np.isfinite(V_groups)] = np.nan
+    I_cells[~np.isfinite(I_cells)] = 0.0
     
-    except np.linalg.LinAlgError:
-        return None
+    return V_groups, I_cells, exp1, exp2
 
 
-def update_cell_states(
-    cell_idx: int,
-    I_cell: float,
+def update_pack_states(
+    I_cells: np.ndarray,
     dt: float,
-    params: Dict,
+    exp1: np.ndarray,
+    exp2: np.ndarray,
+    OCV: np.ndarray,
+    R0: np.ndarray,
+    R1: np.ndarray,
+    R2: np.ndarray,
+    solved: np.ndarray,
     sim_SOC: np.ndarray,
     sim_V_RC1: np.ndarray,
     sim_V_RC2: np.ndarray,
@@ -596,42 +658,387 @@ def update_cell_states(
     sim_SOH: np.ndarray,
     sim_TempK: np.ndarray,
     cum_energy_kWh: np.ndarray,
-    cum_qgen_Ws: np.ndarray
-) -> tuple[float, bool]:
+    cum_qgen_Ws: np.ndarray,
+    qgen_weight: float = 1.0
+) -> None:
+    """
+    Update cell states in place after solving. Cells whose group was not solved
+    (solved=False) keep their previous state. Qgen_cumulative accumulates the heat rate
+    once per timestep; qgen_weight counts a longer step as that many row timesteps.
+    """
+    V_rc1 = sim_V_RC1 * exp1 + R1 * I_cells * (1.0 - exp1)
+    V_rc2 = sim_V_RC2 * exp2 + R2 * I_cells * (1.0 - exp2)
+    Vterm = OCV - I_cells * R0 - V_rc1 - V_rc2
+    
+    next_SOC = calculate_next_soc(I_cells, dt, capacity_Ah, sim_SOC, coulombic_eff, sim_SOH)
+    
+    q_irr = (I_cells ** 2) * R0
+    q_rev = calculate_reversible_heat(sim_TempK, I_cells, sim_SOC)
+    q_gen = q_irr + q_rev
+    
+    energy_kWh = np.abs(I_cells * Vterm * dt) / (3600.0 * 1000.0)
+    
+    # Update states
+    np.copyto(sim_SOC, next_SOC, where=solved)
+    np.copyto(sim_V_RC1, V_rc1, where=solved)
+    np.copyto(sim_V_RC2, V_rc2, where=solved)
+    np.copyto(sim_V_term, Vterm, where=solved)
+    np.add(cum_energy_kWh, energy_kWh, out=cum_energy_kWh, where=solved)
+    np.add(cum_qgen_Ws, q_gen * qgen_weight, out=cum_qgen_Ws, where=solved)
+
+
+def advance_pack(
+    sim_states: Dict,
+    rc_tables: List[tuple],
+    group_idx: np.ndarray,
+    n_series: int,
+    I_module_current: float,
+    dt: float,
+    R_p: float,
+    R_s: float,
+    capacity_Ah: float,
+    coulombic_eff: float,
+    qgen_weight: float = 1.0
+) -> Dict:
     """
-    Update cell states after solving.
+    Advance every cell of the pack by one step of dt at I_module_current, updating
+    sim_states in place.
     
     Returns:
     --------
-    tuple[float, bool]
-        (Vterm, cutoff_hit)
+    Dict
+        Interpolated parameters (OCV, R0, R1, R2, C1, C2), V_groups, I_cells,
+        solved_groups and v_module for the step
     """
-    R1 = params['R1']
-    R2 = params['R2']
-    tau1 = params['tau1']
-    tau2 = params['tau2']
+    mode = "CHARGE" if I_module_current < 0 else "DISCHARGE"
     
-    V_rc1 = sim_V_RC1[cell_idx] * np.exp(-dt / tau1) + R1 * I_cell * (1.0 - np.exp(-dt / tau1))
-    V_rc2 = sim_V_RC2[cell_idx] * np.exp(-dt / tau2) + R2 * I_cell * (1.0 - np.exp(-dt / tau2))
-    Vterm = params['OCV'] - I_cell * params['R0'] - V_rc1 - V_rc2
+    OCV, R0, R1, R2, C1, C2 = lookup_cell_params(
+        rc_tables, sim_states['sim_SOC'], sim_states['sim_TempK'],
+        sim_states['sim_SOH'], sim_states['sim_DCIR'], mode
+    )
     
-    next_SOC = calculate_next_soc(I_cell, dt, capacity_Ah, sim_SOC[cell_idx], coulombic_eff, sim_SOH[cell_idx])
+    V_groups, I_cells, exp1, exp2 = solve_pack_step(
+        group_idx=group_idx,
+        n_groups=n_series,
+        OCV=OCV,
+        R0=R0,
+        R1=R1,
+        R2=R2,
+        C1=C1,
+        C2=C2,
+        sim_V_RC1=sim_states['sim_V_RC1'],
+        sim_V_RC2=sim_states['sim_V_RC2'],
+        I_module_current=I_module_current,
+        dt=dt,
+        R_p=R_p
+    )
+    solved_groups = ~np.isnan(V_groups)
+    
+    update_pack_states(
+        I_cells=I_cells,
+        dt=dt,
+        exp1=exp1,
+        exp2=exp2,
+        OCV=OCV,
+        R0=R0,
+        R1=R1,
+        R2=R2,
+        solved=solved_groups[group_idx],
+        sim_SOC=sim_states['sim_SOC'],
+        sim_V_RC1=sim_states['sim_V_RC1'],
+        sim_V_RC2=sim_states['sim_V_RC2'],
+        sim_V_term=sim_states['sim_V_term'],
+        capacity_Ah=capacity_Ah,
+        coulombic_eff=coulombic_eff,
+        sim_SOH=sim_states['sim_SOH'],
+        sim_TempK=sim_states['sim_TempK'],
+        cum_energy_kWh=sim_states['cum_energy_kWh'],
+        cum_qgen_Ws=sim_states['cum_qgen_Ws'],
+        qgen_weight=qgen_weight
+    )
     
-    q_irr = (I_cell ** 2) * params['R0']
-    q_rev = calculate_reversible_heat(sim_TempK[cell_idx], I_cell, sim_SOC[cell_idx])
-    q_gen = q_irr + q_rev
+    # Module voltage over the solved groups
+    v_groups = V_groups[solved_groups]
+    num_series_eff = len(v_groups)
+    v_module = float(np.sum(v_groups) - abs(I_module_current) * R_s * max(0, num_series_eff - 1)) if num_series_eff > 0 else 0.0
     
-    # Update states
-    sim_SOC[cell_idx] = next_SOC
-    sim_V_RC1[cell_idx] = V_rc1
-    sim_V_RC2[cell_idx] = V_rc2
-    sim_V_term[cell_idx] = Vterm
+    return {
+        'OCV': OCV, 'R0': R0, 'R1': R1, 'R2': R2, 'C1': C1, 'C2': C2,
+        'V_groups': V_groups,
+        'I_cells': I_cells,
+        'solved_groups': solved_groups,
+        'v_module': v_module,
+    }
+
+
+def relax_pack(
+    sim_states: Dict,
+    rc_tables: List[tuple],
+    group_idx: np.ndarray,
+    n_series: int,
+    dt: float
+) -> Dict:
+    """
+    Advance the pack across dt of rest (no cell current) in closed form, updating
+    sim_states in place: the RC voltages decay as exp(-dt / tau) while SOC, energy
+    throughput and Qgen_cumulative stay put.
+    
+    Returns:
+    --------
+    Dict
+        Same keys as advance_pack
+    """
+    OCV, R0, R1, R2, C1, C2 = lookup_cell_params(
+        rc_tables, sim_states['sim_SOC'], sim_states['sim_TempK'],
+        sim_states['sim_SOH'], sim_states['sim_DCIR'], "DISCHARGE"
+    )
+    tau1 = np.where(C1 > 0, R1 * C1, 1e-6)
+    tau2 = np.where(C2 > 0, R2 * C2, 1e-6)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sim_states['sim_V_RC1'] *= np.exp(-dt / tau1)
+        sim_states['sim_V_RC2'] *= np.exp(-dt / tau2)
+    sim_states['sim_V_term'][:] = OCV - sim_states['sim_V_RC1'] - sim_states['sim_V_RC2']
+    
+    # Open-circuit group voltage: mean terminal voltage of its cells
+    group_size = np.bincount(group_idx, minlength=n_series)
+    V_groups = np.bincount(group_idx, weights=sim_states['sim_V_term'], minlength=n_series) / np.maximum(group_size, 1)
+    solved_groups = group_size > 0
+    
+    return {
+        'OCV': OCV, 'R0': R0, 'R1': R1, 'R2': R2, 'C1': C1, 'C2': C2,
+        'V_groups': V_groups,
+        'I_cells': np.zeros_like(OCV),
+        'solved_groups': solved_groups,
+        'v_module': float(np.sum(V_groups[solved_groups])),
+    }
+
+
+def advance_day_time(per_day_time: float, dt: float) -> float:
+    """Time of day after a step of dt, wrapped at midnight."""
+    per_day_time += float(dt)
+    if abs(per_day_time % 86400) < 1e-6:
+        per_day_time = 0.0
+    if per_day_time >= 86400.0:
+        per_day_time -= 86400.0
+    return per_day_time
+
+
+def time_to_midnight(per_day_time: float, dt_step: float) -> float:
+    """
+    Longest step that stays one dt_step short of midnight. per_day_time wraps at
+    midnight, so time-of-day trigger metrics are only monotone before it.
+    """
+    return max(dt_step, 86400.0 - per_day_time - dt_step)
+
+
+def copy_pack_states(sim_states: Dict) -> Dict:
+    """Independent copy of the per-cell state arrays, for trial steps."""
+    return {key: np.array(values, dtype=float) for key, values in sim_states.items()}
+
+
+def trial_step(
+    dt: float,
+    sim_states: Dict,
+    row_data: Dict,
+    I_module_current: float,
+    time_in_step: float,
+    t_global: float,
+    per_day_time: float,
+    rc_tables: List[tuple],
+    group_idx: np.ndarray,
+    n_series: int,
+    parallel_groups: List,
+    R_p: float,
+    R_s: float,
+    capacity_Ah: float,
+    coulombic_eff: float,
+    HARD_V_cell_max: float,
+    HARD_V_cell_min: float,
+    HARD_V_pack_max: float,
+    HARD_V_pack_min: float,
+    rest: bool = False
+) -> tuple[bool, float]:
+    """
+    Try a step of dt from the current state without committing it (sim_states is left
+    untouched). rest=True tries relax_pack instead of advance_pack.
+    
+    Returns:
+    --------
+    tuple[bool, float]
+        (fired, max_dsoc): whether the step hits a voltage cutoff or fires any of the
+        row's triggers, and the largest per-cell SOC change over the step
+    """
+    trial_states = copy_pack_states(sim_states)
+    if rest:
+        step = relax_pack(trial_states, rc_tables, group_idx, n_series, dt)
+    else:
+        step = advance_pack(
+            trial_states, rc_tables, group_idx, n_series, I_module_current, dt,
+            R_p, R_s, capacity_Ah, coulombic_eff
+        )
+    max_dsoc = float(np.max(np.abs(trial_states['sim_SOC'] - sim_states['sim_SOC'])))
+    
+    cutoff_hit, _ = check_voltage_cutoffs(
+        trial_states['sim_V_term'], step['v_module'],
+        HARD_V_cell_min, HARD_V_cell_max,
+        HARD_V_pack_min, HARD_V_pack_max
+    )
+    if cutoff_hit:
+        return True, max_dsoc
+    
+    # Triggers see the same post-step clocks as evaluate_and_handle_triggers
+    action = row_data['triggers'].evaluate(
+        trial_states['sim_SOC'], trial_states['sim_V_term'], step['v_module'],
+        time_in_step + dt, step['I_cells'], I_module_current,
+        capacity_Ah, advance_day_time(per_day_time, dt), n_series
+    )
+    return action is not None, max_dsoc
+
+
+def locate_step_event(trial, dt_max: float, dt_step: float, max_dsoc: float = EVENT_MAX_DSOC) -> float:
+    """
+    Choose the step size for an event-localized row.
     
-    energy_kWh = abs(I_cell * Vterm * dt) / (3600.0 * 1000.0)
-    cum_energy_kWh[cell_idx] += energy_kWh
-    cum_qgen_Ws[cell_idx] += q_gen
+    trial(dt) -> (fired, max_dsoc) as returned by trial_step. dt_max is first halved
+    (on the row's dt_step grid) until the SOC change per step is at most max_dsoc. If
+    nothing fires within it the whole step is taken; otherwise bisects on the dt_step
+    grid for the shortest step at which the event fires, i.e. the step on which fixed
+    stepping would have seen it. Assumes the event metric is monotone over [0, dt_max].
     
-    return Vterm, False
+    Returns:
+    --------
+    float
+        Step size dt (0 < dt <= dt_max)
+    """
+    fired, dsoc = trial(dt_max)
+    while dsoc > max_dsoc and dt_max > dt_step:
+        dt_max = max(dt_step, dt_step * np.floor(0.5 * dt_max / dt_step))
+        fired, dsoc = trial(dt_max)
+    if not fired:
+        return dt_max
+    
+    # trial(lo * dt_step) does not fire, trial(hi * dt_step) does
+    lo, hi = 0, int(np.ceil(dt_max / dt_step))
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if trial(min(mid * dt_step, dt_max))[0]:
+            hi = mid
+        else:
+            lo = mid
+    return min(hi * dt_step, dt_max)
+
+
+def estimate_step_error(
+    dt: float,
+    sim_states: Dict,
+    rc_tables: List[tuple],
+    group_idx: np.ndarray,
+    n_series: int,
+    I_module_current: float,
+    R_p: float,
+    R_s: float,
+    capacity_Ah: float,
+    coulombic_eff: float
+) -> float:
+    """
+    Step-doubling estimate of the local error of a step of dt: one step of dt against
+    two of dt/2, on SOC and the RC voltages. sim_states is left untouched.
+    
+    Returns:
+    --------
+    float
+        Error relative to ADAPTIVE_SOC_TOL / ADAPTIVE_VRC_TOL (<= 1 is acceptable)
+    """
+    full = copy_pack_states(sim_states)
+    advance_pack(full, rc_tables, group_idx, n_series, I_module_current, dt, R_p, R_s, capacity_Ah, coulombic_eff)
+    half = copy_pack_states(sim_states)
+    for _ in range(2):
+        advance_pack(half, rc_tables, group_idx, n_series, I_module_current, 0.5 * dt, R_p, R_s, capacity_Ah, coulombic_eff)
+    
+    soc_err = np.max(np.abs(full['sim_SOC'] - half['sim_SOC'])) / ADAPTIVE_SOC_TOL
+    vrc_err = max(
+        np.max(np.abs(full['sim_V_RC1'] - half['sim_V_RC1'])),
+        np.max(np.abs(full['sim_V_RC2'] - half['sim_V_RC2']))
+    ) / ADAPTIVE_VRC_TOL
+    return float(max(soc_err, vrc_err))
+
+
+def choose_adaptive_dt(step_error, dt_try: float, dt_step: float, dt_max: float) -> tuple[float, float]:
+    """
+    Pick an error-controlled step on the dt_step grid, starting from dt_try and
+    shrinking until step_error(dt) <= 1 (or dt is a single dt_step).
+    
+    Returns:
+    --------
+    tuple[float, float]
+        (dt, dt_next) where dt_next is the suggested first try for the next step
+    """
+    def on_grid(h):
+        return min(dt_max, max(dt_step, dt_step * np.floor(h / dt_step)))
+    
+    dt = on_grid(dt_try)
+    err = step_error(dt)
+    while err > 1.0 and dt > dt_step:
+        dt = on_grid(dt * max(0.2, 0.9 / np.sqrt(err)))
+        err = step_error(dt)
+    
+    # First-order scheme: local error ~ dt^2
+    growth = 4.0 if err == 0 else min(4.0, max(0.5, 0.9 / np.sqrt(err)))
+    return dt, dt * growth
+
+
+def resample_pack_step(
+    pre_states: Dict,
+    sim_states: Dict,
+    step: Dict,
+    dt: float,
+    grid_dt: float,
+    group_idx: np.ndarray,
+    n_series: int
+) -> List[tuple]:
+    """
+    Reconstruct the states inside a committed step of dt at multiples of grid_dt.
+    
+    Cell currents and parameters are constant over the step, so the RC voltages follow
+    their exponential relaxation exactly; SOC and the cumulative quantities are linear
+    in time and V_module follows the mean change of each group's terminal voltage.
+    
+    Returns:
+    --------
+    List[tuple]
+        [(tau, states, v_module), ...] for 0 < tau < dt, where states holds sim_SOC,
+        sim_V_term, sim_V_RC1, sim_V_RC2, cum_energy_kWh and cum_qgen_Ws
+    """
+    n_points = int(np.ceil(dt / grid_dt - 1e-9))
+    if n_points <= 1:
+        return []
+    
+    I_cells = step['I_cells']
+    R1, R2 = step['R1'], step['R2']
+    tau1 = np.where(step['C1'] > 0, R1 * step['C1'], 1e-6)
+    tau2 = np.where(step['C2'] > 0, R2 * step['C2'], 1e-6)
+    solved = step['solved_groups']
+    group_size = np.bincount(group_idx, minlength=n_series)
+    
+    samples = []
+    for k in range(1, n_points):
+        tau = k * grid_dt
+        frac = tau / dt
+        with np.errstate(divide='ignore', invalid='ignore'):
+            e1 = np.exp(-tau / tau1)
+            e2 = np.exp(-tau / tau2)
+        V_rc1 = pre_states['sim_V_RC1'] * e1 + R1 * I_cells * (1.0 - e1)
+        V_rc2 = pre_states['sim_V_RC2'] * e2 + R2 * I_cells * (1.0 - e2)
+        Vterm = step['OCV'] - I_cells * step['R0'] - V_rc1 - V_rc2
+        
+        states = {'sim_V_RC1': V_rc1, 'sim_V_RC2': V_rc2, 'sim_V_term': Vterm}
+        for key in ('sim_SOC', 'cum_energy_kWh', 'cum_qgen_Ws'):
+            states[key] = pre_states[key] + (sim_states[key] - pre_states[key]) * frac
+        
+        dV_groups = np.bincount(group_idx, weights=Vterm - sim_states['sim_V_term'], minlength=n_series) / np.maximum(group_size, 1)
+        v_module = step['v_module'] + float(np.sum(dV_groups[solved]))
+        samples.append((tau, states, v_module))
+    return samples
 
 
 def check_voltage_cutoffs(
@@ -664,7 +1071,7 @@ def check_voltage_cutoffs(
 
 
 def log_to_history(
-    history: Dict,
+    history: HistoryBuffer,
     dt: float,
     t_global: float,
     sim_SOC: np.ndarray,
@@ -682,91 +1089,99 @@ def log_to_history(
     cum_energy_kWh: np.ndarray,
     cum_qgen_Ws: np.ndarray,
     row_data: Dict,
-    dc_trigger_col: Optional[str],
-    step_trigger_col: Optional[str],
+    n_series: int,
     msg: str = ""
 ) -> None:
-    """Log current timestep data to history."""
-    row = row_data['row']
-    
-    history["dt"].append(float(dt))
-    history["t_global_s"].append(float(t_global + dt))
-    history["SOC"].append(sim_SOC.copy())
-    history["Vterm"].append(sim_V_term.copy())
-    history["OCV"].append(sim_OCV.copy())
-    history["V_RC1"].append(sim_V_RC1.copy())
-    history["V_RC2"].append(sim_V_RC2.copy())
-    history["V_R0"].append(sim_R0.copy())
-    history["V_R1"].append(sim_R1.copy())
-    history["V_R2"].append(sim_R2.copy())
-    history["V_C1"].append(sim_C1.copy())
-    history["V_C2"].append(sim_C2.copy())
-    history["I_module"].append(float(I_module_current))
-    history["V_module"].append(float(v_module))
-    history["energy_throughput"].append(cum_energy_kWh.copy())
-    history["Qgen_cumulative"].append(cum_qgen_Ws.copy())
+    """
+    Log current timestep data to history, flushing to CSV when the buffer is full.
+    Timesteps the history's logging policy skips are held back (see log_held_step).
+    """
+    step_values = {
+        'dt': dt,
+        't_global_s': t_global + dt,
+        'I_module': I_module_current,
+        'V_module': v_module,
+    }
+    cell_values = {
+        'SOC': sim_SOC,
+        'Vterm': sim_V_term,
+        'OCV': sim_OCV,
+        'V_RC1': sim_V_RC1,
+        'V_RC2': sim_V_RC2,
+        'V_R0': sim_R0,
+        'V_R1': sim_R1,
+        'V_R2': sim_R2,
+        'V_C1': sim_C1,
+        'V_C2': sim_C2,
+        'energy_throughput': cum_energy_kWh,
+        'Qgen_cumulative': cum_qgen_Ws,
+    }
     
-    # Metadata
-    history["Global Step Index"].append(row.get("Global Step Index", np.nan))
-    history["Day_of_year"].append(row.get("Day_of_year", np.nan))
-    history["DriveCycle_ID"].append(row.get("DriveCycle_ID", ""))
-    history["Subcycle_ID"].append(row_data['current_subcycle'])
-    history["Subcycle Step Index"].append(row.get("Subcycle Step Index", np.nan))
-    history["Value Type"].append(row_data['value_type'])
-    history["Value"].append(row_data['value'])
-    history["Unit"].append(row_data['unit'])
-    history["Step Type"].append(row_data['step_type'])
-    history["Label"].append(row.get("Label", ""))
-    history["Ambient Temp (°C)"].append(row.get("Ambient Temp (°C)", np.nan))
-    history["Location"].append(row.get("Location", ""))
-    history["drive cycle trigger"].append(str(row.get(dc_trigger_col, "")) if dc_trigger_col else "")
-    history["step Trigger(s)"].append(str(row.get(step_trigger_col, "")) if step_trigger_col else "")
-    history["termination_msg"].append(msg)
+    policy = history.logging_policy
+    if policy is not None:
+        if not policy.admit(step_values, cell_values, row_data['step_key'], msg):
+            policy.hold(step_values, cell_values, row_data['metadata'], row_data['step_key'])
+            return
+        policy.record(step_values, cell_values, row_data['step_key'])
+    
+    if history.is_full():
+        write_partial_history(history, N_cells=history.N_cells, n_series=n_series)
+    
+    history.append(
+        step_values=step_values,
+        cell_values=cell_values,
+        metadata=row_data['metadata'],
+        step_key=row_data['step_key'],
+        msg=msg
+    )
+
+
+def log_held_step(history: HistoryBuffer, n_series: int) -> None:
+    """Log the timestep the logging policy held back last, so every row keeps its final timestep."""
+    policy = history.logging_policy
+    held = policy.take_held() if policy is not None else None
+    if held is None:
+        return
+    
+    step_values, cell_values, metadata, step_key = held
+    policy.record(step_values, cell_values, step_key)
+    if history.is_full():
+        write_partial_history(history, N_cells=history.N_cells, n_series=n_series)
+    history.append(step_values, cell_values, metadata, step_key)
 
 
 def evaluate_and_handle_triggers(
-    step_triggers: List,
-    dc_triggers: List,
+    triggers: CompiledTriggers,
     sim_SOC: np.ndarray,
     sim_V_term: np.ndarray,
     v_module: float,
     time_in_step: float,
-    t_global: float,
     I_cells_step: np.ndarray,
     I_module_current: float,
     capacity_Ah: float,
     per_day_time: float,
-    current_day: int,
-    parallel_groups: List,
-    dc_table: pd.DataFrame,
-    row_idx: int,
-    current_subcycle: str,
-    current_dc: str
+    n_series: int,
+    schedule: CompiledSchedule,
+    row_idx: int
 ) -> tuple[bool, int]:
     """
-    Evaluate triggers and advance row index if needed.
+    Evaluate the row's compiled triggers and advance row index if needed.
     
     Returns:
     --------
     tuple[bool, int]
         (should_break, new_row_idx)
     """
-    all_triggers = step_triggers + dc_triggers
-    
-    fired = evaluate_triggers(
-        all_triggers, sim_SOC, sim_V_term, v_module, time_in_step, t_global,
-        I_cells_step, I_module_current, capacity_Ah, per_day_time, current_day, parallel_groups
+    action = triggers.evaluate(
+        sim_SOC, sim_V_term, v_module, time_in_step,
+        I_cells_step, I_module_current, capacity_Ah, per_day_time, n_series
     )
     
-    advance_actions = [tr['action_level'] for tr in fired]
-    
-    if 'day' in advance_actions:
-        new_row_idx = advance_row_idx_for_action(dc_table, row_idx, 'day', current_subcycle, current_dc, current_day)
-        return True, new_row_idx
-    elif 'dc' in advance_actions:
-        new_row_idx = advance_row_idx_for_action(dc_table, row_idx, 'dc', current_subcycle, current_dc, current_day)
-        return True, new_row_idx
-    elif 'step' in advance_actions:
+    if action == 'day':
+        return True, schedule.advance(row_idx, 'day')
+    elif action == 'dc':
+        return True, schedule.advance(row_idx, 'dc')
+    elif action == 'step':
         return True, row_idx + 1
     
     return False, row_idx
@@ -774,15 +1189,14 @@ def evaluate_and_handle_triggers(
 
 def process_single_row(
     row_idx: int,
-    dc_table: pd.DataFrame,
-    dc_trigger_col: Optional[str],
-    step_trigger_col: Optional[str],
-    dt_base: float,
+    schedule: CompiledSchedule,
     sim_states: Dict,
     cells: List[Dict],
     capacity_Ah: float,
     coulombic_eff: float,
     parallel_groups: List,
+    group_idx: np.ndarray,
+    rc_tables: List[tuple],
     n_series: int,
     R_p: float,
     R_s: float,
@@ -790,23 +1204,35 @@ def process_single_row(
     HARD_V_cell_min: float,
     HARD_V_pack_max: float,
     HARD_V_pack_min: float,
-    history: Dict,
+    history: HistoryBuffer,
     cutoff_row_guard: Dict,
     t_global: float,
-    per_day_time: float
+    per_day_time: float,
+    timestep_mode: str = 'fixed',
+    event_max_dt: float = EVENT_MAX_DT_S,
+    rest_fast_forward: bool = False,
+    rest_sample_dt: float = REST_SAMPLE_DT_S,
+    control: Optional[SolverControl] = None
 ) -> tuple[int, float, float, bool, bool]:
     """
     Process a single row from the drive cycle table.
     
+    With timestep_mode='event', trigger_only and triggered rows advance in steps of up to
+    event_max_dt, shortened onto the first trigger or cutoff crossing (locate_step_event).
+    With 'adaptive', fixed-duration current/C-rate rows are also stepped that way, with
+    step sizes from choose_adaptive_dt and output resampled onto the row's timestep grid.
+    With rest_fast_forward, zero-current stretches jump (relax_pack) to the end of the row,
+    midnight or the first trigger/cutoff, logging a sample every rest_sample_dt.
+    Every timestep is published to control as progress. A stop request on control ends
+    the row early (row_idx unchanged) so the main loop stops without finishing it; pauses
+    wait for the row boundary to keep resumes exact.
+    
     Returns:
     --------
     tuple[int, float, float, bool, bool]
         (new_row_idx, new_t_global, new_per_day_time, sim_terminated, cutoff_hit)
     """
-    row = dc_table.iloc[row_idx]
-    
-    # Parse row data
-    row_data = parse_row_data(row, dc_trigger_col, step_trigger_col, dt_base)
+    row_data = schedule.row_data(row_idx)
     
     if row_data is None:
         print(f"⚠️ Skipping invalid row {row_idx}")
@@ -821,7 +1247,20 @@ def process_single_row(
     if(row_data['step_type'] == 'trigger_only'):
         max_inner_iters = 86400  # 1 day max for trigger only steps
 
-    dt = row_data['step_duration'] if row_data['use_batching'] else row_data['dt_step']
+    adaptive = (
+        timestep_mode == 'adaptive'
+        and row_data['step_type'] in ('fixed', 'fixed_with_triggers')
+        and row_data['step_duration'] < np.inf
+        and row_data['value_type'] in ('current', 'c_rate')
+    )
+    use_batching = row_data['use_batching'] and not adaptive
+    localize_events = adaptive or (
+        timestep_mode in ('event', 'adaptive') and (row_data['step_type'] == 'trigger_only' or row_data['has_triggers'])
+    )
+    dt_next = row_data['dt_step']
+    I_cells_step = None
+
+    dt = row_data['step_duration'] if use_batching else row_data['dt_step']
     
     # Inner step loop
     while True:
@@ -831,6 +1270,11 @@ def process_single_row(
         
         inner_iters += 1
         
+        if control is not None:
+            control.report_step(t_global, row_idx)
+            if control.requested == REQUEST_STOP:
+                return row_idx, t_global, per_day_time, False, False
+        
         # Compute module current
         if I_module_current_for_step is None or row_data['value_type'] in ['voltage', 'power']:
             I_module_current = compute_module_current_from_step(
@@ -859,25 +1303,55 @@ def process_single_row(
             row_data['step_duration'],
             time_in_step,
             row_data['dt_step'],
-            row_data['use_batching']
+            use_batching
         )
         
         if dt_computed is None:
             return row_idx + 1, t_global, per_day_time, False, False
         
         dt = dt_computed
+        remaining = row_data['step_duration'] - time_in_step if row_data['step_type'] != 'trigger_only' else np.inf
         
-        # Physics simulation
-        mode = "CHARGE" if I_module_current < 0 else "DISCHARGE"
-        v_groups = []
+        # Rest with settled balancing currents (seen on the previous step) relaxes in closed form
+        rest_step = (
+            rest_fast_forward and I_module_current == 0.0 and not use_batching
+            and I_cells_step is not None and np.max(np.abs(I_cells_step)) <= REST_CURRENT_TOL_A
+        )
+        resample_dt = rest_sample_dt if rest_step else row_data['dt_step'] if adaptive else None
         
-        sim_OCV = np.zeros(len(cells))
-        sim_R0 = np.zeros(len(cells))
-        sim_R1 = np.zeros(len(cells))
-        sim_R2 = np.zeros(len(cells))
-        sim_C1 = np.zeros(len(cells))
-        sim_C2 = np.zeros(len(cells))
-        I_cells_step = np.zeros(len(cells))
+        if rest_step:
+            dt = locate_step_event(
+                lambda h: trial_step(
+                    h, sim_states, row_data, I_module_current, time_in_step, t_global, per_day_time,
+                    rc_tables, group_idx, n_series, parallel_groups, R_p, R_s, capacity_Ah, coulombic_eff,
+                    HARD_V_cell_max, HARD_V_cell_min, HARD_V_pack_max, HARD_V_pack_min, rest=True
+                ),
+                dt_max=max(min(remaining, time_to_midnight(per_day_time, row_data['dt_step'])), dt),
+                dt_step=row_data['dt_step'],
+                max_dsoc=np.inf
+            )
+        elif localize_events:
+            # Large step, cut back onto the first trigger/cutoff crossing; never across midnight
+            dt_max = max(min(event_max_dt, remaining, time_to_midnight(per_day_time, row_data['dt_step'])), dt)
+            if adaptive:
+                dt_max, dt_next = choose_adaptive_dt(
+                    lambda h: estimate_step_error(
+                        h, sim_states, rc_tables, group_idx, n_series, I_module_current,
+                        R_p, R_s, capacity_Ah, coulombic_eff
+                    ),
+                    dt_try=dt_next,
+                    dt_step=row_data['dt_step'],
+                    dt_max=dt_max
+                )
+            dt = locate_step_event(
+                lambda h: trial_step(
+                    h, sim_states, row_data, I_module_current, time_in_step, t_global, per_day_time,
+                    rc_tables, group_idx, n_series, parallel_groups, R_p, R_s, capacity_Ah, coulombic_eff,
+                    HARD_V_cell_max, HARD_V_cell_min, HARD_V_pack_max, HARD_V_pack_min
+                ),
+                dt_max=dt_max,
+                dt_step=row_data['dt_step']
+            )
         
         cutoff_count = cutoff_row_guard.get(row_idx, 0)
 
@@ -887,76 +1361,30 @@ def process_single_row(
         
         cutoff_hit = False
         
-        # Solve for each parallel group
-        for group_id in parallel_groups:
-            if cutoff_hit:
-                break
-            
-            result = solve_parallel_group(
-                group_id=group_id,
-                cells=cells,
-                sim_SOC=sim_states['sim_SOC'],
-                sim_TempK=sim_states['sim_TempK'],
-                sim_SOH=sim_states['sim_SOH'],
-                sim_DCIR=sim_states['sim_DCIR'],
-                sim_V_RC1=sim_states['sim_V_RC1'],
-                sim_V_RC2=sim_states['sim_V_RC2'],
-                I_module_current=I_module_current,
-                dt=dt,
-                R_p=R_p,
-                mode=mode
+        # Solve all parallel groups in one pass
+        pre_states = copy_pack_states(sim_states) if resample_dt else None
+        if rest_step:
+            step = relax_pack(sim_states, rc_tables, group_idx, n_series, dt)
+        else:
+            step = advance_pack(
+                sim_states, rc_tables, group_idx, n_series, I_module_current, dt,
+                R_p, R_s, capacity_Ah, coulombic_eff,
+                qgen_weight=dt / row_data['dt_step'] if localize_events else 1.0
             )
-            
-            if result is None:
-                print(f"⚠️ LinAlg error at row {row_idx}, dt {dt}; skipping group {group_id}")
-                continue
-            
-            
-            V_parallel, cell_updates = result
-            v_groups.append(V_parallel)
-            
-            # Update each cell in the group
-            for update in cell_updates:
-                cell_idx = update['cell_idx']
-                I_cell = update['I_cell']
-                params = update['params']
-                
-                # Store parameters
-                sim_OCV[cell_idx] = params['OCV']
-                sim_R0[cell_idx] = params['R0']
-                sim_R1[cell_idx] = params['R1']
-                sim_R2[cell_idx] = params['R2']
-                sim_C1[cell_idx] = params['C1']
-                sim_C2[cell_idx] = params['C2']
-
-                I_cells_step[cell_idx] = I_cell
-                
-                Vterm, cell_cutoff = update_cell_states(
-                    cell_idx=cell_idx,
-                    I_cell=I_cell,
-                    dt=dt,
-                    params=params,
-                    sim_SOC=sim_states['sim_SOC'],
-                    sim_V_RC1=sim_states['sim_V_RC1'],
-                    sim_V_RC2=sim_states['sim_V_RC2'],
-                    sim_V_term=sim_states['sim_V_term'],
-                    capacity_Ah=capacity_Ah,
-                    coulombic_eff=coulombic_eff,
-                    sim_SOH=sim_states['sim_SOH'],
-                    sim_TempK=sim_states['sim_TempK'],
-                    cum_energy_kWh=sim_states['cum_energy_kWh'],
-                    cum_qgen_Ws=sim_states['cum_qgen_Ws']
-                )
-                
-                # Check cell cutoff
-                if not np.isnan(HARD_V_cell_min) and (Vterm > HARD_V_cell_max or Vterm < HARD_V_cell_min):
-                    cutoff_hit = True
-                    cutoff_row_guard[row_idx] = cutoff_count + 1
-                    break
+        sim_OCV, sim_R0, sim_R1, sim_R2, sim_C1, sim_C2 = (step[k] for k in ('OCV', 'R0', 'R1', 'R2', 'C1', 'C2'))
+        I_cells_step = step['I_cells']
+        v_module = step['v_module']
+        
+        solved_groups = step['solved_groups']
+        if not solved_groups.all():
+            skipped = [parallel_groups[i] for i in np.flatnonzero(~solved_groups)]
+            print(f"⚠️ Singular group system at row {row_idx}, dt {dt}; skipping groups {skipped}")
         
-        # Calculate module voltage
-        num_series_eff = len(v_groups)
-        v_module = float(np.sum(v_groups) - abs(I_module_current) * R_s * max(0, num_series_eff - 1)) if num_series_eff > 0 else 0.0
+        # Check cell cutoff
+        sim_V_term = sim_states['sim_V_term']
+        if not np.isnan(HARD_V_cell_min) and (np.any(sim_V_term > HARD_V_cell_max) or np.any(sim_V_term < HARD_V_cell_min)):
+            cutoff_hit = True
+            cutoff_row_guard[row_idx] = cutoff_count + 1
         
         # Check pack cutoff
         pack_cutoff_hit, cutoff_type = check_voltage_cutoffs(
@@ -969,11 +1397,40 @@ def process_single_row(
             cutoff_hit = True
         
         # Log to history
-        if not cutoff_hit or row_data['use_batching']:
+        if not cutoff_hit or use_batching:
+            # Adaptive and rest steps: log the reconstructed states inside the step first
+            t_logged = 0.0
+            if resample_dt:
+                for tau, states, v_sample in resample_pack_step(
+                    pre_states, sim_states, step, dt, resample_dt, group_idx, n_series
+                ):
+                    log_to_history(
+                        history=history,
+                        dt=tau - t_logged,
+                        t_global=t_global + t_logged,
+                        sim_SOC=states['sim_SOC'],
+                        sim_V_term=states['sim_V_term'],
+                        sim_OCV=sim_OCV,
+                        sim_V_RC1=states['sim_V_RC1'],
+                        sim_V_RC2=states['sim_V_RC2'],
+                        sim_R0=sim_R0,
+                        sim_R1=sim_R1,
+                        sim_R2=sim_R2,
+                        sim_C1=sim_C1,
+                        sim_C2=sim_C2,
+                        I_module_current=I_module_current,
+                        v_module=v_sample,
+                        cum_energy_kWh=states['cum_energy_kWh'],
+                        cum_qgen_Ws=states['cum_qgen_Ws'],
+                        row_data=row_data,
+                        n_series=n_series
+                    )
+                    t_logged = tau
+            
             log_to_history(
                 history=history,
-                dt=dt,
-                t_global=t_global,
+                dt=dt - t_logged,
+                t_global=t_global + t_logged,
                 sim_SOC=sim_states['sim_SOC'],
                 sim_V_term=sim_states['sim_V_term'],
                 sim_OCV=sim_OCV,
@@ -989,18 +1446,12 @@ def process_single_row(
                 cum_energy_kWh=sim_states['cum_energy_kWh'],
                 cum_qgen_Ws=sim_states['cum_qgen_Ws'],
                 row_data=row_data,
-                dc_trigger_col=dc_trigger_col,
-                step_trigger_col=step_trigger_col
+                n_series=n_series
             )
             
             time_in_step += float(dt)
             t_global += float(dt)
-            per_day_time += float(dt)
-            
-            if abs(per_day_time % 86400) < 1e-6:
-                per_day_time = 0.0
-            if per_day_time >= 86400.0:
-                per_day_time -= 86400.0
+            per_day_time = advance_day_time(per_day_time, dt)
         else:
             # Cutoff - log minimal
             msg = f"Terminated: {cutoff_type.capitalize()} voltage cutoff (V_module={v_module:.3f}V)"
@@ -1025,8 +1476,7 @@ def process_single_row(
                 cum_energy_kWh=sim_states['cum_energy_kWh'],
                 cum_qgen_Ws=sim_states['cum_qgen_Ws'],
                 row_data=row_data,
-                dc_trigger_col=dc_trigger_col,
-                step_trigger_col=step_trigger_col,
+                n_series=n_series,
                 msg=msg
             )
             
@@ -1037,30 +1487,25 @@ def process_single_row(
             break
         
         should_break, new_row_idx = evaluate_and_handle_triggers(
-            step_triggers=row_data['step_triggers'],
-            dc_triggers=row_data['dc_triggers'],
+            triggers=row_data['triggers'],
             sim_SOC=sim_states['sim_SOC'],
             sim_V_term=sim_states['sim_V_term'],
             v_module=v_module,
             time_in_step=time_in_step,
-            t_global=t_global,
             I_cells_step=I_cells_step,
             I_module_current=I_module_current,
             capacity_Ah=capacity_Ah,
             per_day_time=per_day_time,
-            current_day=row_data['current_day'],
-            parallel_groups=parallel_groups,
-            dc_table=dc_table,
-            row_idx=row_idx,
-            current_subcycle=row_data['current_subcycle'],
-            current_dc=row_data['current_dc']
+            n_series=n_series,
+            schedule=schedule,
+            row_idx=row_idx
         )
         
         if should_break:
             return new_row_idx, t_global, per_day_time, False, False
         
         # Check duration exit
-        if (row_data['step_type'] in ["fixed", "fixed_with_triggers"] and time_in_step >= row_data['step_duration']) or row_data['use_batching']:
+        if (row_data['step_type'] in ["fixed", "fixed_with_triggers"] and time_in_step >= row_data['step_duration']) or use_batching:
             return row_idx + 1, t_global, per_day_time, False, False
         
         if row_data['step_type'] == "trigger_only" and inner_iters % 86400 == 0:
@@ -1098,16 +1543,23 @@ def process_single_row(
 def run_electrical_solver(
     setup: Dict,
     # dc_table: pd.DataFrame,
-    dc_table: pd.DataFrame,
+    dc_table: Union[pd.DataFrame, CompiledSchedule],
     sim_id: str = None,
     filename: str = "simulation_results.csv",
     continuation_history: Optional[dict] = None,
     full_drive_df: Optional[pd.DataFrame] = None,
     original_start_row: int = 0,
     pack_id: str = None,
-    dc_id: str = None
+    dc_id: str = None,
+    control: Optional[SolverControl] = None,
+    ring: Optional[ResultRing] = None
 ):
-    """Run the electrical solver for the given setup and drive cycle table."""
+    """
+    Run the electrical solver for the given setup and drive cycle table. dc_table may
+    also be a CompiledSchedule (e.g. loaded from the artifact stored by /generate).
+    control is the job's stop/pause channel; the final status is acknowledged on it.
+    Recorded timesteps are also published to ring, if given.
+    """
     # Initialize simulation parameters
     sim_params = initialize_simulation(setup, dc_table, filename, sim_id)
 
@@ -1117,6 +1569,8 @@ def run_electrical_solver(
     capacity_Ah = sim_params['capacity_Ah']
     coulombic_eff = sim_params['coulombic_eff']
     parallel_groups = sim_params['parallel_groups']
+    group_idx = sim_params['group_idx']
+    rc_tables = sim_params['rc_tables']
     n_series = sim_params['n_series']
     R_p = sim_params['R_p']
     R_s = sim_params['R_s']
@@ -1127,10 +1581,6 @@ def run_electrical_solver(
     v_limits = setup['voltage_limits']
     dc_table = sim_params['dc_table']
     n_rows = sim_params['n_rows']
-    csv_mode = sim_params['csv_mode']
-    last_written_timestep = sim_params['last_written_timestep']
-    stop_signal_file = sim_params['stop_signal_file']
-    pause_signal_file = sim_params['pause_signal_file']
     
 
     # Periodic write setup
@@ -1148,7 +1598,6 @@ def run_electrical_solver(
     t_global = 0.0
     per_day_time = 0.0
     dt_base = 1
-    max_t_global = setup.get('max_sim_time_s', 364 * 86400)
     
     # Continuation support
     if continuation_history:
@@ -1166,37 +1615,50 @@ def run_electrical_solver(
         cum_energy_kWh = np.zeros(N_cells)
     
 
-    # History (store ALL timesteps, write periodically)
-    history = {
-        'dt': [], 't_global_s': [], 'SOC': [], 'Vterm': [], 'OCV': [], 'V_RC1': [], 'V_RC2': [],
-        'V_R0': [], 'V_R1': [], 'V_R2': [], 'V_C1': [], 'V_C2': [], 'I_module': [], 'V_module': [],
-        'energy_throughput': [], 'Qgen_cumulative': [],
-        'Global Step Index': [], 'Day_of_year': [], 'DriveCycle_ID': [], 'Subcycle_ID': [], 'Subcycle Step Index': [],
-        'Value Type': [], 'Value': [], 'Unit': [], 'Step Type': [], 'Label': [], 'Ambient Temp (°C)': [], 'Location': [],
-        'drive cycle trigger': [], 'step Trigger(s)': [], 'termination_msg': [],
-        'parallel_groups': parallel_groups,
-    }
+    # History (bounded buffer, flushed by size and periodically by time)
+    step_metadata = setup.get('step_metadata', 'inline')
+    if step_metadata not in STEP_METADATA_MODES:
+        raise ValueError(f"Unsupported step_metadata mode: {step_metadata}")
+    result_layout = setup.get('result_layout', 'long')
+    if result_layout not in RESULT_LAYOUTS:
+        raise ValueError(f"Unsupported result_layout: {result_layout}")
+    timestep_mode = setup.get('timestep_mode', 'fixed')
+    if timestep_mode not in TIMESTEP_MODES:
+        raise ValueError(f"Unsupported timestep_mode: {timestep_mode}")
+    event_max_dt = float(setup.get('event_max_dt', EVENT_MAX_DT_S))
+    rest_fast_forward = bool(setup.get('rest_fast_forward', False))
+    rest_sample_dt = float(setup.get('rest_sample_dt', REST_SAMPLE_DT_S))
+    history = HistoryBuffer(
+        N_cells, filename, csv_mode=sim_params['csv_mode'],
+        step_metadata=step_metadata, steps_filename=step_table_path(filename),
+        result_layout=result_layout, logging_policy=build_logging_policy(setup.get('logging')),
+        ring=ring
+    )
 
-    # Trigger cols
-    dc_trigger_col = find_col(dc_table.columns, ["drive cycle trigger", "drivecycletrigger", "dc_trigger"])
-    step_trigger_col = find_col(dc_table.columns, ["step Trigger(s)", "step trigger", "step_triggers", "steptrigger(s)"])
+    # Compiled schedule (triggers located by column name)
+    if isinstance(dc_table, CompiledSchedule):
+        schedule = dc_table
+    else:
+        schedule = compile_drive_table(dc_table, dt_base)
+    # One simulation year, or the schedule's horizon when it spans more
+    max_t_global = setup.get('max_sim_time_s', max(DAYS_PER_YEAR, schedule.last_day) * 86400)
     row_idx = 0
     sim_terminated = False
     stop_requested = False
+    paused = False
     cutoff_row_guard = {}
+    if control is not None:
+        control.begin(t_global, max_t_global, n_rows)
     
     
     # === MAIN LOOP ===
     while row_idx < n_rows and not sim_terminated and t_global < max_t_global:
-        # Handle pause signal
-        should_terminate, csv_mode, last_written_timestep = handle_pause_signal(
-            pause_signal_file=pause_signal_file,
+        # Handle pause request
+        should_terminate = handle_pause_signal(
+            control=control,
             t_global=t_global,
             row_idx=row_idx,
             history=history,
-            last_written_timestep=last_written_timestep,
-            filename=filename,
-            csv_mode=csv_mode,
             N_cells=N_cells,
             n_series=n_series,
             pack_id=pack_id,
@@ -1207,24 +1669,22 @@ def run_electrical_solver(
         
         if should_terminate:
             sim_terminated = True
+            paused = True
             break
         
-        # Handle stop signal
-        if handle_stop_signal(stop_signal_file, t_global, row_idx):
+        # Handle stop request
+        if handle_stop_signal(control, t_global, row_idx):
             stop_requested = True
             sim_terminated = True
             break
         
         # Periodic CSV write
         current_time = time.time()
-        last_write_time, csv_mode, last_written_timestep = handle_periodic_write(
+        last_write_time = handle_periodic_write(
             current_time=current_time,
             last_write_time=last_write_time,
             write_interval=WRITE_INTERVAL,
             history=history,
-            last_written_timestep=last_written_timestep,
-            filename=filename,
-            csv_mode=csv_mode,
             N_cells=N_cells,
             n_series=n_series
         )
@@ -1245,15 +1705,14 @@ def run_electrical_solver(
         # Process single row
         row_idx, t_global, per_day_time, sim_terminated, cutoff_hit = process_single_row(
             row_idx=row_idx,
-            dc_table=dc_table,
-            dc_trigger_col=dc_trigger_col,
-            step_trigger_col=step_trigger_col,
-            dt_base=dt_base,
+            schedule=schedule,
             sim_states=sim_states,
             cells=cells,
             capacity_Ah=capacity_Ah,
             coulombic_eff=coulombic_eff,
             parallel_groups=parallel_groups,
+            group_idx=group_idx,
+            rc_tables=rc_tables,
             n_series=n_series,
             R_p=R_p,
             R_s=R_s,
@@ -1264,8 +1723,15 @@ def run_electrical_solver(
             history=history,
             cutoff_row_guard=cutoff_row_guard,
             t_global=t_global,
-            per_day_time=per_day_time
+            per_day_time=per_day_time,
+            timestep_mode=timestep_mode,
+            event_max_dt=event_max_dt,
+            rest_fast_forward=rest_fast_forward,
+            rest_sample_dt=rest_sample_dt,
+            control=control
         )
+        # Row boundary: keep the row's last timestep whatever the logging policy
+        log_held_step(history, n_series)
         
         if cutoff_hit:
             break
@@ -1279,15 +1745,14 @@ def run_electrical_solver(
     # === FINAL WRITE ===
     filename, total_timesteps, status = finalize_simulation(
         history=history,
-        last_written_timestep=last_written_timestep,
-        filename=filename,
-        csv_mode=csv_mode,
         N_cells=N_cells,
         n_series=n_series,
         t_global=t_global,
         stop_requested=stop_requested,
         sim_terminated=sim_terminated,
-        stop_signal_file=stop_signal_file,
-        sim_id=sim_id
+        sim_id=sim_id,
+        paused=paused
     )
+    if control is not None:
+        control.acknowledge(status)
     return filename
\ No newline at end of file
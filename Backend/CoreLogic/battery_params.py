@@ -1,5 +1,4 @@
 import numpy as np
-from scipy.interpolate import RegularGridInterpolator
 import pandas as pd
 import os
 
@@ -89,40 +88,135 @@ def _get_dummy_rc_data():
     print("Using dummy constant RC data (OCV=3.7V, low R)")
     return dummy
 
+PARAM_NAMES = ['OCV', 'R0', 'R1', 'R2', 'C1', 'C2']
+# Fallback values used where SOC/temperature fall outside the table
+PARAM_DEFAULTS = np.array([3.7, 0.02, 0.02, 0.02, 1000.0, 1000.0])
+# Columns scaled by the DCIR aging factor (R0, R1, R2)
+DCIR_SCALED = np.array([False, True, True, True, False, False])
+
+
+class RCParameterTable:
+    """
+    Precompiled RC lookup for one rc_data dict.
+
+    CHARGE/DISCHARGE tables are stored as contiguous (n_soc, n_temp, 6) arrays and
+    interpolated bilinearly for whole arrays of SOC/temperature in one call, with the
+    same semantics as a linear RegularGridInterpolator (NaN outside the grid → defaults).
+    """
+
+    def __init__(self, rc_data: dict):
+        self.tables = {}
+        for mode in ['CHARGE', 'DISCHARGE']:
+            data_temp = rc_data.get(mode) or {}
+            if not data_temp:
+                continue
+            temp_keys = sorted(data_temp.keys(), key=lambda k: int(k[1:]))
+            temp_vals = np.array([int(k[1:]) for k in temp_keys], dtype=float)
+            soc_grid = np.asarray(data_temp[temp_keys[0]][:, 0], dtype=float)
+            values = np.stack([np.asarray(data_temp[k][:, 1:7], dtype=float) for k in temp_keys], axis=1)
+            order = np.argsort(soc_grid)
+            self.tables[mode] = (
+                np.ascontiguousarray(soc_grid[order]),
+                temp_vals,
+                np.ascontiguousarray(values[order])
+            )
+        # Per-temperature 1-D slices, built on first use
+        self._slices = {}
+
+    def _table(self, mode: str):
+        mode = mode.upper()
+        if mode not in ('CHARGE', 'DISCHARGE'):
+            raise ValueError('Mode: CHARGE or DISCHARGE')
+        return mode, self.tables[mode]
+
+    def _temperature_slice(self, mode: str, Temp_C: float) -> np.ndarray:
+        """Reduce the (n_soc, n_temp, 6) table to (n_soc, 6) at one temperature."""
+        key = (mode, float(Temp_C))
+        table_slice = self._slices.get(key)
+        if table_slice is None:
+            _, temp_vals, values = self.tables[mode]
+            i, w = _grid_weights(temp_vals, np.array([Temp_C], dtype=float))
+            table_slice = values[:, i[0]] * (1.0 - w[0]) + values[:, i[0] + 1] * w[0]
+            self._slices[key] = table_slice
+        return table_slice
+
+    def lookup(self, SOC, Temp_C, mode: str, SOH=1.0, DCIR_aging_factor=1.0) -> tuple:
+        """
+        Interpolate all six parameters for arrays of SOC/temperature and apply aging.
+
+        Returns:
+        --------
+        tuple
+            (OCV, R0, R1, R2, C1, C2) arrays shaped like SOC
+        """
+        mode, (soc_grid, temp_vals, values) = self._table(mode)
+        SOC = np.atleast_1d(np.asarray(SOC, dtype=float))
+        Temp_C = np.broadcast_to(np.asarray(Temp_C, dtype=float), SOC.shape)
+
+        i_soc, w_soc = _grid_weights(soc_grid, SOC)
+        if np.all(Temp_C == Temp_C.flat[0]):
+            # Whole pack at one temperature: 1-D interpolation on the reduced table
+            table_slice = self._temperature_slice(mode, Temp_C.flat[0])
+            params = table_slice[i_soc] * (1.0 - w_soc)[:, None] + table_slice[i_soc + 1] * w_soc[:, None]
+        else:
+            i_t, w_t = _grid_weights(temp_vals, Temp_C)
+            w_soc, w_t = w_soc[:, None], w_t[:, None]
+            params = (
+                values[i_soc, i_t] * (1.0 - w_soc) * (1.0 - w_t)
+                + values[i_soc + 1, i_t] * w_soc * (1.0 - w_t)
+                + values[i_soc, i_t + 1] * (1.0 - w_soc) * w_t
+                + values[i_soc + 1, i_t + 1] * w_soc * w_t
+            )
+
+        params = np.where(np.isnan(params), PARAM_DEFAULTS, params)
+        aging = np.broadcast_to(np.asarray(DCIR_aging_factor, dtype=float), SOC.shape)[:, None]
+        params = np.where(DCIR_SCALED, params * aging, params)
+
+        OCV = params[:, 0]
+        out_of_range = (OCV < 2.5) | (OCV > 4.2)
+        if np.any(out_of_range):
+            k = np.flatnonzero(out_of_range)[0]
+            print(f"Warning: OCV {OCV[k]:.2f}V out of range at SOC={SOC[k]:.2f}, T={Temp_C[k]:.1f}C "
+                  f"({out_of_range.sum()} cell(s))")
+        return tuple(params.T)
+
+
+def _grid_weights(grid: np.ndarray, x: np.ndarray) -> tuple:
+    """
+    Lower cell index and linear weight of x on an ascending grid.
+    Points outside the grid (or NaN) get a NaN weight.
+    """
+    n = len(grid)
+    if n == 1:
+        idx = np.zeros(x.shape, dtype=np.intp)
+        w = np.where(x == grid[0], 0.0, np.nan)
+        return idx, w
+    idx = np.clip(np.searchsorted(grid, x, side='right') - 1, 0, n - 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = (x - grid[idx]) / (grid[idx + 1] - grid[idx])
+    w[(x < grid[0]) | (x > grid[-1]) | np.isnan(x)] = np.nan
+    return idx, w
+
+
+# Compiled tables keyed by id(rc_data); the rc_data reference keeps the id valid
+_RC_TABLE_CACHE = {}
+_RC_TABLE_CACHE_SIZE = 16
+
+
+def get_rc_table(rc_data: dict) -> RCParameterTable:
+    """Return the compiled lookup for rc_data, building it on first use."""
+    cached = _RC_TABLE_CACHE.get(id(rc_data))
+    if cached is not None and cached[0] is rc_data:
+        return cached[1]
+    table = RCParameterTable(rc_data)
+    if len(_RC_TABLE_CACHE) >= _RC_TABLE_CACHE_SIZE:
+        _RC_TABLE_CACHE.pop(next(iter(_RC_TABLE_CACHE)))
+    _RC_TABLE_CACHE[id(rc_data)] = (rc_data, table)
+    return table
+
+
 def get_battery_params(rc_data: dict, SOC: float, Temp_C: float, mode: str, SOH: float, DCIR_aging_factor: float):
     """Interpolate params, apply aging."""
-    if mode.upper() == 'CHARGE':
-        data_temp = rc_data['CHARGE']
-    elif mode.upper() == 'DISCHARGE':
-        data_temp = rc_data['DISCHARGE']
-    else:
-        raise ValueError('Mode: CHARGE or DISCHARGE')
-
-    temp_keys = sorted(data_temp.keys(), key=lambda k: int(k[1:]))
-    temp_vals = [int(k[1:]) for k in temp_keys]
-    soc_grid = data_temp[temp_keys[0]][:, 0]
-
-    # Interp each param (cols 1-6)
-    OCV, R0, R1, R2, C1, C2 = 0, 0, 0, 0, 0, 0
-    for col, param_name in enumerate(['OCV', 'R0', 'R1', 'R2', 'C1', 'C2'], 1):
-        grid = np.stack([data_temp[temp][:, col] for temp in temp_keys], axis=1)
-        interp = RegularGridInterpolator((soc_grid, np.array(temp_vals)), grid, bounds_error=False, fill_value=np.nan)
-        param = interp((SOC, Temp_C))
-        if np.isnan(param):
-            param = 3.7 if param_name == 'OCV' else 0.02 if 'R' in param_name else 1000
-        if param_name == 'OCV':
-            OCV = param
-        elif param_name == 'R0':
-            R0 = param * DCIR_aging_factor
-        elif param_name == 'R1':
-            R1 = param * DCIR_aging_factor
-        elif param_name == 'R2':
-            R2 = param * DCIR_aging_factor
-        elif param_name == 'C1':
-            C1 = param
-        elif param_name == 'C2':
-            C2 = param
-
-    if OCV < 2.5 or OCV > 4.2:
-        print(f"Warning: OCV {OCV:.2f}V out of range at SOC={SOC:.2f}, T={Temp_C:.1f}C")
-    return OCV, R0, R1, R2, C1, C2
\ No newline at end of file
+    params = get_rc_table(rc_data).lookup(SOC, Temp_C, mode, SOH, DCIR_aging_factor)
+    OCV, R0, R1, R2, C1, C2 = (float(p[0]) for p in params)
+    return OCV, R0, R1, R2, C1, C2
@@ -0,0 +1,77 @@
+# FILE: CoreLogic/day_calendar.py
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DAYS_OF_WEEK = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+# Simulation year: calendar rules repeat every DAYS_PER_YEAR days
+DAYS_PER_YEAR = 364
+
+
+class DayCalendar:
+    """
+    Calendar rules of a simulation cycle, resolved one day at a time.
+
+    Day n of the horizon (1-based, may run past one year) follows the rules of day
+    ((n - 1) % DAYS_PER_YEAR) + 1 of the simulation year. Nothing is expanded up front:
+    resolve() checks the rules for a single day and iteration yields days lazily.
+    """
+
+    def __init__(self, calendar_assignments: List[Dict[str, Any]], n_days: int = DAYS_PER_YEAR):
+        self.calendar_assignments = list(calendar_assignments or [])
+        self.n_days = int(n_days)
+        self.rules = [r for r in self.calendar_assignments if r.get("id") != "DEFAULT_RULE"]
+        self.default_rule = next((r for r in self.calendar_assignments if r.get("id") == "DEFAULT_RULE"), None)
+        self.default_drivecycle_id = self.default_rule["drivecycleId"] if self.default_rule else "DC_IDLE"
+
+    def __len__(self) -> int:
+        return self.n_days
+
+    def match_rule(self, day: int) -> Optional[Dict[str, Any]]:
+        """First non-default rule matching the day, or None."""
+        day_of_year = (day - 1) % DAYS_PER_YEAR + 1
+        day_of_week_idx = (day_of_year - 1) % 7
+        month_day = ((day_of_year - 1) % 30) + 1
+        month = ((day_of_year - 1) // 30) + 1
+        for rule in self.rules:
+            month_match = month in rule.get("months", [])
+            day_match = False
+
+            if rule.get("daysOfWeek"):
+                day_match = DAYS_OF_WEEK[day_of_week_idx] in rule["daysOfWeek"]
+            elif rule.get("dates"):
+                day_match = month_day in rule["dates"]
+
+            if month_match and day_match:
+                return rule
+        return None
+
+    def resolve(self, day: int) -> Tuple[str, str]:
+        """(drivecycleId, notes) of one day."""
+        matched_rule = self.match_rule(day)
+        target_dc_id = matched_rule["drivecycleId"] if matched_rule else self.default_drivecycle_id
+        notes = (
+            matched_rule.get("notes", "")
+            if matched_rule
+            else "Default drive cycle" if self.default_rule else ""
+        )
+        return target_dc_id, notes
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for day in range(1, self.n_days + 1):
+            dc_id, notes = self.resolve(day)
+            yield {"dayOfYear": day, "drivecycleId": dc_id, "notes": notes}
+
+    def first_days(self) -> Dict[str, int]:
+        """Drive cycles the calendar uses → the first day each runs (one year covers them all)."""
+        used = {}
+        for day in range(1, min(self.n_days, DAYS_PER_YEAR) + 1):
+            used.setdefault(self.resolve(day)[0], day)
+        return used
+
+    def to_json(self) -> str:
+        return json.dumps({"calendar_assignments": self.calendar_assignments, "n_days": self.n_days}, default=str)
+
+    @classmethod
+    def from_json(cls, text: str) -> 'DayCalendar':
+        data = json.loads(text)
+        return cls(data["calendar_assignments"], data["n_days"])
@@ -0,0 +1,151 @@
+# FILE: CoreLogic/history_buffer.py
+import numpy as np
+from typing import Dict, Optional
+
+# Per-cell quantities: one (capacity, N_cells) float array each
+CELL_FIELDS = (
+    'SOC', 'Vterm', 'OCV', 'V_RC1', 'V_RC2', 'V_R0', 'V_R1', 'V_R2', 'V_C1', 'V_C2',
+    'energy_throughput', 'Qgen_cumulative'
+)
+# Pack scalars: one (capacity,) float array each
+STEP_FIELDS = ('dt', 't_global_s', 'I_module', 'V_module')
+# Drive-cycle row metadata, stored once per row visit and referenced by key
+META_FIELDS = (
+    'Global Step Index', 'Day_of_year', 'DriveCycle_ID', 'Subcycle_ID', 'Subcycle Step Index',
+    'Value Type', 'Value', 'Unit', 'Step Type', 'Label', 'Ambient Temp (°C)', 'Location',
+    'drive cycle trigger', 'step Trigger(s)'
+)
+
+# Memory budget for the per-cell block of one buffer
+HISTORY_BUFFER_BYTES = 64 * 1024 * 1024
+MIN_CAPACITY = 64
+MAX_CAPACITY = 100000
+
+
+class HistoryBuffer:
+    """
+    Fixed-capacity columnar store of solver timesteps between CSV flushes.
+
+    Per-cell values live in preallocated 2-D (timestep x cell) arrays, pack scalars in
+    1-D arrays, and row metadata as an int32 key into a small list of per-row records.
+    The buffer also carries the state of the CSVs it drains into (filename, csv_mode,
+    result_layout and, with step_metadata='dictionary', the side table of per-row metadata)
+    and the LoggingPolicy that decides which timesteps are recorded (None records all).
+    Recorded timesteps are also published to `ring` (a ResultRing) when one is given.
+    """
+
+    def __init__(
+        self,
+        N_cells: int,
+        filename: str,
+        csv_mode: str = 'w',
+        capacity: Optional[int] = None,
+        step_metadata: str = 'inline',
+        steps_filename: Optional[str] = None,
+        result_layout: str = 'long',
+        logging_policy=None,
+        ring=None
+    ):
+        if capacity is None:
+            bytes_per_step = max(1, N_cells) * len(CELL_FIELDS) * 8
+            capacity = int(np.clip(HISTORY_BUFFER_BYTES // bytes_per_step, MIN_CAPACITY, MAX_CAPACITY))
+        self.capacity = capacity
+        self.N_cells = N_cells
+        self.filename = filename
+        self.csv_mode = csv_mode
+        self.result_layout = result_layout
+        self.logging_policy = logging_policy
+        self.ring = ring
+        self.step_metadata = step_metadata
+        self.steps_filename = steps_filename
+        self.steps_csv_mode = csv_mode
+        self.last_step_key = -1
+
+        self.cell = {name: np.empty((capacity, N_cells)) for name in CELL_FIELDS}
+        self.step = {name: np.empty(capacity) for name in STEP_FIELDS}
+        self.meta_key = np.empty(capacity, dtype=np.int32)
+        self.meta_records = []
+        self.meta_step_keys = []
+        self.messages = {}
+        self._last_meta = None
+
+        self.size = 0
+        self.written_steps = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def total_steps(self) -> int:
+        """Timesteps recorded since the solver started (written + buffered)."""
+        return self.written_steps + self.size
+
+    def is_full(self) -> bool:
+        return self.size >= self.capacity
+
+    def append(
+        self,
+        step_values: Dict[str, float],
+        cell_values: Dict[str, np.ndarray],
+        metadata: tuple,
+        step_key: int,
+        msg: str = ""
+    ) -> None:
+        """
+        Record one timestep. metadata is the per-row tuple ordered as META_FIELDS and
+        step_key the drive-cycle row index it belongs to.
+        """
+        if self.is_full():
+            raise OverflowError("History buffer is full; flush before appending")
+        i = self.size
+        for name, value in step_values.items():
+            self.step[name][i] = value
+        for name, values in cell_values.items():
+            self.cell[name][i] = values
+
+        # Same row as the previous timestep → reuse its record
+        if metadata is not self._last_meta:
+            self.meta_records.append(metadata)
+            self.meta_step_keys.append(step_key)
+            self._last_meta = metadata
+        self.meta_key[i] = len(self.meta_records) - 1
+        if msg:
+            self.messages[i] = msg
+        self.size += 1
+        if self.ring is not None:
+            self.ring.append(step_values, cell_values)
+
+    def as_dict(self) -> Dict:
+        """Column view of the buffered timesteps, keyed like the solver history dict."""
+        n = self.size
+        history = {name: values[:n] for name, values in self.step.items()}
+        history.update({name: values[:n] for name, values in self.cell.items()})
+
+        keys = self.meta_key[:n]
+        history['step_key'] = np.asarray(self.meta_step_keys, dtype=np.int64)[keys]
+        for j, name in enumerate(META_FIELDS):
+            column = np.empty(len(self.meta_records), dtype=object)
+            column[:] = [record[j] for record in self.meta_records]
+            history[name] = column[keys]
+        messages = np.full(n, "", dtype=object)
+        for i, msg in self.messages.items():
+            messages[i] = msg
+        history['termination_msg'] = messages
+        return history
+
+    def pending_step_records(self) -> list:
+        """(step_key, *metadata) rows not yet written to the step metadata table."""
+        return [
+            (key,) + record
+            for key, record in zip(self.meta_step_keys, self.meta_records)
+            if key > self.last_step_key
+        ]
+
+    def clear(self) -> None:
+        """Drop buffered timesteps after they have been written."""
+        self.written_steps += self.size
+        self.size = 0
+        self.meta_records = []
+        self.meta_step_keys = []
+        self.messages = {}
+        self._last_meta = None
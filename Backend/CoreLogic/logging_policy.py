@@ -0,0 +1,127 @@
+# FILE: CoreLogic/logging_policy.py
+import numpy as np
+from typing import Dict, Optional
+
+# 'all' records every solver timestep; the others thin the output (see LoggingPolicy)
+LOGGING_POLICIES = ('all', 'every_n', 'cadence', 'deadband')
+
+DEFAULT_LOGGING = {
+    'policy': 'all',
+    'every_n': 10,          # every_n: keep one timestep in N
+    'cadence_s': 60.0,      # cadence: at most one timestep per cadence_s of simulated time
+    'soc_tol': 1e-3,        # deadband: log once any cell's SOC moved more than this,
+    'vterm_tol': 5e-3,      #   any cell's Vterm more than this (V)
+    'current_tol': 0.5,     #   or the module current more than this (A)
+}
+
+
+class LoggingPolicy:
+    """
+    Decides which solver timesteps reach the history buffer.
+
+    The first timestep of every drive-cycle row is always logged, as is any timestep
+    carrying a termination message. A skipped timestep is held back (held) so the
+    last timestep of a row - where its trigger fired or its duration ran out - can
+    be logged once the row is over (see take_held).
+    """
+
+    def __init__(
+        self,
+        policy: str = 'all',
+        every_n: int = 10,
+        cadence_s: float = 60.0,
+        soc_tol: float = 1e-3,
+        vterm_tol: float = 5e-3,
+        current_tol: float = 0.5
+    ):
+        if policy not in LOGGING_POLICIES:
+            raise ValueError(f"Unsupported logging policy: {policy}")
+        self.policy = policy
+        self.every_n = max(1, int(every_n))
+        self.cadence_s = float(cadence_s)
+        self.soc_tol = float(soc_tol)
+        self.vterm_tol = float(vterm_tol)
+        self.current_tol = float(current_tol)
+
+        self.seen = 0
+        self.held = None
+        self.last_step_key = None
+        self.last_t = -np.inf
+        self.last_SOC = None
+        self.last_Vterm = None
+        self.last_I = None
+
+    def admit(self, step_values: Dict, cell_values: Dict, step_key: int, msg: str = "") -> bool:
+        """Whether to log this timestep now. Call record() for every timestep logged."""
+        self.seen += 1
+        if msg or step_key != self.last_step_key or self.last_SOC is None:
+            return True
+        if self.policy == 'every_n':
+            return self.seen % self.every_n == 0
+        if self.policy == 'cadence':
+            return step_values['t_global_s'] - self.last_t >= self.cadence_s - 1e-9
+        if self.policy == 'deadband':
+            return (
+                np.max(np.abs(cell_values['SOC'] - self.last_SOC)) > self.soc_tol
+                or np.max(np.abs(cell_values['Vterm'] - self.last_Vterm)) > self.vterm_tol
+                or abs(step_values['I_module'] - self.last_I) > self.current_tol
+            )
+        return True
+
+    def record(self, step_values: Dict, cell_values: Dict, step_key: int) -> None:
+        """Note a logged timestep; anything held before it is superseded."""
+        self.held = None
+        self.last_step_key = step_key
+        self.last_t = step_values['t_global_s']
+        self.last_SOC = np.array(cell_values['SOC'], dtype=float)
+        self.last_Vterm = np.array(cell_values['Vterm'], dtype=float)
+        self.last_I = step_values['I_module']
+
+    def hold(self, step_values: Dict, cell_values: Dict, metadata: tuple, step_key: int) -> None:
+        """Keep a skipped timestep (copied) in case it turns out to end its row."""
+        self.held = (
+            dict(step_values),
+            {name: np.array(values, dtype=float) for name, values in cell_values.items()},
+            metadata,
+            step_key
+        )
+
+    def take_held(self) -> Optional[tuple]:
+        """Pop the held timestep, if any, as (step_values, cell_values, metadata, step_key)."""
+        held, self.held = self.held, None
+        return held
+
+
+def validate_logging_config(logging_config) -> Dict:
+    """
+    Check modelConfig['logging'] before a run is queued: a dict (or None) naming one of
+    LOGGING_POLICIES, whose numeric options are finite and non-negative.
+
+    Returns:
+    --------
+    The config merged over DEFAULT_LOGGING; raises ValueError when it is invalid
+    """
+    if logging_config is None:
+        logging_config = {}
+    if not isinstance(logging_config, dict):
+        raise ValueError(f"logging must be an object, got {type(logging_config).__name__}")
+    config = {**DEFAULT_LOGGING, **logging_config}
+    if config['policy'] not in LOGGING_POLICIES:
+        raise ValueError(f"Invalid logging policy: {config['policy']}. Use one of {list(LOGGING_POLICIES)}")
+    for key in DEFAULT_LOGGING:
+        if key == 'policy':
+            continue
+        value = config[key]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"logging.{key} must be a number, got {value!r}")
+        if not np.isfinite(value) or value < 0:
+            raise ValueError(f"logging.{key} must be finite and non-negative, got {value}")
+    return config
+
+
+def build_logging_policy(logging_config: Optional[Dict]) -> Optional[LoggingPolicy]:
+    """LoggingPolicy for modelConfig['logging'], or None when every timestep is logged."""
+    config = {**DEFAULT_LOGGING, **(logging_config or {})}
+    if config['policy'] == 'all':
+        return None
+    return LoggingPolicy(**{key: config[key] for key in DEFAULT_LOGGING})
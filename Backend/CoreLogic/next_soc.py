@@ -1,11 +1,12 @@
+import numpy as np
+
 def calculate_next_soc(I_current, dt, capacity, current_SOC, coulombic_efficiency, SOH):
+    # Accepts scalars or per-cell arrays (charging current is negative)
     effective_capacity_As = capacity * SOH * 3600
 
-    if I_current < 0:
-        next_SOC = current_SOC - (I_current * dt / effective_capacity_As) * coulombic_efficiency
-    else:
-        next_SOC = current_SOC - (I_current * dt / effective_capacity_As)
+    delta_SOC = I_current * dt / effective_capacity_As
+    next_SOC = current_SOC - np.where(I_current < 0, delta_SOC * coulombic_efficiency, delta_SOC)
 
-    next_SOC = max(0.0, min(1.0, next_SOC))
+    next_SOC = np.clip(next_SOC, 0.0, 1.0)
 
-    return next_SOC
\ No newline at end of file
+    return next_SOC
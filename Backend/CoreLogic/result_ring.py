@@ -0,0 +1,150 @@
+# FILE: CoreLogic/result_ring.py
+import bisect
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Sequence, Tuple
+
+# Series kept in the ring: pack scalars per timestep and per-cell values per timestep
+RING_STEP_FIELDS = ('t_global_s', 'I_module', 'V_module')
+RING_CELL_FIELDS = ('SOC', 'Vterm', 'Qgen_cumulative')
+# int64 header: capacity, N_cells, timesteps appended so far
+_HEADER_FIELDS = 3
+
+
+class ResultRing:
+    """
+    The most recent `capacity` recorded timesteps of a run (RING_STEP_FIELDS and
+    RING_CELL_FIELDS) in a shared memory block.
+
+    The API process creates the ring, the solver worker attaches to it by name and
+    appends every timestep it records, and readers in the API copy what they need
+    straight out of the mapped arrays. The appended-timestep count is published after
+    each timestep is written, so readers only see complete timesteps; a reader that
+    falls more than `capacity` timesteps behind loses the overwritten ones.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        self.capacity, self.N_cells = int(header[0]), int(header[1])
+        self._header = header
+        offset = header.nbytes
+        self._step = np.ndarray((len(RING_STEP_FIELDS), self.capacity), dtype=np.float64, buffer=shm.buf, offset=offset)
+        offset += self._step.nbytes
+        self._cell = np.ndarray((len(RING_CELL_FIELDS), self.capacity, self.N_cells), dtype=np.float64, buffer=shm.buf, offset=offset)
+
+    @staticmethod
+    def nbytes(capacity: int, N_cells: int) -> int:
+        return 8 * (_HEADER_FIELDS + capacity * (len(RING_STEP_FIELDS) + len(RING_CELL_FIELDS) * N_cells))
+
+    @classmethod
+    def create(cls, capacity: int, N_cells: int) -> 'ResultRing':
+        shm = shared_memory.SharedMemory(create=True, size=cls.nbytes(capacity, N_cells))
+        np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)[:] = (capacity, N_cells, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'ResultRing':
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def count(self) -> int:
+        """Timesteps appended since the run started."""
+        return int(self._header[2])
+
+    def append(self, step_values, cell_values) -> None:
+        """Write one timestep (the HistoryBuffer.append dicts), then publish it."""
+        count = int(self._header[2])
+        i = count % self.capacity
+        for j, name in enumerate(RING_STEP_FIELDS):
+            self._step[j, i] = step_values[name]
+        for j, name in enumerate(RING_CELL_FIELDS):
+            self._cell[j, i] = cell_values[name]
+        self._header[2] = count + 1
+
+    def time_window(self) -> Optional[Tuple[float, float]]:
+        """Simulated time span of the timesteps still in the ring, or None if empty."""
+        while True:
+            count = self.count
+            if count == 0:
+                return None
+            first = max(0, count - self.capacity)
+            t_first = float(self._step[0, first % self.capacity])
+            # The oldest slot may have been overwritten meanwhile: retry until consistent
+            if self.count - self.capacity <= first:
+                return t_first, float(self._step[0, (count - 1) % self.capacity])
+
+    def read(self, since: int = 0, cell_ids: Optional[Sequence[int]] = None) -> Tuple[pd.DataFrame, int, int]:
+        """
+        Copy out the timesteps appended from index `since` on, for cell_ids (all cells
+        when None), in the long result layout.
+
+        Returns:
+        --------
+        (DataFrame, first, end): rows hold timesteps [first, end); first > since when
+        older timesteps were already overwritten. Pass end as the next `since`.
+        """
+        cell_ids = np.arange(self.N_cells) if cell_ids is None else np.asarray(cell_ids, dtype=np.int64)
+        end = self.count
+        first = max(since, end - self.capacity)
+        slots = np.arange(first, end) % self.capacity
+        step = self._step[:, slots]
+        cell = self._cell[:, slots[:, None], cell_ids[None, :]]
+        # Drop timesteps the solver overwrote while they were copied
+        overwritten = max(0, self.count - self.capacity - first)
+        if overwritten:
+            first += overwritten
+            step, cell = step[:, overwritten:], cell[:, overwritten:]
+        n_steps, n_cells = step.shape[1], len(cell_ids)
+
+        columns = {
+            'cell_id': np.tile(cell_ids, n_steps),
+            'time_global_s': np.repeat(step[0], n_cells),
+        }
+        for j, name in enumerate(RING_STEP_FIELDS[1:], start=1):
+            columns[name] = np.repeat(step[j], n_cells)
+        for j, name in enumerate(RING_CELL_FIELDS):
+            columns[name] = cell[j].reshape(n_steps * n_cells)
+        return pd.DataFrame(columns), first, end
+
+    def series(self, cell_id: int, time_range: Tuple[float, float]) -> Dict[str, np.ndarray]:
+        """
+        One cell's timesteps with t_global_s in time_range (inclusive) still in the ring,
+        as time-ordered arrays (time_global_s, the other step fields, RING_CELL_FIELDS).
+        The range is found by binary search on the ring's times and only its timesteps
+        are copied.
+        """
+        end = self.count
+        first = max(0, end - self.capacity)
+        logical = range(first, end)
+        time_of = lambda i: self._step[0, i % self.capacity]
+        lo = first + bisect.bisect_left(logical, time_range[0], key=time_of)
+        hi = first + bisect.bisect_right(logical, time_range[1], key=time_of)
+        slots = np.arange(lo, hi) % self.capacity
+        step = self._step[:, slots]
+        cell = self._cell[:, slots, cell_id]
+        # Drop timesteps the solver overwrote while they were copied
+        overwritten = min(max(0, self.count - self.capacity - lo), len(slots))
+        if overwritten:
+            step, cell = step[:, overwritten:], cell[:, overwritten:]
+
+        columns = {'time_global_s': step[0]}
+        for j, name in enumerate(RING_STEP_FIELDS[1:], start=1):
+            columns[name] = step[j]
+        for j, name in enumerate(RING_CELL_FIELDS):
+            columns[name] = cell[j]
+        return columns
+
+    def close(self) -> None:
+        """Unmap the ring (and remove it, for the process that created it)."""
+        # Views into the block must go before it can be unmapped
+        self._header = self._step = self._cell = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -23,7 +23,7 @@ def calculate_reversible_heat(temp_K, I_current, next_SOC):
     c1_p = 0.0009855
     c2_p = 0.02179
 
-    next_SOC = max(0.0, min(1.0, next_SOC))
+    next_SOC = np.clip(next_SOC, 0.0, 1.0)
 
     x_pos = next_SOC * (x_pos_100 - x_pos_0) + x_pos_0
     x_neg = next_SOC * (x_neg_100 - x_neg_0) + x_neg_0
@@ -0,0 +1,635 @@
+# FILE: CoreLogic/schedule.py
+import io
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+from .triggers import parse_trigger_string, CompiledTriggers
+from .history_buffer import META_FIELDS
+from .day_calendar import DayCalendar
+
+# Bumped whenever the stored layout changes; older artifacts are recompiled from the CSV
+SCHEDULE_ARTIFACT_VERSION = 3
+
+DC_TRIGGER_COLUMNS = ["drive cycle trigger", "drivecycletrigger", "dc_trigger"]
+STEP_TRIGGER_COLUMNS = ["step Trigger(s)", "step trigger", "step_triggers", "steptrigger(s)"]
+
+# Row prepended to every simulation table before solving (row 0 of the solver's row space)
+IDLE_INIT_ROW = {
+    'Global Step Index': 0, 'Day_of_year': 1, 'DriveCycle_ID': 'idle_init',
+    'Value Type': 'current', 'Value': 0.0, 'Unit': 'A',
+    'Step Type': 'fixed', 'Step Duration (s)': 0.1, 'Timestep (s)': 0.01,
+    'Subcycle_ID': 'idle', 'Subcycle Step Index': 0,
+    'Label': 'Idle Init', 'Ambient Temp (°C)': 20.0, 'Location': '',
+    'drive cycle trigger': '', 'step Trigger(s)': ''
+}
+
+# Metadata fields a DayTemplateSchedule sets per row
+_GLOBAL_STEP_FIELD = META_FIELDS.index('Global Step Index')
+_DAY_FIELD = META_FIELDS.index('Day_of_year')
+
+# Scalar kinds of dictionary-encoded object columns
+_KIND_STR, _KIND_INT, _KIND_FLOAT, _KIND_BOOL, _KIND_NAN = range(5)
+
+
+def find_col(columns, candidates):
+    """Find column name case-insensitively, ignoring spaces."""
+    lower_cols = [c.lower().replace(" ", "") for c in columns]
+    for cand in candidates:
+        cand_norm = cand.lower().replace(" ", "")
+        try:
+            idx = lower_cols.index(cand_norm)
+            return columns[idx]
+        except ValueError:
+            continue
+    return None
+
+
+def prepend_idle_row(dc_table: pd.DataFrame) -> pd.DataFrame:
+    """Simulation table with the idle init row in front, as the solver runs it."""
+    return pd.concat([pd.DataFrame([IDLE_INIT_ROW]), dc_table], ignore_index=True)
+
+
+def table_fingerprint(csv_text: str) -> str:
+    """Content fingerprint of a simulation table CSV (line endings and trailing newlines ignored)."""
+    normalized = csv_text.replace('\r\n', '\n').rstrip('\n')
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+def schedule_artifact_path(table_path: str) -> str:
+    """Path of the compiled schedule artifact stored next to a simulation table CSV."""
+    root, _ = os.path.splitext(str(table_path))
+    return f"{root}.schedule.npz"
+
+def _column(dc_table: pd.DataFrame, name: Optional[str], default) -> np.ndarray:
+    """Column as an object array, or default for every row when it is missing."""
+    if name is not None and name in dc_table.columns:
+        return dc_table[name].to_numpy(dtype=object)
+    return np.full(len(dc_table), default, dtype=object)
+
+
+def _normalized(values: np.ndarray) -> np.ndarray:
+    return np.array([str(v).strip().lower() for v in values], dtype=object)
+
+
+def _encode(values: np.ndarray) -> tuple:
+    """Dictionary-encode values → (int32 codes, names)."""
+    codes, names = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+    return codes.astype(np.int32), np.asarray(names, dtype=object)
+
+
+def _pack_column(arrays: Dict, name: str, values: np.ndarray) -> None:
+    """Store a column in arrays: typed columns as is, object columns dictionary-encoded."""
+    if values.dtype != object:
+        arrays[name] = values
+        return
+    codes, names = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+    kinds = np.empty(len(names), dtype=np.int8)
+    text = []
+    for j, v in enumerate(names):
+        if isinstance(v, (bool, np.bool_)):
+            kinds[j], v = _KIND_BOOL, int(v)
+        elif isinstance(v, (int, np.integer)):
+            kinds[j] = _KIND_INT
+        elif isinstance(v, (float, np.floating)) and np.isnan(v) or v is None:
+            kinds[j] = _KIND_NAN
+        elif isinstance(v, (float, np.floating)):
+            kinds[j], v = _KIND_FLOAT, repr(float(v))
+        else:
+            kinds[j] = _KIND_STR
+        text.append(str(v))
+    arrays[f"{name}.codes"] = codes.astype(np.int32)
+    arrays[f"{name}.names"] = np.array(text, dtype=str)
+    arrays[f"{name}.kinds"] = kinds
+
+
+def _unpack_column(arrays, name: str) -> np.ndarray:
+    """Inverse of _pack_column."""
+    if name in arrays:
+        return arrays[name]
+    parse = {_KIND_STR: str, _KIND_INT: int, _KIND_FLOAT: float, _KIND_BOOL: lambda v: bool(int(v)), _KIND_NAN: lambda v: np.nan}
+    names = np.empty(len(arrays[f"{name}.kinds"]), dtype=object)
+    names[:] = [parse[kind](v) for kind, v in zip(arrays[f"{name}.kinds"].tolist(), arrays[f"{name}.names"].tolist())]
+    return names[arrays[f"{name}.codes"]]
+
+
+def _next_day_table(day: np.ndarray) -> np.ndarray:
+    """For each row, the first later row on a later Day_of_year (-1 if none)."""
+    n = len(day)
+    next_day = np.full(n, -1, dtype=np.int64)
+    stack = []  # rows after i, days strictly increasing from the top
+    for i in range(n - 1, -1, -1):
+        while stack and day[stack[-1]] <= day[i]:
+            stack.pop()
+        if stack:
+            next_day[i] = stack[-1]
+        stack.append(i)
+    return next_day
+
+
+def _next_subcycle_table(day: np.ndarray, dc: np.ndarray, sub: np.ndarray) -> np.ndarray:
+    """For each row, the first later row of the same day and drive cycle but another subcycle (-1 if none)."""
+    n = len(day)
+    next_sub = np.full(n, -1, dtype=np.int64)
+    nearest = {}  # (day, dc) → (nearest row, its subcycle, nearest row with another subcycle)
+    for i in range(n - 1, -1, -1):
+        key = (day[i], dc[i])
+        pos, pos_sub, alt = nearest.get(key, (-1, None, -1))
+        next_sub[i] = pos if pos >= 0 and pos_sub != sub[i] else alt
+        nearest[key] = (i, sub[i], pos if pos_sub != sub[i] else alt)
+    return next_sub
+
+
+class CompiledSchedule:
+    """
+    Drive-cycle table compiled once at solver start.
+
+    Rows are held as typed arrays (step/value types and units as codes into small
+    string dictionaries, durations as floats), triggers are parsed and compiled
+    (CompiledTriggers) once per distinct trigger string, and trigger actions jump through precomputed next-subcycle and
+    next-day tables, so visiting a row costs O(1) whatever the table size.
+
+    The compiled arrays round-trip through to_bytes/load_compiled_schedule, so /generate
+    can store the schedule next to the simulation table and /run can skip parsing the CSV.
+    table_fingerprint (table_fingerprint() of that CSV, stored with the artifact) lets
+    /run check that a submitted table is the one the schedule was compiled from.
+    """
+
+    # Per-row typed arrays (sliced by from_row; next_day/next_subcycle are row indices)
+    ROW_ARRAYS = (
+        'step_key', 'valid', 'step_type_code', 'value_type_code', 'unit_code', 'value',
+        'step_duration', 'dt_step', 'day', 'dc_code', 'subcycle_code', 'trigger_set',
+        'has_triggers', 'use_batching', 'next_day', 'next_subcycle'
+    )
+    NAME_ARRAYS = ('step_type_names', 'value_type_names', 'unit_names', 'dc_names', 'subcycle_names')
+
+    def __init__(
+        self,
+        dc_table: pd.DataFrame,
+        dc_trigger_col: Optional[str],
+        step_trigger_col: Optional[str],
+        dt_base: float = 1
+    ):
+        n = len(dc_table)
+        self.n_rows = n
+        self.columns = [str(c) for c in dc_table.columns]
+        self.dc_trigger_col = dc_trigger_col
+        self.step_trigger_col = step_trigger_col
+        self.table_fingerprint = None
+        self.step_key = np.asarray(dc_table.index, dtype=np.int64)
+
+        value_type_raw = _column(dc_table, 'Value Type', None)
+        value_raw = _column(dc_table, 'Value', None)
+        self.valid = ~(pd.isna(value_type_raw) | pd.isna(value_raw))
+
+        step_type = _normalized(_column(dc_table, 'Step Type', 'fixed'))
+        value_type = _normalized(value_type_raw)
+        unit = _normalized(_column(dc_table, 'Unit', ''))
+        self.step_type_code, self.step_type_names = _encode(step_type)
+        self.value_type_code, self.value_type_names = _encode(value_type)
+        self.unit_code, self.unit_names = _encode(unit)
+
+        self.value = np.where(self.valid, pd.to_numeric(value_raw, errors='coerce'), np.nan).astype(float)
+        self.step_duration = _column(dc_table, 'Step Duration (s)', np.inf).astype(float)
+        self.step_duration[step_type == 'trigger_only'] = 0.0
+        self.dt_step = _column(dc_table, 'Timestep (s)', dt_base).astype(float)
+        day_raw = _column(dc_table, 'Day_of_year', 1)
+        self.day = np.array([int(d) if pd.notna(d) else -1 for d in day_raw], dtype=np.int64)
+
+        dc_raw = _column(dc_table, 'DriveCycle_ID', '')
+        self.dc_code, self.dc_names = _encode(dc_raw)
+        subcycle = np.array([str(s) for s in _column(dc_table, 'Subcycle_ID', '')], dtype=object)
+        self.subcycle_code, self.subcycle_names = _encode(subcycle)
+
+        # Triggers: parsed once per distinct string
+        dc_trig_str = np.array([str(v) for v in _column(dc_table, dc_trigger_col, '')], dtype=object)
+        step_trig_str = np.array([str(v) for v in _column(dc_table, step_trigger_col, '')], dtype=object)
+        dc_triggers = self._parse_triggers(dc_trig_str, 'dc', dc_trigger_col)
+        step_triggers = self._parse_triggers(step_trig_str, 'step', step_trigger_col)
+        # Step triggers only apply to 'fixed' rows
+        step_triggers = [t if st == 'fixed' else [] for t, st in zip(step_triggers, step_type)]
+        self.has_triggers = np.array([bool(a) or bool(b) for a, b in zip(step_triggers, dc_triggers)], dtype=bool)
+        # Compiled per distinct (step, dc) trigger pair; rows reference them by trigger_set
+        compiled = {}
+        self.trigger_sets = []
+        self.trigger_set = np.empty(n, dtype=np.int32)
+        for i, (step_str, dc_str, step_trigs, dc_trigs) in enumerate(zip(step_trig_str, dc_trig_str, step_triggers, dc_triggers)):
+            key = (step_str if step_trigs else '', dc_str)
+            if key not in compiled:
+                compiled[key] = len(self.trigger_sets)
+                self.trigger_sets.append(CompiledTriggers(step_trigs + dc_trigs))
+            self.trigger_set[i] = compiled[key]
+        self.use_batching = (step_type == 'fixed') & ~self.has_triggers
+
+        # Row metadata columns (ordered as META_FIELDS)
+        self.meta_columns = (
+            _column(dc_table, 'Global Step Index', np.nan),
+            day_raw,
+            dc_raw,
+            subcycle,
+            _column(dc_table, 'Subcycle Step Index', np.nan),
+            value_type,
+            self.value,
+            unit,
+            step_type,
+            _column(dc_table, 'Label', ''),
+            _column(dc_table, 'Ambient Temp (°C)', np.nan),
+            _column(dc_table, 'Location', ''),
+            dc_trig_str if dc_trigger_col else np.full(n, '', dtype=object),
+            step_trig_str if step_trigger_col else np.full(n, '', dtype=object),
+        )
+
+        # Trigger action jump tables (end of table → last row)
+        self.next_day = _next_day_table(self.day)
+        self.next_subcycle = _next_subcycle_table(self.day, self.dc_code, self.subcycle_code)
+        self.next_subcycle = np.where(
+            (self.next_subcycle >= 0) & ((self.next_day < 0) | (self.next_subcycle < self.next_day)),
+            self.next_subcycle, self.next_day
+        )
+        self.next_day[self.next_day < 0] = n - 1
+        self.next_subcycle[self.next_subcycle < 0] = n - 1
+
+    def _parse_triggers(self, trigger_strings: np.ndarray, source: str, column: Optional[str]) -> List[List[Dict]]:
+        if column is None:
+            return [[] for _ in trigger_strings]
+        parsed = {}
+        for i, trigger_str in enumerate(trigger_strings):
+            if trigger_str not in parsed:
+                parsed[trigger_str] = parse_trigger_string(trigger_str, source, where=f"{column} step: {self.step_key[i]}")
+        return [parsed[trigger_str] for trigger_str in trigger_strings]
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    @property
+    def last_day(self) -> int:
+        """Last Day_of_year of the schedule."""
+        return int(self.day.max()) if len(self.day) else 0
+
+    def row_data(self, i: int) -> Optional[Dict]:
+        """Per-row step description used by process_single_row (None for invalid rows)."""
+        if not self.valid[i]:
+            return None
+        return {
+            'step_type': self.step_type_names[self.step_type_code[i]],
+            'step_duration': float(self.step_duration[i]),
+            'dt_step': float(self.dt_step[i]),
+            'value_type': self.value_type_names[self.value_type_code[i]],
+            'value': float(self.value[i]),
+            'unit': self.unit_names[self.unit_code[i]],
+            'current_day': int(self.day[i]),
+            'current_dc': self.dc_names[self.dc_code[i]],
+            'current_subcycle': self.subcycle_names[self.subcycle_code[i]],
+            'triggers': self.trigger_sets[self.trigger_set[i]],
+            'has_triggers': bool(self.has_triggers[i]),
+            'use_batching': bool(self.use_batching[i]),
+            'metadata': tuple(column[i] for column in self.meta_columns),
+            'step_key': int(self.step_key[i]),
+        }
+
+    def advance(self, row_idx: int, action_level: str) -> int:
+        """
+        7.8 Trigger Actions
+        Row to continue from after a trigger with the given action level fired on row_idx:
+        'step' the next row, 'dc' the next subcycle of the same drive cycle and day (or
+        the next day's first row), 'day' the next day's first row. At the end, stay.
+        """
+        if row_idx >= self.n_rows - 1:
+            return row_idx
+        if action_level == 'day':
+            return int(self.next_day[row_idx])
+        if action_level == 'dc':
+            return int(self.next_subcycle[row_idx])
+        return row_idx + 1
+
+    def from_row(self, start: int) -> 'CompiledSchedule':
+        """
+        Schedule of rows start.. (as compiling dc_table.iloc[start:]), for resuming
+        from a paused row.
+        """
+        if start <= 0:
+            return self
+        tail = object.__new__(CompiledSchedule)
+        tail.__dict__.update(self.__dict__)
+        for name in self.ROW_ARRAYS:
+            setattr(tail, name, getattr(self, name)[start:])
+        # Jump targets always lie ahead of their row, so only shift them
+        tail.next_day = tail.next_day - start
+        tail.next_subcycle = tail.next_subcycle - start
+        tail.meta_columns = tuple(column[start:] for column in self.meta_columns)
+        tail.n_rows = max(0, self.n_rows - start)
+        return tail
+
+    def _to_arrays(self) -> Dict[str, np.ndarray]:
+        """Compiled arrays as a flat name → array dict (see to_bytes)."""
+        arrays = {
+            'columns': np.array(self.columns, dtype=str),
+            'trigger_cols': np.array([self.dc_trigger_col or '', self.step_trigger_col or ''], dtype=str),
+        }
+        for name in self.ROW_ARRAYS:
+            arrays[name] = getattr(self, name)
+        for name in self.NAME_ARRAYS:
+            _pack_column(arrays, name, getattr(self, name))
+        for j, column in enumerate(self.meta_columns):
+            _pack_column(arrays, f"meta{j}", column)
+        # Trigger tables: trigger sets concatenated, split by offsets
+        sets = [CompiledTriggers([])] + self.trigger_sets
+        arrays['trigger_offsets'] = np.cumsum([len(t) for t in sets]).astype(np.int64)
+        for field in CompiledTriggers.FIELDS:
+            arrays[f"trigger_{field}"] = np.concatenate([getattr(t, field) for t in sets])
+        return arrays
+
+    @classmethod
+    def _from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'CompiledSchedule':
+        schedule = object.__new__(cls)
+        schedule.columns = arrays['columns'].tolist()
+        dc_trigger_col, step_trigger_col = arrays['trigger_cols'].tolist()
+        schedule.dc_trigger_col = dc_trigger_col or None
+        schedule.step_trigger_col = step_trigger_col or None
+        schedule.table_fingerprint = None
+        for name in cls.ROW_ARRAYS:
+            setattr(schedule, name, arrays[name])
+        schedule.n_rows = len(schedule.step_key)
+        for name in cls.NAME_ARRAYS:
+            setattr(schedule, name, _unpack_column(arrays, name))
+        schedule.meta_columns = tuple(
+            _unpack_column(arrays, f"meta{j}") for j in range(len(META_FIELDS))
+        )
+        offsets = arrays['trigger_offsets']
+        schedule.trigger_sets = [
+            CompiledTriggers.from_arrays(**{
+                field: arrays[f"trigger_{field}"][offsets[k]:offsets[k + 1]] for field in CompiledTriggers.FIELDS
+            })
+            for k in range(len(offsets) - 1)
+        ]
+        return schedule
+
+    def to_bytes(self) -> bytes:
+        """Serialize the compiled arrays (.npz, no pickled objects); see load_compiled_schedule."""
+        return _save_arrays({'kind': np.array('table'), **self._to_arrays()}, self.table_fingerprint)
+
+
+class DayTemplateSchedule(CompiledSchedule):
+    """
+    Simulation table held as day templates streamed through a DayCalendar: every
+    distinct drive cycle is compiled once as a block of rows of `base`, and the days
+    are resolved from the calendar rules one at a time as the solver reaches them.
+
+    Rows are numbered as in the expanded table (idle init row first, then each day's
+    block), and row_data, advance and from_row behave as for the CompiledSchedule of
+    that table, with 'Global Step Index' and the step key equal to the row number as in
+    generated tables. Memory and artifact size depend on the distinct drive cycles only,
+    not on the horizon (calendar.n_days may span several years).
+
+    Artifacts written by /generate also carry each template's content fingerprint and
+    rendered CSV rows (template_fingerprints, template_rows), so regenerating the table
+    only rebuilds the templates whose fingerprint changed.
+    """
+
+    def __init__(
+        self,
+        base: CompiledSchedule,
+        template_ids: List[str],
+        template_base: np.ndarray,
+        template_len: np.ndarray,
+        calendar: DayCalendar,
+        fingerprints: Optional[List[str]] = None,
+        rows: Optional[np.ndarray] = None,
+        total_rows: Optional[int] = None
+    ):
+        self.base = base
+        self.template_ids = list(template_ids)
+        self.template_index = {dc_id: k for k, dc_id in enumerate(self.template_ids)}
+        self.template_base = np.asarray(template_base, dtype=np.int64)  # first base row of each template
+        self.template_len = np.asarray(template_len, dtype=np.int64)
+        self.calendar = calendar
+        self.template_fingerprints = list(fingerprints or [])
+        self.template_rows = None if rows is None else np.asarray(rows, dtype=str)
+        self.columns = base.columns
+        self.dc_trigger_col = base.dc_trigger_col
+        self.step_trigger_col = base.step_trigger_col
+        self.table_fingerprint = None
+
+        # A template's rows share one day and drive cycle, so subcycle jumps stay in the template
+        self.local_next_subcycle = _next_subcycle_table(base.day, base.dc_code, base.subcycle_code)
+        # Row count (idle init row + every day's block): one pass over the calendar when
+        # compiled, then stored with the artifact so loading it resolves no days
+        if total_rows is None:
+            total_rows = 1 + sum(int(self.template_len[self._template(day)]) for day in range(1, len(calendar) + 1))
+        self.total_rows = int(total_rows)
+        self.first_row = 0
+        self.n_rows = self.total_rows
+        self._cursor = (0, 0)  # (day, first row) of the block last located; day 0 is the idle init row
+
+    @property
+    def last_day(self) -> int:
+        return len(self.calendar)
+
+    @property
+    def day(self) -> np.ndarray:
+        """Day of every row (expands the whole horizon; for inspection only)."""
+        days = [1] + [day for day in range(1, len(self.calendar) + 1) for _ in range(self._block_len(day))]
+        return np.array(days, dtype=np.int64)[self.first_row:]
+
+    def _template(self, day: int) -> int:
+        return self.template_index[self.calendar.resolve(day)[0]]
+
+    def _block_len(self, day: int) -> int:
+        return 1 if day == 0 else int(self.template_len[self._template(day)])
+
+    def _block_base(self, day: int) -> int:
+        return 0 if day == 0 else int(self.template_base[self._template(day)])
+
+    def _locate(self, row: int) -> tuple:
+        """(day, first row, length) of the block holding a global row; walks forward from the last one."""
+        day, start = self._cursor
+        if row < start:
+            day, start = 0, 0
+        length = self._block_len(day)
+        while row >= start + length and day < len(self.calendar):
+            day, start = day + 1, start + length
+            length = self._block_len(day)
+        self._cursor = (day, start)
+        return day, start, length
+
+    def _next_day_start(self, day: int, start: int, length: int) -> int:
+        """First row of the next day (the idle init row shares day 1), or the last row."""
+        next_start = start + length
+        if day == 0 and len(self.calendar) > 0:
+            next_start += self._block_len(1)
+        return min(next_start, self.total_rows - 1)
+
+    def row_data(self, i: int) -> Optional[Dict]:
+        row = i + self.first_row
+        day, start, _ = self._locate(row)
+        data = self.base.row_data(self._block_base(day) + row - start)
+        if data is None:
+            return None
+        day_of_year = max(day, 1)
+        metadata = list(data['metadata'])
+        metadata[_GLOBAL_STEP_FIELD] = row
+        metadata[_DAY_FIELD] = day_of_year
+        data.update(current_day=day_of_year, step_key=row, metadata=tuple(metadata))
+        return data
+
+    def advance(self, row_idx: int, action_level: str) -> int:
+        if row_idx >= self.n_rows - 1:
+            return row_idx
+        if action_level not in ('day', 'dc'):
+            return row_idx + 1
+        row = row_idx + self.first_row
+        day, start, length = self._locate(row)
+        block_base = self._block_base(day)
+        target = self._next_day_start(day, start, length)
+        if action_level == 'dc' and self.local_next_subcycle[block_base + row - start] >= 0:
+            target = start + self.local_next_subcycle[block_base + row - start] - block_base
+        return int(target) - self.first_row
+
+    def from_row(self, start: int) -> 'DayTemplateSchedule':
+        if start <= 0:
+            return self
+        tail = object.__new__(DayTemplateSchedule)
+        tail.__dict__.update(self.__dict__)
+        tail.first_row = self.first_row + start
+        tail.n_rows = max(0, self.n_rows - start)
+        tail._cursor = (0, 0)
+        return tail
+
+    def to_bytes(self) -> bytes:
+        arrays = {
+            'kind': np.array('days'),
+            'template_ids': np.array(self.template_ids, dtype=str),
+            'template_base': self.template_base,
+            'template_len': self.template_len,
+            'calendar': np.array(self.calendar.to_json()),
+            'total_rows': np.array(self.total_rows, dtype=np.int64),
+        }
+        if self.template_fingerprints and self.template_rows is not None:
+            arrays['template_fingerprints'] = np.array(self.template_fingerprints, dtype=str)
+            arrays['template_rows'] = self.template_rows
+        arrays.update({f"base.{name}": values for name, values in self.base._to_arrays().items()})
+        return _save_arrays(arrays, self.table_fingerprint)
+
+    @classmethod
+    def _from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'DayTemplateSchedule':
+        base = CompiledSchedule._from_arrays({
+            name[len('base.'):]: values for name, values in arrays.items() if name.startswith('base.')
+        })
+        return cls(
+            base, arrays['template_ids'].tolist(), arrays['template_base'], arrays['template_len'],
+            DayCalendar.from_json(str(arrays['calendar'])),
+            arrays['template_fingerprints'].tolist() if 'template_fingerprints' in arrays else None,
+            arrays.get('template_rows'),
+            int(arrays['total_rows']) if 'total_rows' in arrays else None
+        )
+
+
+def _save_arrays(arrays: Dict[str, np.ndarray], fingerprint: Optional[str] = None) -> bytes:
+    buffer = io.BytesIO()
+    if fingerprint:
+        arrays = {**arrays, 'table_fingerprint': np.array(fingerprint)}
+    np.savez_compressed(buffer, version=np.array(SCHEDULE_ARTIFACT_VERSION), **arrays)
+    return buffer.getvalue()
+
+
+def compile_schedule(
+    dc_table: pd.DataFrame,
+    dc_trigger_col: Optional[str],
+    step_trigger_col: Optional[str],
+    dt_base: float = 1
+) -> CompiledSchedule:
+    print(f"🗂️ Compiling drive cycle schedule: {len(dc_table)} rows")
+    return CompiledSchedule(dc_table, dc_trigger_col, step_trigger_col, dt_base)
+
+
+def compile_drive_table(dc_table: pd.DataFrame, dt_base: float = 1) -> CompiledSchedule:
+    """compile_schedule with the trigger columns located by name."""
+    dc_trigger_col = find_col(dc_table.columns, DC_TRIGGER_COLUMNS)
+    step_trigger_col = find_col(dc_table.columns, STEP_TRIGGER_COLUMNS)
+    return compile_schedule(dc_table, dc_trigger_col, step_trigger_col, dt_base)
+
+
+def compile_day_templates(
+    template_table: pd.DataFrame,
+    template_ids: List[str],
+    template_len: np.ndarray,
+    calendar: DayCalendar,
+    dt_base: float = 1,
+    fingerprints: Optional[List[str]] = None,
+    rows: Optional[List[str]] = None
+) -> DayTemplateSchedule:
+    """
+    DayTemplateSchedule from a table holding each drive cycle's day once, after the idle
+    init row: template k is the next template_len[k] rows, run on the days where the
+    calendar resolves to template_ids[k]. fingerprints and rows (the templates' rendered
+    CSV rows, concatenated) are stored with the artifact for incremental regeneration.
+    """
+    dc_trigger_col = find_col(template_table.columns, DC_TRIGGER_COLUMNS)
+    step_trigger_col = find_col(template_table.columns, STEP_TRIGGER_COLUMNS)
+    template_len = np.asarray(template_len, dtype=np.int64)
+    template_base = 1 + np.concatenate([[0], np.cumsum(template_len)[:-1]])
+    schedule = DayTemplateSchedule(
+        CompiledSchedule(template_table, dc_trigger_col, step_trigger_col, dt_base),
+        template_ids, template_base, template_len, calendar, fingerprints, rows
+    )
+    print(f"🗂️ Compiled day templates: {len(template_table)} template rows → {len(schedule)} rows over {len(calendar)} days")
+    return schedule
+
+
+def load_compiled_schedule(data: bytes) -> CompiledSchedule:
+    """
+    Schedule from a stored artifact (CompiledSchedule or DayTemplateSchedule .to_bytes).
+    Raises ValueError for artifacts of another version.
+    """
+    with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+        arrays = {name: npz[name] for name in npz.files}
+    version = int(arrays.pop('version'))
+    if version != SCHEDULE_ARTIFACT_VERSION:
+        raise ValueError(f"Unsupported schedule artifact version: {version}")
+    kind = str(arrays.pop('kind'))
+    fingerprint = arrays.pop('table_fingerprint', None)
+    schedule_cls = DayTemplateSchedule if kind == 'days' else CompiledSchedule
+    schedule = schedule_cls._from_arrays(arrays)
+    schedule.table_fingerprint = None if fingerprint is None else str(fingerprint)
+    print(f"🗂️ Loaded compiled drive cycle schedule: {len(schedule)} rows")
+    return schedule
+
+
+# A row runs at most one simulated day: the internal time_elapsed trigger ends every day
+_DAY_S = 86400.0
+
+
+def _row_timesteps(step_duration: np.ndarray, dt_step: np.ndarray, single_step: np.ndarray) -> np.ndarray:
+    duration = np.where((step_duration > 0) & np.isfinite(step_duration), np.minimum(step_duration, _DAY_S), _DAY_S)
+    dt = np.where((dt_step > 0) & np.isfinite(dt_step), dt_step, 1.0)
+    return np.where(single_step, 1.0, np.ceil(duration / dt))
+
+
+def estimate_timesteps(schedule) -> float:
+    """
+    Upper bound on the solver timesteps of a drive cycle (DataFrame, CompiledSchedule or
+    DayTemplateSchedule), for sizing jobs without running them.
+
+    Fixed rows without triggers are solved in one step; other rows take their duration
+    over their timestep, and rows that run until a trigger fires (trigger_only, or no
+    duration) are counted as running the rest of the day. A DayTemplateSchedule counts
+    its longest template on every remaining day, so no calendar day is resolved.
+    """
+    if isinstance(schedule, DayTemplateSchedule):
+        base = schedule.base
+        steps = _row_timesteps(base.step_duration, base.dt_step, base.use_batching)
+        per_template = [steps[b:b + n].sum() for b, n in zip(schedule.template_base, schedule.template_len)]
+        days = len(schedule.calendar) * schedule.n_rows / max(schedule.total_rows, 1)
+        return float(max(per_template, default=0.0) * np.ceil(days))
+    if isinstance(schedule, CompiledSchedule):
+        return float(_row_timesteps(schedule.step_duration, schedule.dt_step, schedule.use_batching).sum())
+
+    step_type = _normalized(_column(schedule, 'Step Type', 'fixed'))
+    step_duration = pd.to_numeric(pd.Series(_column(schedule, 'Step Duration (s)', np.inf)), errors='coerce').to_numpy(float)
+    step_duration = np.where(step_type == 'trigger_only', np.inf, step_duration)
+    dt_step = pd.to_numeric(pd.Series(_column(schedule, 'Timestep (s)', 1.0)), errors='coerce').to_numpy(float)
+    has_triggers = np.zeros(len(schedule), dtype=bool)
+    for col in (find_col(schedule.columns, DC_TRIGGER_COLUMNS), find_col(schedule.columns, STEP_TRIGGER_COLUMNS)):
+        if col is not None:
+            has_triggers |= np.array([pd.notna(v) and str(v).strip() not in ('', 'nan') for v in schedule[col]], dtype=bool)
+    return float(_row_timesteps(step_duration, dt_step, (step_type == 'fixed') & ~has_triggers).sum())
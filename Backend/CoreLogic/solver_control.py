@@ -0,0 +1,116 @@
+# FILE: CoreLogic/solver_control.py
+import time
+import multiprocessing
+from typing import Any, Dict, Optional
+
+# Requests the API sets for a running job
+REQUEST_NONE, REQUEST_STOP, REQUEST_PAUSE = 0, 1, 2
+REQUESTS = {'stop': REQUEST_STOP, 'pause': REQUEST_PAUSE}
+# Final statuses the solver acknowledges, by code (0 while the job runs)
+ACK_STATUSES = ('running', 'completed', 'terminated early', 'stopped by user', 'paused')
+# Fields of one job's slot: request and status, then the progress the solver publishes
+SLOT_FIELDS = (
+    'request', 'status',
+    't_start', 't_end', 't_sim', 'row', 'n_rows', 'steps', 'wall_start', 'wall_updated',
+)
+_FIELD = {name: i for i, name in enumerate(SLOT_FIELDS)}
+
+
+def create_control_block(n_slots: int):
+    """Shared control block for n_slots concurrent jobs (len(SLOT_FIELDS) doubles per job)."""
+    return multiprocessing.RawArray('d', len(SLOT_FIELDS) * n_slots)
+
+
+class SolverControl:
+    """
+    Control and progress channel of one solver job: a slot of a control block shared with
+    the worker processes. The API sets stop/pause requests there and reads the progress
+    the solver publishes (simulated time, row, steps); the solver acknowledges its final
+    status. Every access is a memory read or write, cheap enough for every timestep.
+    """
+
+    def __init__(self, block, slot: int):
+        self.block = block
+        self.slot = slot
+        self.base = len(SLOT_FIELDS) * slot
+
+    def _get(self, name: str) -> float:
+        return self.block[self.base + _FIELD[name]]
+
+    def _set(self, name: str, value: float) -> None:
+        self.block[self.base + _FIELD[name]] = value
+
+    def reset(self) -> None:
+        for i in range(len(SLOT_FIELDS)):
+            self.block[self.base + i] = 0.0
+
+    def request(self, action: str) -> None:
+        """Ask the solver to 'stop' or 'pause'."""
+        self._set('request', REQUESTS[action])
+
+    @property
+    def requested(self) -> int:
+        return int(self._get('request'))
+
+    def acknowledge(self, status: str) -> None:
+        """Record the solver's final status (one of ACK_STATUSES)."""
+        self._set('status', ACK_STATUSES.index(status))
+
+    @property
+    def status(self) -> str:
+        return ACK_STATUSES[int(self._get('status'))]
+
+    # --- Progress (written by the solver, read by the API) ---
+
+    def begin(self, t_start: float, t_end: float, n_rows: int) -> None:
+        """Start publishing progress of a run covering [t_start, t_end] over n_rows rows."""
+        self._set('t_start', t_start)
+        self._set('t_end', t_end)
+        self._set('t_sim', t_start)
+        self._set('n_rows', n_rows)
+        self._set('steps', 0)
+        now = time.time()
+        self._set('wall_start', now)
+        self._set('wall_updated', now)
+
+    def report_step(self, t_sim: float, row: int) -> None:
+        """Publish one solver timestep."""
+        self._set('t_sim', t_sim)
+        self._set('row', row)
+        self._set('steps', self._get('steps') + 1)
+        self._set('wall_updated', time.time())
+
+    def progress(self) -> Optional[Dict[str, Any]]:
+        """
+        Snapshot of the published progress, or None before the solver started the job.
+
+        Returns:
+        --------
+        Dict with t_sim_s, row, n_rows, steps, elapsed_s, idle_s (wall time since the
+        last timestep), steps_per_s, progress (percent) and eta_s (None until measurable)
+        """
+        wall_start = self._get('wall_start')
+        if wall_start <= 0:
+            return None
+        now = time.time()
+        t_start, t_end, t_sim = self._get('t_start'), self._get('t_end'), self._get('t_sim')
+        row, n_rows, steps = int(self._get('row')), int(self._get('n_rows')), int(self._get('steps'))
+        # The run ends at t_end or after its last row, whichever comes first
+        fraction = 0.0
+        if t_end > t_start:
+            fraction = (t_sim - t_start) / (t_end - t_start)
+        if n_rows > 0:
+            fraction = max(fraction, row / n_rows)
+        fraction = min(max(fraction, 0.0), 1.0)
+        elapsed = max(now - wall_start, 1e-9)
+        return {
+            't_sim_s': t_sim,
+            'row': row,
+            'n_rows': n_rows,
+            'steps': steps,
+            'elapsed_s': elapsed,
+            'idle_s': max(now - self._get('wall_updated'), 0.0),
+            'steps_per_s': steps / elapsed,
+            'progress': 100.0 * fraction,
+            'eta_s': elapsed * (1.0 - fraction) / fraction if fraction > 0 else None,
+        }
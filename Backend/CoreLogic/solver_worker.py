@@ -0,0 +1,96 @@
+# FILE: CoreLogic/solver_worker.py
+import os
+import hashlib
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from . import NEW_electrical_solver as aes
+from .battery_params import get_rc_table
+from .solver_control import SolverControl
+from .result_ring import ResultRing
+
+# rc_data seen by this worker, by content key. Jobs are switched to the cached dict, so the
+# RCParameterTable compiled for it (cached by id in battery_params) is reused across jobs
+_RC_DATA_CACHE = {}
+_RC_DATA_CACHE_SIZE = 8
+# Control block shared with the API process (see solver_control), set by prewarm_worker
+_CONTROL_BLOCK = None
+
+
+def rc_data_key(rc_data: Dict) -> str:
+    """Content key of an rc_data dict ({mode: {temp: grid}})."""
+    digest = hashlib.sha1()
+    for mode in sorted(rc_data or {}):
+        for temp in sorted(rc_data[mode] or {}):
+            grid = np.ascontiguousarray(rc_data[mode][temp], dtype=float)
+            digest.update(f"{mode}/{temp}/{grid.shape}".encode())
+            digest.update(grid.tobytes())
+    return digest.hexdigest()
+
+
+def _intern_rc_data(setup: Dict) -> None:
+    """Point every cell of setup at this worker's cached copy of its rc_data."""
+    interned = {}
+    for cell in setup.get('cells', []):
+        rc_data = cell.get('rc_data')
+        if rc_data is None:
+            continue
+        if id(rc_data) not in interned:
+            key = rc_data_key(rc_data)
+            if key not in _RC_DATA_CACHE:
+                if len(_RC_DATA_CACHE) >= _RC_DATA_CACHE_SIZE:
+                    _RC_DATA_CACHE.pop(next(iter(_RC_DATA_CACHE)))
+                _RC_DATA_CACHE[key] = rc_data
+            interned[id(rc_data)] = _RC_DATA_CACHE[key]
+        cell['rc_data'] = interned[id(rc_data)]
+
+
+def prewarm_worker(control_block=None) -> None:
+    """
+    Worker process initializer. Importing this module already loaded numpy, pandas and
+    the solver; compile a dummy parameter table so the lookup code paths are warm too.
+    """
+    global _CONTROL_BLOCK
+    _CONTROL_BLOCK = control_block
+    from .battery_params import _get_dummy_rc_data
+    get_rc_table(_get_dummy_rc_data()).lookup(np.array([0.5]), np.array([25.0]), 'DISCHARGE')
+    print(f"🔥 Solver worker {os.getpid()} ready")
+
+
+def ping() -> int:
+    """No-op job used to start (and prewarm) every worker of the pool."""
+    return os.getpid()
+
+
+def run_solver_job(args: tuple, slot: Optional[int] = None, ring_name: Optional[str] = None) -> str:
+    """
+    run_electrical_solver(*args) with the worker's warm parameter tables, controlled
+    through the given slot of the control block and publishing its timesteps to the
+    result ring ring_name. Returns the solver's final status.
+    """
+    _intern_rc_data(args[0])
+    control = SolverControl(_CONTROL_BLOCK, slot) if _CONTROL_BLOCK is not None and slot is not None else None
+    ring = ResultRing.attach(ring_name) if ring_name else None
+    try:
+        aes.run_electrical_solver(*args, control=control, ring=ring)
+    finally:
+        if ring is not None:
+            ring.close()
+    return control.status if control is not None else 'completed'
+
+
+def run_solver_batch(jobs: List[Tuple[tuple, Optional[int], Optional[str]]]) -> List[Tuple[bool, object]]:
+    """
+    Run several small (args, slot, ring_name) jobs one after the other on this worker.
+
+    Returns:
+    --------
+    List of (ok, result) per job, where result is the exception when ok is False
+    """
+    results = []
+    for args, slot, ring_name in jobs:
+        try:
+            results.append((True, run_solver_job(args, slot, ring_name)))
+        except Exception as e:
+            print(f"❌ Solver job in batch failed: {e}")
+            results.append((False, e))
+    return results
@@ -9,8 +9,8 @@ Hard cutoffs (voltage limits) are separate: terminate entire sim after dt log.
 
 import numpy as np
 import re
-from typing import List, Dict, Any
-import pandas as pd  # For row access in advance func
+from typing import List, Dict, Any, Optional
+import pandas as pd  # For row access in parse_trigger_list_from_row
 
 # 7.3 Standard Trigger Registry (exact match required)
 TRIGGER_REGISTRY = {
@@ -35,6 +35,12 @@ def parse_trigger_list_from_row(row: pd.Series, column: str) -> List[Dict[str, A
     """
     trigger_str = str(row.get(column, '')).strip()
     source = 'step' if 'step' in column.lower() else 'dc'
+    return parse_trigger_string(trigger_str, source, where=f"{column} step: {row.name}")
+
+
+def parse_trigger_string(trigger_str: str, source: str, where: str = "") -> List[Dict[str, Any]]:
+    """Parse one trigger cell (see parse_trigger_list_from_row) for the given source."""
+    trigger_str = trigger_str.strip()
     if not trigger_str:
         return []
     triggers = []
@@ -54,121 +60,145 @@ def parse_trigger_list_from_row(row: pd.Series, column: str) -> List[Dict[str, A
             elif trig_type == 'nan':
                 continue 
             else:
-                print(f"Warning: Unknown trigger '{trig_type}' in {column} step: {row.name}")
+                print(f"Warning: Unknown trigger '{trig_type}' in {where}")
     return triggers
 
 
-def evaluate_triggers(
-    triggers: List[Dict[str, Any]],
-    sim_SOC: np.ndarray, sim_V_term: np.ndarray, v_module: float,
-    dt: float,  # Current timestep (for time_elapsed crossover)
-    t_global: float, I_cells: np.ndarray, I_pack: float,
-    capacity_Ah: float, per_day_time: float,  # Pre-dt per_day_time
-    current_day: int, parallel_groups: list
-) -> List[Dict[str, Any]]:
-    """
-    7.5 Trigger Evaluation Logic
-    Evaluate all triggers every dt. Return fired list.
-    - Internal time_elapsed: Highest precedence; fires if per_day_time + dt >= 86400s.
-    - User triggers: Skip if value=None (per doc shorthand). Cell: max/high min/low; Pack: avg/total.
-    - 7.6 Precedence: Caller prioritizes (day > dc > step); log all fired.
-    """
-    fired = []
-
-    # 7.3 Solver-Defined: time_elapsed (always ends day; check crossover this dt)
-    if dt > 0 and per_day_time + dt >= 86400.0:
-        fired.append({
-            'name': 'time_elapsed', 'value': 86400.0, 'action_level': 'day',
-            'metric': per_day_time + dt, 'source': 'internal'
-        })
-
-    # User triggers (7.2 Cell vs Pack)
-    if not triggers:
-        return fired
-    n_series = len(parallel_groups)
-    n_p_avg = len(I_cells) / n_series if n_series > 0 else 1
-    for trig in triggers:
-        trig_type = trig['type']
-        # For time_elapsed, always evaluate (even if value=None)
-        if trig_type != 'time_elapsed' and trig['value'] is None:  # Skip if no threshold (doc examples)
-            print(f"Warning: Skipping trigger '{trig['type']}' (missing value)")
-            continue
-        # Compute metric (conservative for safety)
-        if 'V_cell' in trig_type:
-            metric = np.max(sim_V_term) if 'high' in trig_type else np.min(sim_V_term)
-        elif 'I_cell' in trig_type:
-            metric = np.max(np.abs(I_cells)) if 'high' in trig_type else np.min(np.abs(I_cells))
-        elif 'SOC_cell' in trig_type:
-            metric = np.max(sim_SOC) if 'high' in trig_type else np.min(sim_SOC)
-        elif 'C_rate_cell' in trig_type:
-            c_rates = np.abs(I_cells) / capacity_Ah
-            metric = np.max(c_rates) if 'high' in trig_type else np.min(c_rates)
-        elif 'P_cell' in trig_type:
+# 7.9 Compiled Triggers
+# Each trigger type reads one metric; metrics are computed once per step for all triggers
+TRIGGER_METRICS = {
+    'V_cell_high': 'V_cell_max', 'V_cell_low': 'V_cell_min',
+    'I_cell_high': 'I_cell_abs_max', 'I_cell_low': 'I_cell_abs_min',
+    'SOC_cell_high': 'SOC_cell_max', 'SOC_cell_low': 'SOC_cell_min',
+    'C_rate_cell_high': 'C_rate_cell_max', 'C_rate_cell_low': 'C_rate_cell_min',
+    'P_cell_high': 'P_cell_max', 'P_cell_low': 'P_cell_min',
+    'V_pack_high': 'V_pack', 'V_pack_low': 'V_pack',
+    'I_pack_high': 'I_pack_abs', 'I_pack_low': 'I_pack_abs',
+    'SOC_pack_high': 'SOC_pack_mean', 'SOC_pack_low': 'SOC_pack_mean',
+    'C_rate_pack_high': 'C_rate_pack', 'C_rate_pack_low': 'C_rate_pack',
+    'P_pack_high': 'P_pack', 'P_pack_low': 'P_pack',
+    'time_elapsed': 'time_of_day',
+}
+METRIC_NAMES = tuple(dict.fromkeys(TRIGGER_METRICS.values()))
+METRIC_CODES = {name: i for i, name in enumerate(METRIC_NAMES)}
+# Comparators: fire when metric > threshold (HIGH), < threshold (LOW) or >= threshold (REACHED)
+CMP_HIGH, CMP_LOW, CMP_REACHED = 1, -1, 0
+# Action levels in increasing precedence (7.6: day > dc > step)
+ACTION_LEVELS = ('step', 'dc', 'day')
+
+
+def compute_trigger_metrics(
+    metric_codes, sim_SOC: np.ndarray, sim_V_term: np.ndarray, v_module: float,
+    dt: float, I_cells: np.ndarray, I_pack: float, capacity_Ah: float,
+    per_day_time: float, n_p_avg: float
+) -> np.ndarray:
+    """Values of the requested metrics (indexed by METRIC_CODES; others left NaN)."""
+    values = np.full(len(METRIC_NAMES), np.nan)
+    abs_I = None
+    for code in metric_codes:
+        name = METRIC_NAMES[code]
+        if name.startswith('V_cell'):
+            value = np.max(sim_V_term) if name == 'V_cell_max' else np.min(sim_V_term)
+        elif name.startswith('I_cell') or name.startswith('C_rate_cell'):
+            abs_I = np.abs(I_cells) if abs_I is None else abs_I
+            value = np.max(abs_I) if name.endswith('max') else np.min(abs_I)
+            if name.startswith('C_rate'):
+                value = value / capacity_Ah
+        elif name.startswith('SOC_cell'):
+            value = np.max(sim_SOC) if name == 'SOC_cell_max' else np.min(sim_SOC)
+        elif name.startswith('P_cell'):
             powers = sim_V_term * I_cells
-            metric = np.max(powers) if 'high' in trig_type else np.min(powers)
-        elif 'V_pack' in trig_type:
-            metric = v_module
-        elif 'I_pack' in trig_type:
-            metric = abs(I_pack)
-        elif 'SOC_pack' in trig_type:
-            metric = np.mean(sim_SOC)  # Avg SOC for pack
-        elif 'C_rate_pack' in trig_type:
-            metric = abs(I_pack) / (capacity_Ah * n_p_avg)
-        elif 'P_pack' in trig_type:
-            metric = v_module * I_pack
-        elif trig_type == 'time_elapsed':
-            metric = per_day_time + dt  # Check crossover this dt
-            trig['value'] = trig.get('value', 86400.0)  # Default to end-of-day
-        else:
-            continue  # Unknown (logged in parse)
-
-        # Fire if violated
-        is_fired = ('high' in trig_type and metric > trig['value']) or \
-                   ('low' in trig_type and metric < trig['value']) or \
-                   (trig_type == 'time_elapsed' and metric >= trig['value'])
-        if is_fired:
-            action_level = trig.get('action_override', 
-                                   'day' if trig_type == 'time_elapsed' else 
-                                   'dc' if trig['source'] == 'dc' else 'step')
-            fired.append({**trig, 'action_level': action_level, 'metric': metric, 'name': trig_type})
-
-    return fired
-
-
-def advance_row_idx_for_action(
-    dc_table: pd.DataFrame, row_idx: int, action_level: str,
-    current_subcycle: str, current_dc: str, current_day: int
-) -> int:
+            value = np.max(powers) if name == 'P_cell_max' else np.min(powers)
+        elif name == 'V_pack':
+            value = v_module
+        elif name == 'I_pack_abs':
+            value = abs(I_pack)
+        elif name == 'SOC_pack_mean':
+            value = np.mean(sim_SOC)
+        elif name == 'C_rate_pack':
+            value = abs(I_pack) / (capacity_Ah * n_p_avg)
+        elif name == 'P_pack':
+            value = v_module * I_pack
+        else:  # time_of_day
+            value = per_day_time + dt
+        values[code] = value
+    return values
+
+
+class CompiledTriggers:
     """
-    7.8 Trigger Actions
-    Advance row_idx based on fired action_level.
-    - 'step': +1 row (end current step).
-    - 'dc' (subcycle): Next subcycle in same DC/day, or next day's first.
-    - 'day': First row of next Day_of_year.
-    If end of table, stay.
+    7.5 Trigger Evaluation Logic
+    A row's triggers as parallel (metric, comparator, threshold, action) arrays.
+
+    evaluate() computes each metric the triggers need once and compares every
+    threshold in one vectorized operation. Triggers without a value are skipped
+    (time_elapsed defaults to 86400s); cell triggers compare the max (high) or min
+    (low) over cells, pack triggers the aggregate. 7.6 Precedence: day > dc > step.
     """
-    if row_idx >= len(dc_table) - 1:
-        return row_idx
-    if action_level == 'step':
-        return row_idx + 1
-    next_row_idx = row_idx + 1
-    while next_row_idx < len(dc_table):
-        next_row = dc_table.iloc[next_row_idx]
-        next_day = int(next_row.get('Day_of_year', 1))
-        if action_level == 'day':
-            if next_day > current_day:
-                return next_row_idx  # 7.8.C: Next day
-            next_row_idx += 1
-            continue
-        # 'dc': Check same day/DC, next subcycle
-        next_dc = next_row.get('DriveCycle_ID', '')
-        next_sub = str(next_row.get('Subcycle_ID', ''))
-        if next_dc == current_dc and next_day == current_day and next_sub != current_subcycle:
-            return next_row_idx  # 7.8.B: Next subcycle
-        if next_day > current_day:
-            return next_row_idx  # No more: Next day
-        next_row_idx += 1
-    return len(dc_table) - 1  # End
+
+    FIELDS = ('metric', 'comparator', 'threshold', 'action')
+
+    def __init__(self, triggers: List[Dict[str, Any]]):
+        metric, comparator, threshold, action = [], [], [], []
+        for trig in triggers:
+            trig_type = trig['type']
+            if trig_type != 'time_elapsed' and trig.get('value') is None:
+                print(f"Warning: Skipping trigger '{trig_type}' (missing value)")
+                continue
+            level = trig.get('action_override',
+                             'day' if trig_type == 'time_elapsed' else
+                             'dc' if trig['source'] == 'dc' else 'step')
+            if level not in ACTION_LEVELS:
+                continue  # Fires without advancing
+            metric.append(METRIC_CODES[TRIGGER_METRICS[trig_type]])
+            comparator.append(CMP_REACHED if trig_type == 'time_elapsed' else CMP_HIGH if 'high' in trig_type else CMP_LOW)
+            threshold.append(trig.get('value', 86400.0))
+            action.append(ACTION_LEVELS.index(level))
+        self.metric = np.array(metric, dtype=np.int8)
+        self.comparator = np.array(comparator, dtype=np.int8)
+        self.threshold = np.array(threshold, dtype=float)
+        self.action = np.array(action, dtype=np.int8)
+        self.required = tuple(np.unique(self.metric).tolist())
+
+    @classmethod
+    def from_arrays(cls, metric: np.ndarray, comparator: np.ndarray, threshold: np.ndarray, action: np.ndarray) -> 'CompiledTriggers':
+        """Rebuild from stored FIELDS arrays (see CompiledSchedule.to_bytes)."""
+        compiled = cls([])
+        compiled.metric = np.asarray(metric, dtype=np.int8)
+        compiled.comparator = np.asarray(comparator, dtype=np.int8)
+        compiled.threshold = np.asarray(threshold, dtype=float)
+        compiled.action = np.asarray(action, dtype=np.int8)
+        compiled.required = tuple(np.unique(compiled.metric).tolist())
+        return compiled
+
+    def __len__(self) -> int:
+        return len(self.metric)
+
+    def evaluate(
+        self, sim_SOC: np.ndarray, sim_V_term: np.ndarray, v_module: float,
+        dt: float, I_cells: np.ndarray, I_pack: float, capacity_Ah: float,
+        per_day_time: float, n_series: int
+    ) -> Optional[str]:
+        """
+        Highest-precedence action level fired this step, or None. The internal
+        time_elapsed day trigger (per_day_time + dt >= 86400s) takes precedence.
+        """
+        if dt > 0 and per_day_time + dt >= 86400.0:
+            return 'day'
+        if not len(self.metric):
+            return None
+        n_p_avg = len(I_cells) / n_series if n_series > 0 else 1
+        values = compute_trigger_metrics(
+            self.required, sim_SOC, sim_V_term, v_module, dt, I_cells, I_pack,
+            capacity_Ah, per_day_time, n_p_avg
+        )[self.metric]
+        fired = np.where(
+            self.comparator == CMP_HIGH, values > self.threshold,
+            np.where(self.comparator == CMP_LOW, values < self.threshold, values >= self.threshold)
+        )
+        if not fired.any():
+            return None
+        return ACTION_LEVELS[int(self.action[fired].max())]
 
 
 def check_hard_cutoffs(
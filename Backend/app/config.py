@@ -5,12 +5,34 @@ import os
 from dotenv import load_dotenv
 from pathlib import Path
 from app.utils.storage import StorageManager
+from app.utils.solver_pool import SolverPool
+from app.utils.job_queue import SimulationQueue
+from app.utils.result_stream import LiveResultHub
+from app.utils.result_query import ResultQueryEngine
+import socket
 
 load_dotenv()
 
 MONGO_URL = os.getenv("MONGO_URL")
 STORAGE_TYPE = os.getenv("STORAGE_TYPE", "local")
 STORAGE_ROOT = os.getenv("STORAGE_ROOT", "storage")
+# Solver worker processes (default: one per CPU) and the size (cells x estimated solver
+# timesteps) up to which simulations are micro-batched onto one worker
+SOLVER_POOL_WORKERS = int(os.getenv("SOLVER_POOL_WORKERS", "0")) or None
+SOLVER_SMALL_JOB_SIZE = int(os.getenv("SOLVER_SMALL_JOB_SIZE", "50000"))
+# Most recent timesteps of a running simulation kept in shared memory for live reads (0: off)
+RESULT_RING_STEPS = int(os.getenv("RESULT_RING_STEPS", "16384"))
+# Simulations this node runs at once (default: one per solver worker); the rest wait queued
+MAX_CONCURRENT_SIMULATIONS = int(os.getenv("MAX_CONCURRENT_SIMULATIONS", "0")) or SOLVER_POOL_WORKERS or os.cpu_count() or 1
+NODE_ID = os.getenv("NODE_ID", socket.gethostname())
+# Seconds without a heartbeat after which another node takes over (requeues or closes) a claimed job
+SIMULATION_LEASE_S = float(os.getenv("SIMULATION_LEASE_S", "60"))
+# Seconds between live progress writes of a running simulation
+PROGRESS_UPDATE_INTERVAL_S = float(os.getenv("PROGRESS_UPDATE_INTERVAL_S", "5"))
+# Seconds between polls of a streamed simulation's results file and status
+LIVE_STREAM_INTERVAL_S = float(os.getenv("LIVE_STREAM_INTERVAL_S", "1"))
+# Results files kept indexed for /data queries (per-cell series, least recently used evicted)
+RESULT_INDEX_ENTRIES = int(os.getenv("RESULT_INDEX_ENTRIES", "8"))
 
 # Centralized storage paths (relative paths)
 SIMULATIONS_DIR = "simulations"
@@ -22,6 +44,15 @@ SUBCYCLES_DIR = "subcycles"
 # Global storage manager instance
 storage_manager = StorageManager()
 
+# Global /data query engine
+result_index = ResultQueryEngine(storage_manager, RESULT_INDEX_ENTRIES)
+
+# Global solver worker pool (started with the app)
+solver_pool = SolverPool(SOLVER_POOL_WORKERS, SOLVER_SMALL_JOB_SIZE, ring_steps=RESULT_RING_STEPS)
+
+# Global simulation job queue (dispatching starts with the app)
+simulation_queue = SimulationQueue(MAX_CONCURRENT_SIMULATIONS, NODE_ID, lease_s=SIMULATION_LEASE_S)
+
 client = AsyncIOMotorClient(
     MONGO_URL,
     tls=True,
@@ -29,4 +60,7 @@ client = AsyncIOMotorClient(
     serverSelectionTimeoutMS=20000
 )
 db = client["Battery_sim_DB"]
-print("MongoDB connected successfully")
\ No newline at end of file
+print("MongoDB connected successfully")
+
+# Global live results stream (one result ring reader or file tail per streamed simulation)
+live_results = LiveResultHub(storage_manager, db.simulations, LIVE_STREAM_INTERVAL_S, rings=solver_pool.ring)
\ No newline at end of file
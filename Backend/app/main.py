@@ -3,7 +3,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import cells, packs, simulations, continuation
 from app.routers.drive_cycle import subcycles, manager, simulationcycles
-from app.config import client, db, storage_manager
+from app.config import client, db, storage_manager, solver_pool, simulation_queue
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from datetime import datetime, timedelta
 from fastapi.staticfiles import StaticFiles
@@ -51,12 +51,16 @@ async def cleanup_deleted():
 async def startup_event():
     scheduler.add_job(cleanup_deleted, 'interval', days=1)
     scheduler.start()
+    await solver_pool.start()
+    await simulation_queue.start(db.simulations, simulations.run_queued_simulation, solver_pool.request)
     print("API started successfully")
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await simulation_queue.shutdown()
     client.close()
     scheduler.shutdown()
+    solver_pool.shutdown()
     print("Application shutdown complete")
 
 # Include routers
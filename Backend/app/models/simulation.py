@@ -4,6 +4,7 @@ from datetime import datetime
 from enum import Enum
 class SimulationStatus(str, Enum):
     PENDING = "pending"
+    QUEUED = "queued"
     RUNNING = "running"
     PAUSED = "paused"
     COMPLETED = "completed"
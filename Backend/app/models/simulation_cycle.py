@@ -13,6 +13,8 @@ class SimulationCycleBase(BaseModel):
     drive_cycles_metadata: List[DriveCycleDefinition] = Field(default=[], description="Full definitions of composite drive cycles with composition")
     calendar_assignments: List[CalendarRule] = Field(default=[], description="List of Calendar Rules")
     simulation_table_path: Optional[str] = Field(default=None, description="Relative path to generated CSV file")
+    compiled_schedule_path: Optional[str] = Field(default=None, description="Relative path to the compiled schedule of the generated CSV")
+    simulation_days: int = Field(default=364, ge=1, description="Horizon in days; calendar rules repeat every 364 days")
  
     # Metadata for frontend simulation logic
     total_days: int = Field(default=0)
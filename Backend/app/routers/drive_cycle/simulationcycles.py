@@ -2,7 +2,12 @@ from fastapi import APIRouter, HTTPException
 from datetime import datetime
 from typing import Dict
 from app.config import db, storage_manager,DRIVE_CYCLES_DIR
-from app.utils.simulation_generator import generate_simulation_cycle, generate_simulation_csv
+from app.utils.simulation_generator import (
+    generate_day_templates, render_simulation_csv, compile_simulation_schedule, reusable_day_templates
+)
+from app.utils.file_utils import load_schedule_artifact
+from CoreLogic.schedule import schedule_artifact_path, table_fingerprint
+from CoreLogic.day_calendar import DAYS_PER_YEAR
 from fastapi.responses import StreamingResponse
 
 router = APIRouter(
@@ -12,9 +17,13 @@ router = APIRouter(
 
 
 @router.post("/{sim_id}/generate", response_model=Dict)
-async def generate_simulation_table(sim_id: str):
+async def generate_simulation_table(sim_id: str, full: bool = False):
     """
-    Generates full simulation cycle CSV and saves it.
+    Generates full simulation cycle CSV and saves it, with its compiled schedule alongside.
+    Days whose drive cycle and subcycles are unchanged since the last generation (same
+    fingerprint) are taken from the stored schedule; full=true regenerates every day.
+    Horizons over one year (DAYS_PER_YEAR) only get the compiled schedule: their table
+    would hold days × steps rows, and /run solves from the schedule without it.
     """
     try:
         sim = await db.simulation_cycles.find_one({"_id": sim_id, "deleted_at": None})
@@ -23,47 +32,76 @@ async def generate_simulation_table(sim_id: str):
 
         print(f"Starting generation for simulation: {sim_id}")
 
-        # Generate cycle and CSV
-        simulation_cycle = await generate_simulation_cycle(sim, db)
-        csv_content = await generate_simulation_csv(sim, db)
-
-        print(f"Generated {len(simulation_cycle)} days with total {sum(len(d['steps']) for d in simulation_cycle)} steps")
-        print(f"CSV content size: {len(csv_content)} characters")
+        # Day templates of the previous generation, by fingerprint
+        reusable = {}
+        if not full:
+            previous = await load_schedule_artifact(sim.get("compiled_schedule_path"))
+            reusable = reusable_day_templates(previous)
 
-        rel_path = f"{DRIVE_CYCLES_DIR}/{sim_id}.csv"
-        
-        # Save to storage
-        await storage_manager.save_file(rel_path, csv_content, is_text=True)
-        
-        # Verify file was saved
-        if not await storage_manager.exists(rel_path):
-            raise Exception(f"File was not saved successfully to {rel_path}")
-        
-        print(f"File saved successfully to: {rel_path}")
-        
-        # Store path in DB with /uploads/ prefix for URL access
-        saved_path = f"/uploads/{rel_path}"
+        # Generate day templates once; the CSV and the compiled schedule are both built from them
+        templates, calendar = await generate_day_templates(sim, db, reusable)
+        regenerated = [dc_id for dc_id, t in templates.items() if "steps" in t]
 
         # Calculate total steps
-        total_steps = sum(len(day["steps"]) for day in simulation_cycle)
+        total_steps = sum(len(templates[day["drivecycleId"]]["rows"]) for day in calendar)
+        print(f"Generated {len(calendar)} days with total {total_steps} steps")
+
+        rel_path = f"{DRIVE_CYCLES_DIR}/{sim_id}.csv"
+        csv_content = None
+        saved_path = None
+        if len(calendar) <= DAYS_PER_YEAR:
+            csv_content = render_simulation_csv(templates, calendar)
+            print(f"CSV content size: {len(csv_content)} characters")
+            
+            # Save to storage
+            await storage_manager.save_file(rel_path, csv_content, is_text=True)
+            
+            # Verify file was saved
+            if not await storage_manager.exists(rel_path):
+                raise Exception(f"File was not saved successfully to {rel_path}")
+            
+            print(f"File saved successfully to: {rel_path}")
+            
+            # Store path in DB with /uploads/ prefix for URL access
+            saved_path = f"/uploads/{rel_path}"
+        else:
+            print(f"Horizon of {len(calendar)} days: storing the compiled schedule only, no simulation table CSV")
+            # A table from an earlier, shorter horizon no longer matches the schedule
+            if await storage_manager.exists(rel_path):
+                await storage_manager.delete_file(rel_path)
+
+        # Compiled schedule next to the CSV, so /run and resume skip parsing it
+        schedule_rel_path = schedule_artifact_path(rel_path)
+        schedule_bytes = compile_simulation_schedule(
+            templates, calendar, table_fingerprint(csv_content) if csv_content is not None else None
+        )
+        await storage_manager.save_file(schedule_rel_path, schedule_bytes, is_text=False)
+        print(f"Compiled schedule saved to: {schedule_rel_path} ({len(schedule_bytes)} bytes)")
 
         # Update DB
-        await db.simulation_cycles.update_one(
-            {"_id": sim_id, "deleted_at": None},
-            {
-                "$set": {
-                    "simulation_table_path": saved_path,
-                    "updated_at": datetime.utcnow()
-                }
+        update = {
+            "$set": {
+                "compiled_schedule_path": schedule_rel_path,
+                "updated_at": datetime.utcnow()
             }
-        )
+        }
+        if saved_path:
+            update["$set"]["simulation_table_path"] = saved_path
+        else:
+            update["$unset"] = {"simulation_table_path": ""}
+        await db.simulation_cycles.update_one({"_id": sim_id, "deleted_at": None}, update)
 
         return {
             "message": "Simulation cycle generated and saved successfully",
             "path": saved_path,
-            "total_days": len(simulation_cycle),
+            "table_omitted": csv_content is None,
+            "total_days": len(calendar),
+            "total_templates": len(templates),
+            "regenerated_templates": len(regenerated),
+            "regenerated_days": sum(1 for day in calendar if day["drivecycleId"] in regenerated),
             "total_steps": total_steps,
-            "file_size_bytes": len(csv_content.encode('utf-8'))
+            "file_size_bytes": len(csv_content.encode('utf-8')) if csv_content is not None else 0,
+            "schedule_size_bytes": len(schedule_bytes)
         }
 
     except ValueError as ve:
@@ -88,6 +126,11 @@ async def get_simulation_cycle_table(sim_id: str):
 
         simulation_table_path = sim.get("simulation_table_path")
         if not simulation_table_path:
+            if sim.get("compiled_schedule_path"):
+                raise HTTPException(
+                    400,
+                    "No simulation table is stored for horizons over one year; simulations run from the compiled schedule"
+                )
             raise HTTPException(
                 400, 
                 "No simulation table generated yet. Generate it first using POST /{sim_id}/generate"
@@ -144,24 +187,26 @@ async def delete_simulation_table(sim_id: str):
             raise HTTPException(404, "Simulation not found")
 
         simulation_table_path = sim.get("simulation_table_path")
-        if not simulation_table_path:
+        # Horizons over one year store only the compiled schedule
+        if not simulation_table_path and not sim.get("compiled_schedule_path"):
             return {"message": "No simulation table to delete"}
 
         # Extract relative path
-        if simulation_table_path.startswith('/uploads/'):
+        if simulation_table_path and simulation_table_path.startswith('/uploads/'):
             rel_path = simulation_table_path[len('/uploads/'):]
         else:
             rel_path = simulation_table_path
         
-        # Delete file if it exists
-        if await storage_manager.exists(rel_path):
-            await storage_manager.delete_file(rel_path)
+        # Delete file (and its compiled schedule) if it exists
+        for path in (rel_path, sim.get("compiled_schedule_path")):
+            if path and await storage_manager.exists(path):
+                await storage_manager.delete_file(path)
 
         # Update database to clear the path
         await db.simulation_cycles.update_one(
             {"_id": sim_id, "deleted_at": None},
             {
-                "$unset": {"simulation_table_path": ""},
+                "$unset": {"simulation_table_path": "", "compiled_schedule_path": ""},
                 "$set": {"updated_at": datetime.utcnow()}
             }
         )
@@ -2,15 +2,16 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
 from bson import ObjectId
 import io
 import os
-from app.config import db, storage_manager, SIMULATIONS_DIR, DRIVE_CYCLES_DIR
+from app.config import db, storage_manager, solver_pool, simulation_queue, live_results, result_index, SIMULATIONS_DIR, DRIVE_CYCLES_DIR, PROGRESS_UPDATE_INTERVAL_S
 from CoreLogic import NEW_data_processor as adp
 from CoreLogic import NEW_electrical_solver as aes
+from CoreLogic.logging_policy import validate_logging_config
+from CoreLogic.schedule import prepend_idle_row, table_fingerprint
 import asyncio
-import concurrent.futures
 from app.models.simulation import InitialConditions, SimulationStatus
 from fastapi.responses import StreamingResponse
 import io
@@ -19,6 +20,13 @@ import tempfile
 from typing import Optional
 from io import StringIO
 from app.utils.zip_utils import load_continuation_zip
+from app.utils.file_utils import load_schedule_artifact
+from app.utils.job_queue import PRIORITIES
+from app.utils.result_query import select_series
+from app.utils.result_stream import data_points as result_points, summarize_results
+
+# Seconds to wait for the solver to acknowledge a stop/pause request before giving up on it
+CONTROL_ACK_TIMEOUT_S = 60
 router = APIRouter(tags=["simulations"])
 
 async def inject_cell_config(pack_config: dict) -> dict:
@@ -120,26 +128,125 @@ def _normalize_pack_for_core(pack: dict, initial_conditions: dict = None) -> dic
         },
     }
 
+async def load_drive_schedule(sim: dict):
+    """Full drive schedule of a simulation document: its compiled schedule, else the stored CSV with the idle row."""
+    schedule = await load_schedule_artifact(sim.get("compiled_schedule_path"))
+    if schedule is not None:
+        return schedule
+    drive_rel = f"{DRIVE_CYCLES_DIR}/{sim.get('drive_cycle_file')}"
+    if not await storage_manager.exists(drive_rel):
+        raise ValueError(f"Drive cycle file not found: {drive_rel}")
+    drive_bytes = await storage_manager.load_file(drive_rel)
+    return prepend_idle_row(pd.read_csv(io.StringIO(drive_bytes.decode('utf-8'))))
+
+async def run_queued_simulation(sim: dict, payload: Optional[dict] = None):
+    """
+    Queue runner: run a simulation claimed from the job queue. payload holds the
+    run_sim_background arguments prepared by /run or /resume on this node; after a
+    restart (or on another node) they are rebuilt from the job spec on the document.
+    """
+    if payload is None:
+        job = sim["job"]
+        drive_df_full = await load_drive_schedule(sim)
+        start_row = job.get("start_row", 0)
+        drive_df = drive_df_full
+        if job.get("kind") == "resume":
+            drive_df = drive_df_full.iloc[start_row:] if isinstance(drive_df_full, pd.DataFrame) else drive_df_full.from_row(start_row)
+        payload = dict(
+            pack_config=job["pack_config"],
+            drive_df=drive_df,
+            model_config=sim.get("model_config", {}),
+            sim_id=str(sim["_id"]),
+            sim_name=sim["metadata"].get("name", "Untitled Simulation"),
+            sim_type=sim["metadata"].get("type", "Generic"),
+            initial_conditions=sim["initial_conditions"],
+            drive_cycle_id=sim["drive_cycle_id"],
+            continuation_zip_data=job.get("continuation_zip_data"),
+            full_drive_df=drive_df_full,
+            original_start_row=start_row
+        )
+    await run_sim_background(**payload)
+
+def summary_from(start_soc: float, end_soc: float, max_qgen: float) -> dict:
+    """Run summary from the mean SOC at the first and last timestep and the peak cumulative heat."""
+    max_temp = round(max_qgen * 0.01 + 25, 2)
+    capacity_fade = round(abs((start_soc - end_soc) / start_soc * 100) if start_soc > 0 else 0, 2)
+    return {"end_soc": round(end_soc, 4), "max_temp": max_temp, "capacity_fade": capacity_fade}
+
 def compute_partial_summary(df: pd.DataFrame) -> dict:
     """FIXED: Use mean SOC at min/max time for pack-level summary."""
     if df.empty:
         return {"end_soc": 1.0, "max_temp": 25.0, "capacity_fade": 0.0}
     try:
-        if 'time_global_s' not in df.columns or 'SOC' not in df.columns:
-            return {"end_soc": 1.0, "max_temp": 25.0, "capacity_fade": 0.0}
-        start_time = df['time_global_s'].min()
-        end_time = df['time_global_s'].max()
-        start_df = df[df['time_global_s'] == start_time]
-        end_df = df[df['time_global_s'] == end_time]
-        start_soc = start_df['SOC'].mean()
-        end_soc = end_df['SOC'].mean()
-        max_qgen = float(df["Qgen_cumulative"].max()) if "Qgen_cumulative" in df.columns else 0
-        max_temp = round(max_qgen * 0.01 + 25, 2)
-        capacity_fade = round(abs((start_soc - end_soc) / start_soc * 100) if start_soc > 0 else 0, 2)
-        return {"end_soc": round(end_soc, 4), "max_temp": max_temp, "capacity_fade": capacity_fade}
+        if aes.is_wide_layout(df.columns):
+            # Wide layout: one row per timestep, per-cell values in 'SOC[i]' blocks
+            cell_ids = aes.wide_cell_ids(df.columns)
+            soc_block = df[[aes.wide_cell_column('SOC', c) for c in cell_ids]]
+            qgen_cols = [aes.wide_cell_column('Qgen_cumulative', c) for c in cell_ids]
+            start_row = df['time_global_s'].idxmin()
+            end_row = df['time_global_s'].idxmax()
+            start_soc = soc_block.loc[start_row].mean()
+            end_soc = soc_block.loc[end_row].mean()
+            max_qgen = float(df[qgen_cols].to_numpy().max()) if qgen_cols[0] in df.columns else 0
+        else:
+            if 'time_global_s' not in df.columns or 'SOC' not in df.columns:
+                return {"end_soc": 1.0, "max_temp": 25.0, "capacity_fade": 0.0}
+            start_time = df['time_global_s'].min()
+            end_time = df['time_global_s'].max()
+            start_df = df[df['time_global_s'] == start_time]
+            end_df = df[df['time_global_s'] == end_time]
+            start_soc = start_df['SOC'].mean()
+            end_soc = end_df['SOC'].mean()
+            max_qgen = float(df["Qgen_cumulative"].max()) if "Qgen_cumulative" in df.columns else 0
+        return summary_from(start_soc, end_soc, max_qgen)
     except Exception:
         return {"end_soc": 1.0, "max_temp": 25.0, "capacity_fade": 0.0}
 
+async def compute_results_summary(csv_rel_path: str) -> dict:
+    """compute_partial_summary() of a results file, computed in one streaming pass over it."""
+    summary = await summarize_results(storage_manager, csv_rel_path)
+    if not summary.rows or not summary.complete:
+        return {"end_soc": 1.0, "max_temp": 25.0, "capacity_fade": 0.0}
+    return summary_from(summary.start_soc, summary.end_soc, summary.max_qgen or 0)
+
+async def report_progress(sim_id: str):
+    """
+    Every PROGRESS_UPDATE_INTERVAL_S, write the progress the solver publishes through its
+    control slot to metadata.progress and metadata.live, until cancelled.
+    """
+    last = None
+    while True:
+        await asyncio.sleep(PROGRESS_UPDATE_INTERVAL_S)
+        live = solver_pool.progress(sim_id)
+        if live is None:
+            continue
+        # steps_per_s is the run average; the rate since the last write shows slowdowns
+        recent_steps_per_s = live["steps_per_s"]
+        if last is not None and live["elapsed_s"] > last["elapsed_s"]:
+            recent_steps_per_s = (live["steps"] - last["steps"]) / (live["elapsed_s"] - last["elapsed_s"])
+        last = live
+        now = datetime.utcnow()
+        try:
+            await db.simulations.update_one(
+                {"_id": ObjectId(sim_id)},
+                {"$set": {
+                    "metadata.progress": round(live["progress"], 2),
+                    "metadata.live": {
+                        "t_sim_s": round(live["t_sim_s"], 1),
+                        "row": live["row"],
+                        "n_rows": live["n_rows"],
+                        "steps": live["steps"],
+                        "steps_per_s": round(live["steps_per_s"], 1),
+                        "recent_steps_per_s": round(recent_steps_per_s, 1),
+                        "idle_s": round(live["idle_s"], 1),
+                        "eta": now + timedelta(seconds=live["eta_s"]) if live["eta_s"] is not None else None,
+                        "updated_at": now,
+                    },
+                }}
+            )
+        except Exception as e:
+            print(f"⚠️ Progress update failed for {sim_id}: {e}")
+
 async def run_sim_background(
     pack_config: dict,
     drive_df: pd.DataFrame, # Remaining DF (sliced)
@@ -168,13 +275,17 @@ async def run_sim_background(
         if continuation_zip_data:
             metadata, csv_str, last_row, existing_df = await load_continuation_zip(continuation_zip_data["zip_path"])
             if metadata:
+                # Wide results hold the whole last timestep in one row; restore from its long form
+                state_df = existing_df
+                if not existing_df.empty and aes.is_wide_layout(existing_df.columns):
+                    state_df = aes.wide_to_long(existing_df.tail(1))
                 # NEW: Validate continuation data
                 if not existing_df.empty:
                     last_time = existing_df['time_global_s'].max()
                     if 't_global' in metadata and metadata['t_global'] != last_time:
                         raise ValueError(f"t_global mismatch: metadata {metadata['t_global']} vs CSV {last_time}")
                   
-                    last_rows = existing_df[existing_df['time_global_s'] == last_time]
+                    last_rows = state_df[state_df['time_global_s'] == last_time]
                     if len(last_rows) != total_n_cells:
                         raise ValueError(f"Incomplete last timestep: {len(last_rows)} rows vs {total_n_cells} cells")
                   
@@ -183,15 +294,15 @@ async def run_sim_background(
                     if missing_cols:
                         raise ValueError(f"Missing columns in continuation CSV: {missing_cols}")
               
-                if not existing_df.empty and len(existing_df) >= total_n_cells:
-                    last_timestep_rows = existing_df.tail(total_n_cells)
+                if not state_df.empty and len(state_df) >= total_n_cells:
+                    last_timestep_rows = state_df.tail(total_n_cells)
                     continuation_history = {
                         'SOC': last_timestep_rows['SOC'].tolist(),
                         'V_RC1': last_timestep_rows['V_RC1'].tolist(),
                         'V_RC2': last_timestep_rows['V_RC2'].tolist(),
                         'Vterm': last_timestep_rows['Vterm'].tolist(),
                         'Qgen_cumulative': last_timestep_rows['Qgen_cumulative'].tolist(),
-                        'energy_throughput': last_timestep_rows['energy_throughput'].tolist() if 'energy_throughput' in existing_df.columns else [0.0] * total_n_cells,
+                        'energy_throughput': last_timestep_rows['energy_throughput'].tolist() if 'energy_throughput' in state_df.columns else [0.0] * total_n_cells,
                         't_global': float(existing_df['time_global_s'].max()),
                     }
                 # FIXED: Restore partial CSV before solver (prevents overwrite)
@@ -210,80 +321,101 @@ async def run_sim_background(
         # Touch equivalent (create empty file)
         await storage_manager.save_file(csv_rel_path, b"", is_text=False)
     
+        running_update = {"file_csv": csv_rel_path, "updated_at": datetime.utcnow()}
+        if model_config.get("step_metadata") == "dictionary":
+            running_update["file_steps_csv"] = aes.step_table_path(csv_rel_path)
         await db.simulations.update_one(
             {"_id": ObjectId(sim_id)},
-            {"$set": {"status": "running", "file_csv": csv_rel_path, "updated_at": datetime.utcnow()}}
+            {"$set": running_update}
+        )
+        # A stop/pause requested while the job was starting keeps its stopping/pausing status
+        await db.simulations.update_one(
+            {"_id": ObjectId(sim_id), "status": {"$nin": ["stopping", "pausing"]}},
+            {"$set": {"status": "running"}}
         )
     
         normalized_pack = _normalize_pack_for_core(pack_config, initial_conditions)
         setup = adp.create_setup_from_configs(normalized_pack, drive_df, model_config)
         
-        loop = asyncio.get_running_loop()
-        
         # ✅ NEW: Determine CSV path based on storage type
-        if storage_manager.storage_type == "local":
-            # For local storage: solver writes directly to storage directory
-            csv_full_path = str(storage_manager.root / csv_rel_path)
-            print(f"📁 Local storage: solver writing directly to {csv_full_path}")
+        progress_task = asyncio.create_task(report_progress(sim_id))
+        try:
+            if storage_manager.storage_type == "local":
+                # For local storage: solver writes directly to storage directory
+                csv_full_path = str(storage_manager.root / csv_rel_path)
+                print(f"📁 Local storage: solver writing directly to {csv_full_path}")
             
-            with concurrent.futures.ProcessPoolExecutor() as executor:
-                await loop.run_in_executor(
-                    executor,
-                    aes.run_electrical_solver,
+                solver_status = await solver_pool.run_solver(
                     setup, drive_df, sim_id, csv_full_path, initial_conditions.get("continuation_history"),
                     full_df_for_pause, orig_start_row_for_pause, pack_id, drive_cycle_id
                 )
-        else:
-            # For cloud storage: solver writes to temp, we sync periodically
-            temp_csv_path = os.path.join(tempfile.gettempdir(), f"{sim_id}.csv")
-            print(f"☁️ Cloud storage: solver writing to temp, syncing to {csv_rel_path}")
+            else:
+                # For cloud storage: solver writes to temp, we sync periodically
+                temp_csv_path = os.path.join(tempfile.gettempdir(), f"{sim_id}.csv")
+                print(f"☁️ Cloud storage: solver writing to temp, syncing to {csv_rel_path}")
+                # Step metadata side table first, so synced results always resolve their step_key
+                sync_pairs = [
+                    (aes.step_table_path(temp_csv_path), aes.step_table_path(csv_rel_path)),
+                    (temp_csv_path, csv_rel_path),
+                ]
             
-            sync_running = True
+                sync_running = True
             
-            async def sync_task():
-                """Background task to sync temp file to cloud storage every 5 seconds"""
-                while sync_running:
-                    await asyncio.sleep(5)
-                    if os.path.exists(temp_csv_path) and os.path.getsize(temp_csv_path) > 0:
-                        try:
-                            with open(temp_csv_path, 'r') as f:
-                                content = f.read()
-                            await storage_manager.save_file(csv_rel_path, content, is_text=True)
-                            print(f"🔄 Synced {os.path.getsize(temp_csv_path)} bytes to cloud")
-                        except Exception as e:
-                            print(f"⚠️ Sync error: {e}")
+                async def sync_task():
+                    """Background task to sync temp files to cloud storage every 5 seconds"""
+                    while sync_running:
+                        await asyncio.sleep(5)
+                        for temp_path, rel_path in sync_pairs:
+                            if os.path.exists(temp_path) and os.path.getsize(temp_path) > 0:
+                                try:
+                                    with open(temp_path, 'r') as f:
+                                        content = f.read()
+                                    await storage_manager.save_file(rel_path, content, is_text=True)
+                                    print(f"🔄 Synced {os.path.getsize(temp_path)} bytes to cloud")
+                                except Exception as e:
+                                    print(f"⚠️ Sync error: {e}")
             
-            task = asyncio.create_task(sync_task())
+                task = asyncio.create_task(sync_task())
             
-            try:
-                with concurrent.futures.ProcessPoolExecutor() as executor:
-                    await loop.run_in_executor(
-                        executor,
-                        aes.run_electrical_solver,
+                try:
+                    solver_status = await solver_pool.run_solver(
                         setup, drive_df, sim_id, temp_csv_path, initial_conditions.get("continuation_history"),
                         full_df_for_pause, orig_start_row_for_pause, pack_id, drive_cycle_id
                     )
-            finally:
-                # Stop sync task
-                sync_running = False
-                try:
-                    task.cancel()
-                    await task
-                except asyncio.CancelledError:
-                    pass
+                finally:
+                    # Stop sync task
+                    sync_running = False
+                    try:
+                        task.cancel()
+                        await task
+                    except asyncio.CancelledError:
+                        pass
                 
-                # Final sync
-                if os.path.exists(temp_csv_path):
-                    with open(temp_csv_path, 'r') as f:
-                        content = f.read()
-                    await storage_manager.save_file(csv_rel_path, content, is_text=True)
-                    print(f"✅ Final sync: {len(content)} bytes to cloud")
-                    os.unlink(temp_csv_path)
+                    # Final sync
+                    for temp_path, rel_path in sync_pairs:
+                        if os.path.exists(temp_path):
+                            with open(temp_path, 'r') as f:
+                                content = f.read()
+                            await storage_manager.save_file(rel_path, content, is_text=True)
+                            print(f"✅ Final sync: {len(content)} bytes to cloud")
+                            os.unlink(temp_path)
+        finally:
+            progress_task.cancel()
+            try:
+                await progress_task
+            except asyncio.CancelledError:
+                pass
     
-        # FIXED: Reload full CSV (handles append)
-        csv_bytes = await storage_manager.load_file(csv_rel_path)
-        full_csv_df = pd.read_csv(io.StringIO(csv_bytes.decode('utf-8')))
-        summary = compute_partial_summary(full_csv_df)
+        # Pause/stop acknowledged by the solver: finalize right away
+        if solver_status == 'paused':
+            await finalize_paused_simulation(sim_id)
+            return
+        if solver_status == 'stopped by user':
+            await finalize_stopped_simulation(sim_id)
+            return
+        
+        # FIXED: Summarize the full CSV (handles append) in one pass, without loading it
+        summary = await compute_results_summary(csv_rel_path)
         await db.simulations.update_one(
             {"_id": ObjectId(sim_id)},
             {"$set": {
@@ -309,7 +441,7 @@ async def run_sim_background(
 
 
 @router.post("/run", status_code=202)
-async def run_simulation(request: dict, background_tasks: BackgroundTasks):
+async def run_simulation(request: dict):
     pack_config = request.get("packConfig")
     model_config = request.get("modelConfig", {})
     sim_name = request.get("name", "Untitled Simulation")
@@ -317,6 +449,9 @@ async def run_simulation(request: dict, background_tasks: BackgroundTasks):
     continuation_zip_data = request.get("continuation_zip_data", None)
     if not pack_config:
         raise HTTPException(status_code=400, detail="Missing 'packConfig' in request body")
+    priority = request.get("priority", "interactive")
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Invalid priority: {priority}. Use one of {list(PRIORITIES)}")
     default_initial = {
         "temperature": 298.15,
         "soc": 0.8,
@@ -330,43 +465,72 @@ async def run_simulation(request: dict, background_tasks: BackgroundTasks):
         InitialConditions(**initial_conditions)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid initial_conditions: {str(e)}")
+    step_metadata = model_config.get("step_metadata", "inline")
+    if step_metadata not in aes.STEP_METADATA_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid step_metadata: {step_metadata}. Use one of {list(aes.STEP_METADATA_MODES)}")
+    result_layout = model_config.get("result_layout", "long")
+    if result_layout not in aes.RESULT_LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"Invalid result_layout: {result_layout}. Use one of {list(aes.RESULT_LAYOUTS)}")
+    timestep_mode = model_config.get("timestep_mode", "fixed")
+    if timestep_mode not in aes.TIMESTEP_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid timestep_mode: {timestep_mode}. Use one of {list(aes.TIMESTEP_MODES)}")
+    try:
+        validate_logging_config(model_config.get("logging"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     driveCycleCsv = request.get("driveCycleCsv")
-    if not driveCycleCsv:
-        raise HTTPException(status_code=400, detail="Missing 'driveCycleCsv' in request body")
     drive_cycle_source = request.get("driveCycleSource", {})
     drive_cycle_name = drive_cycle_source.get("name", "Unknown Drive Cycle")
     drive_cycle_id = drive_cycle_source.get("id", "unknown") if drive_cycle_source.get("type") == "database" else drive_cycle_source.get("filename", "unknown.csv")
     drive_cycle_file = f"{drive_cycle_name}.csv" if drive_cycle_source.get("type") == "database" else drive_cycle_source.get("filename", "unknown.csv")
-    try:
-        drive_df_original = pd.read_csv(StringIO(driveCycleCsv))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Invalid driveCycleCsv format: {str(e)}")
-  
-    # Save original drive cycle to storage (without idle row)
-    local_drive_rel = f"{DRIVE_CYCLES_DIR}/{drive_cycle_file}"
-    drive_buffer = io.StringIO()
-    drive_df_original.to_csv(drive_buffer, index=False)
-    await storage_manager.save_file(local_drive_rel, drive_buffer.getvalue(), is_text=True)
-    print(f"Saved drive cycle to storage: {local_drive_rel}")
-  
     required = ["Global Step Index", "Day_of_year", "DriveCycle_ID", "Value Type", "Value", "Unit", "Step Type", "Step Duration (s)", "Timestep (s)"]
-    missing = [c for c in required if c not in drive_df_original.columns]
-    if missing:
-        raise HTTPException(status_code=400, detail=f"driveCycleCsv missing required columns: {missing}")
-    idle_row = pd.DataFrame([{
-        'Global Step Index': 0, 'Day_of_year': 1, 'DriveCycle_ID': 'idle_init',
-        'Value Type': 'current', 'Value': 0.0, 'Unit': 'A',
-        'Step Type': 'fixed', 'Step Duration (s)': 0.1, 'Timestep (s)': 0.01,
-        'Subcycle_ID': 'idle', 'Subcycle Step Index': 0,
-        'Label': 'Idle Init', 'Ambient Temp (°C)': 20.0, 'Location': '',
-        'drive cycle trigger': '', 'step Trigger(s)': ''
-    }])
-    drive_df = pd.concat([idle_row, drive_df_original], ignore_index=True)
-    print(f"Prepended idle step; new DF shape: {drive_df.shape}")
+    if driveCycleCsv:
+        # Validate whatever table was sent, even when the compiled schedule ends up being used
+        try:
+            columns = pd.read_csv(StringIO(driveCycleCsv), nrows=0).columns
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid driveCycleCsv format: {str(e)}")
+        missing = [c for c in required if c not in columns]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"driveCycleCsv missing required columns: {missing}")
+    # Generated simulation tables come with a compiled schedule: solve from it without parsing the CSV
+    compiled_schedule_path = None
+    drive_df = None
+    if drive_cycle_source.get("type") == "database":
+        sim_cycle = await db.simulation_cycles.find_one({"_id": drive_cycle_id, "deleted_at": None})
+        compiled_schedule_path = (sim_cycle or {}).get("compiled_schedule_path")
+        drive_df = await load_schedule_artifact(compiled_schedule_path)
+        # A stale artifact or an edited table: solve the table that was sent
+        if drive_df is not None and driveCycleCsv and drive_df.table_fingerprint != table_fingerprint(driveCycleCsv):
+            print(f"⚠️ Compiled schedule {compiled_schedule_path} does not match the submitted driveCycleCsv; parsing the CSV instead")
+            drive_df = None
+    local_drive_rel = f"{DRIVE_CYCLES_DIR}/{drive_cycle_file}"
+    if drive_df is not None:
+        # No table is sent for generated cycles over one year: /generate stores only their schedule
+        if driveCycleCsv:
+            await storage_manager.save_file(local_drive_rel, driveCycleCsv, is_text=True)
+            print(f"Saved drive cycle to storage: {local_drive_rel}")
+    else:
+        compiled_schedule_path = None
+        if not driveCycleCsv:
+            raise HTTPException(status_code=400, detail="Missing 'driveCycleCsv' in request body")
+        try:
+            drive_df_original = pd.read_csv(StringIO(driveCycleCsv))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid driveCycleCsv format: {str(e)}")
+      
+        # Save original drive cycle to storage (without idle row)
+        drive_buffer = io.StringIO()
+        drive_df_original.to_csv(drive_buffer, index=False)
+        await storage_manager.save_file(local_drive_rel, drive_buffer.getvalue(), is_text=True)
+        print(f"Saved drive cycle to storage: {local_drive_rel}")
+      
+        drive_df = prepend_idle_row(drive_df_original)
+        print(f"Prepended idle step; new DF shape: {drive_df.shape}")
     pack_id = str(pack_config.get("_id") or pack_config.get("id", "unknown"))
     pack_name = pack_config.get("name", "Unknown Pack")
     sim_doc = {
-        "status": SimulationStatus.PENDING if not continuation_zip_data else SimulationStatus.RUNNING,
+        "status": SimulationStatus.QUEUED,
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
         "pack_id": pack_id,
@@ -375,6 +539,8 @@ async def run_simulation(request: dict, background_tasks: BackgroundTasks):
         "drive_cycle_name": drive_cycle_name,
         "drive_cycle_file": drive_cycle_file,
         "initial_conditions": initial_conditions,
+        "model_config": {k: v for k, v in model_config.items() if k != "initial_conditions"},
+        "compiled_schedule_path": compiled_schedule_path,
         "metadata": {
             "name": sim_name,
             "type": sim_type,
@@ -391,37 +557,41 @@ async def run_simulation(request: dict, background_tasks: BackgroundTasks):
         }
     result = await db.simulations.insert_one(sim_doc)
     sim_id = str(result.inserted_id)
-    background_tasks.add_task(
-        run_sim_background,
-        pack_config=pack_config,
-        drive_df=drive_df,
-        model_config=model_config,
-        sim_id=sim_id,
-        sim_name=sim_name,
-        sim_type=sim_type,
-        initial_conditions=initial_conditions,
-        drive_cycle_id=drive_cycle_id,
-        continuation_zip_data=continuation_zip_data,
-        full_drive_df=drive_df,
-        original_start_row=0 if not continuation_zip_data else continuation_zip_data.get("last_row", 0)
+    start_row = 0 if not continuation_zip_data else continuation_zip_data.get("last_row", 0)
+    await simulation_queue.enqueue(
+        sim_id,
+        {"kind": "run", "pack_config": pack_config, "continuation_zip_data": continuation_zip_data, "start_row": start_row},
+        priority,
+        payload=dict(
+            pack_config=pack_config,
+            drive_df=drive_df,
+            model_config=model_config,
+            sim_id=sim_id,
+            sim_name=sim_name,
+            sim_type=sim_type,
+            initial_conditions=initial_conditions,
+            drive_cycle_id=drive_cycle_id,
+            continuation_zip_data=continuation_zip_data,
+            full_drive_df=drive_df,
+            original_start_row=start_row
+        )
     )
-    return {"simulation_id": sim_id, "status": "started" if not continuation_zip_data else "resumed"}
+    queue = await simulation_queue.queue_info(await db.simulations.find_one({"_id": ObjectId(sim_id)}))
+    return {"simulation_id": sim_id, "status": SimulationStatus.QUEUED, "queue": queue}
 
 @router.post("/{sim_id}/stop")
 async def stop_simulation(sim_id: str, background_tasks: BackgroundTasks):
-    """Stop a running simulation using file-based signaling."""
+    """Stop a running simulation through its solver control channel."""
     if not ObjectId.is_valid(sim_id):
         raise HTTPException(status_code=400, detail="Invalid simulation ID")
     sim = await db.simulations.find_one({"_id": ObjectId(sim_id)})
     if not sim:
         raise HTTPException(status_code=404, detail="Simulation not found")
-    if sim.get("status") not in ["running", "pending"]:
+    if sim.get("status") == SimulationStatus.QUEUED and await simulation_queue.cancel(sim_id):
+        return {"simulation_id": sim_id, "status": "stopped", "message": "Removed from the queue before it started."}
+    if sim.get("status") not in ["running", "pending", "starting"]:
         raise HTTPException(status_code=400, detail="Simulation is not running")
-    # Create stop signal file
-    stop_signal_rel = f"{SIMULATIONS_DIR}/{sim_id}.stop"
-    await storage_manager.save_file(stop_signal_rel, b"", is_text=False)
-    print(f"🛑 Stop signal created: {stop_signal_rel}")
-    # Update DB status
+    # Update DB status before the solver can acknowledge
     await db.simulations.update_one(
         {"_id": ObjectId(sim_id)},
         {"$set": {
@@ -430,68 +600,90 @@ async def stop_simulation(sim_id: str, background_tasks: BackgroundTasks):
             "metadata.stop_requested_at": datetime.utcnow()
         }}
     )
-    # Background task to wait for solver completion and finalize
-    background_tasks.add_task(finalize_stopped_simulation, sim_id)
+    await simulation_queue.request_control(sim_id, "stop")
+    print(f"🛑 Stop requested: {sim_id}")
+    # The run finalizes as soon as the solver acknowledges; this only covers lost jobs
+    background_tasks.add_task(expire_control_request, sim_id, "stopping", "stopped")
     return {
         "simulation_id": sim_id,
         "status": "stopping",
-        "message": "Stop signal sent. Solver will save data and terminate shortly."
+        "message": "Stop requested. Solver will save data and terminate shortly."
     }
 
-async def finalize_stopped_simulation(sim_id: str):
+async def expire_control_request(sim_id: str, pending_status: str, final_status: str):
     """
-    Background task: Wait for solver to finish, then update status to 'stopped'.
-    Called after creating stop signal.
+    Fallback for a stop/pause request nobody acknowledged (e.g. the job's process died):
+    after CONTROL_ACK_TIMEOUT_S, a simulation still in pending_status gets final_status.
     """
-    max_wait = 60 # Wait up to 60 seconds
-    waited = 0
-    while waited < max_wait:
-        await asyncio.sleep(2)
-        waited += 2
-    
-        sim = await db.simulations.find_one({"_id": ObjectId(sim_id)})
-        if not sim:
-            return
+    await asyncio.sleep(CONTROL_ACK_TIMEOUT_S)
+    result = await db.simulations.update_one(
+        {"_id": ObjectId(sim_id), "status": pending_status},
+        {"$set": {"status": final_status, "updated_at": datetime.utcnow()}}
+    )
+    if result.modified_count:
+        print(f"⏱️ Timeout waiting for solver to acknowledge '{pending_status}' of {sim_id}")
+
+async def finalize_stopped_simulation(sim_id: str):
+    """Record a run the solver stopped on request: partial summary and 'stopped' status."""
+    sim = await db.simulations.find_one({"_id": ObjectId(sim_id)})
+    if not sim:
+        return
     
-        csv_rel_path = sim.get("file_csv")
-        stop_signal_rel = f"{SIMULATIONS_DIR}/{sim_id}.stop"
+    csv_rel_path = sim.get("file_csv")
+    # Compute partial summary
+    partial_summary = {}
+    if csv_rel_path and await storage_manager.exists(csv_rel_path):
+        try:
+            partial_summary = await compute_results_summary(csv_rel_path)
+        except Exception as e:
+            print(f"⚠️ Could not compute partial summary: {e}")
     
-        # Check if solver has removed stop signal (indicates completion)
-        if not await storage_manager.exists(stop_signal_rel):
-            print(f"✓ Stop signal removed by solver for {sim_id}")
-        
-            # Compute partial summary
-            partial_summary = {}
-            if csv_rel_path and await storage_manager.exists(csv_rel_path):
-                try:
-                    csv_bytes = await storage_manager.load_file(csv_rel_path)
-                    df = pd.read_csv(io.StringIO(csv_bytes.decode('utf-8')))
-                    partial_summary = compute_partial_summary(df)
-                except Exception as e:
-                    print(f"⚠️ Could not compute partial summary: {e}")
-        
-            # Update final status
-            await db.simulations.update_one(
-                {"_id": ObjectId(sim_id)},
-                {"$set": {
-                    "status": "stopped",
-                    "metadata.partial_summary": partial_summary,
-                    "metadata.stopped_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow()
-                }}
-            )
-        
-            print(f"🏁 Simulation {sim_id} finalized as 'stopped'")
-            return
-    # Timeout - force update status
-    print(f"⏱️ Timeout waiting for solver to stop {sim_id}")
+    # Update final status
     await db.simulations.update_one(
         {"_id": ObjectId(sim_id)},
         {"$set": {
             "status": "stopped",
+            "metadata.partial_summary": partial_summary,
+            "metadata.stopped_at": datetime.utcnow(),
             "updated_at": datetime.utcnow()
         }}
     )
+    print(f"🏁 Simulation {sim_id} finalized as 'stopped'")
+
+async def finalize_paused_simulation(sim_id: str):
+    """Record a run the solver paused on request, from the continuation ZIP it wrote."""
+    zip_path = os.path.join(SIMULATIONS_DIR, f"{sim_id}_pause.zip")
+    if os.path.exists(zip_path):
+        try:
+            metadata, _, last_row, existing_df = await load_continuation_zip(zip_path)
+            sim = await db.simulations.find_one({"_id": ObjectId(sim_id)})
+            if metadata and metadata.get("pack_id") == sim.get("pack_id") and metadata.get("dc_id") == sim.get("drive_cycle_id"):
+                partial_summary = compute_partial_summary(existing_df)
+                await db.simulations.update_one(
+                    {"_id": ObjectId(sim_id)},
+                    {"$set": {
+                        "status": "paused",
+                        "continuation_zip": zip_path,
+                        "last_executed_row": last_row,
+                        "metadata.partial_summary": partial_summary,
+                        "metadata.paused_at": datetime.utcnow(),
+                        "updated_at": datetime.utcnow()
+                    }}
+                )
+                print(f"⏸️ Simulation {sim_id} finalized as 'paused' with ZIP {zip_path}")
+                return
+            else:
+                print("❌ Pause ZIP metadata mismatch")
+                if os.path.exists(zip_path):
+                    os.remove(zip_path)
+        except Exception as e:
+            print(f"⚠️ Could not load pause ZIP: {e}")
+            if os.path.exists(zip_path):
+                os.remove(zip_path)
+    await db.simulations.update_one(
+        {"_id": ObjectId(sim_id)},
+        {"$set": {"status": "error", "error": "Pause failed: no valid ZIP created", "updated_at": datetime.utcnow()}}
+    )
 
 @router.get("/all")
 async def list_simulations():
@@ -511,6 +703,7 @@ async def list_simulations():
         "drive_cycle_name": s.get("drive_cycle_name"),
         "summary": s.get("metadata", {}).get("summary"),
         "progress": s.get("metadata", {}).get("progress", 0.0),
+        "live": s.get("metadata", {}).get("live"),
     } for s in sims]
 
 @router.get("/{sim_id}")
@@ -520,6 +713,11 @@ async def get_simulation_status(sim_id: str):
     sim = await db.simulations.find_one({"_id": ObjectId(sim_id)})
     if not sim:
         raise HTTPException(status_code=404, detail="Simulation not found")
+    # Queued jobs: position (0 = next to start), priority and estimated start
+    queue = await simulation_queue.queue_info(sim)
+    if queue:
+        sim["queue"] = queue
+    sim.pop("job", None)
     sim["simulation_id"] = str(sim["_id"])
     del sim["_id"]
     return sim
@@ -537,68 +735,57 @@ async def get_simulation_data(
     sim = await db.simulations.find_one({"_id": ObjectId(sim_id)})
     if not sim:
         raise HTTPException(status_code=404, detail="Simulation not found")
+    bounds = None
+    if time_range != "full":
+        try:
+            low, high = map(float, time_range.split("-"))
+            bounds = (low, high)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid time_range format. Use 'start-end' or 'full'")
+    # Running on this node with the range still in shared memory: no disk read
+    ring = solver_pool.ring(sim_id) if bounds is not None else None
+    window = ring.time_window() if ring is not None else None
+    if window is not None and bounds[0] < window[0]:
+        window = None
     csv_rel_path = sim.get("file_csv") or f"{SIMULATIONS_DIR}/{sim_id}.csv"
-    if not await storage_manager.exists(csv_rel_path):
+    if window is None and not await storage_manager.exists(csv_rel_path):
         raise HTTPException(status_code=202, detail="Data not ready yet")
     
     try:
-        csv_bytes = await storage_manager.load_file(csv_rel_path)
-        
-        # ✅ FIX: Handle empty CSV
-        csv_content = csv_bytes.decode('utf-8').strip()
-        if not csv_content or len(csv_content) < 10:  # Less than 10 chars = effectively empty
-            raise HTTPException(status_code=202, detail="Data not ready yet - simulation starting")
-        
-        df = pd.read_csv(io.StringIO(csv_content))
-        
-        # ✅ FIX: Handle CSV with only headers (no data rows)
-        if df.empty or len(df) == 0:
-            raise HTTPException(status_code=202, detail="Data not ready yet - no timesteps recorded")
-        
-        if 'cell_id' not in df.columns:
-            raise HTTPException(status_code=500, detail="CSV missing cell_id column")
+        if window is not None:
+            available_cells = list(range(ring.N_cells))
+            if cell_id not in available_cells:
+                cell_id = available_cells[0]
+            # Only the timesteps in bounds are copied; the reported range is the whole run's,
+            # as from the results file (none of it flushed yet: the ring still holds its start)
+            result = select_series(ring.series(cell_id, bounds), None, max_points)
+            t_start = await result_index.start_time(csv_rel_path) if await storage_manager.exists(csv_rel_path) else None
+            result.update({
+                "t_min": window[0] if t_start is None else min(t_start, window[0]),
+                "t_max": window[1],
+                "cell_id": cell_id,
+                "available_cells": available_cells,
+            })
+        else:
+            # Indexed per-cell series; only rows appended since the last query are parsed
+            result = await result_index.query(csv_rel_path, cell_id, bounds, max_points)
+            if result is None:
+                raise HTTPException(status_code=202, detail="Data not ready yet - no timesteps recorded")
         
-        # Rest of the function remains the same...
-        available_cells = sorted(df['cell_id'].unique())
-        if cell_id not in available_cells:
-            cell_id = available_cells[0]
-        cell_df = df[df['cell_id'] == cell_id].copy()
-        cell_df = cell_df.sort_values('time_global_s')
-        t_min, t_max = cell_df['time_global_s'].min(), cell_df['time_global_s'].max()
-        if time_range != "full":
-            try:
-                low, high = map(float, time_range.split("-"))
-                cell_df = cell_df[(cell_df['time_global_s'] >= low) & (cell_df['time_global_s'] <= high)]
-            except:
-                raise HTTPException(status_code=400, detail="Invalid time_range format. Use 'start-end' or 'full'")
-        total_points = len(cell_df)
+        total_points = result["total_points"]
         if total_points == 0:
             raise HTTPException(status_code=400, detail="No data in selected range")
-        if total_points > max_points:
-            step = max(1, total_points // max_points)
-            cell_df = cell_df.iloc[::step]
-        sampled_points = len(cell_df)
-        data_points = []
-        for _, row in cell_df.iterrows():
-            data_points.append({
-                "time": round(float(row['time_global_s'])),
-                "voltage": round(float(row['Vterm']), 3),
-                "soc": round(float(row['SOC']), 4),
-                "current": round(float(row['I_module']), 2),
-                "temperature": 25.0 + round(float(row.get('Qgen_cumulative', 0)) * 0.01, 2),
-                "power": round(float(row['V_module'] * row['I_module']) / 1000, 2),
-                "qgen": round(float(row.get('Qgen_cumulative', 0)), 2)
-            })
+        data_points = result_points(result["columns"])
         summary = sim.get("metadata", {}).get("summary", {})
         is_partial = sim.get("status") != "completed"
         return {
             "simulation_id": sim_id,
-            "cell_id": int(cell_id),
-            "available_cells": [int(c) for c in available_cells],
-            "time_range": f"{t_min:.0f}-{t_max:.0f}",
+            "cell_id": int(result["cell_id"]),
+            "available_cells": [int(c) for c in result["available_cells"]],
+            "time_range": f"{result['t_min']:.0f}-{result['t_max']:.0f}",
             "total_points": total_points,
-            "sampled_points": sampled_points,
-            "sampling_ratio": total_points // sampled_points if sampled_points > 0 else 1,
+            "sampled_points": result["sampled_points"],
+            "sampling_ratio": result["sampling_ratio"],
             "data": data_points,
             "summary": summary,
             "is_partial": is_partial,
@@ -615,8 +802,32 @@ async def get_simulation_data(
             raise HTTPException(status_code=202, detail="Data not ready yet - file being written")
         raise HTTPException(status_code=500, detail=f"Error processing data: {str(e)}")
 
+@router.get("/{sim_id}/stream")
+async def stream_simulation_data(
+    sim_id: str,
+    cell_id: int = 0,
+    aggregate: bool = False,
+    max_points: int = 500
+):
+    """
+    Server-Sent Events stream of a simulation: 'data' events with the timesteps appended
+    since the last one (cell_id's rows, or the pack aggregate with aggregate=true, at most
+    max_points per event), 'status' events on status/progress changes, 'reset' when the
+    results file restarts and 'end' once the simulation finished.
+    """
+    if not ObjectId.is_valid(sim_id):
+        raise HTTPException(status_code=400, detail="Invalid simulation ID")
+    if not await db.simulations.find_one({"_id": ObjectId(sim_id)}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    subscriber = live_results.subscribe(sim_id, None if aggregate else cell_id, max_points)
+    return StreamingResponse(
+        live_results.events(sim_id, subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/{sim_id}/export")
-async def export_simulation_data(sim_id: str):
+async def export_simulation_data(sim_id: str, expand_metadata: bool = False):
     if not ObjectId.is_valid(sim_id):
         raise HTTPException(status_code=400, detail="Invalid simulation ID")
     sim = await db.simulations.find_one({"_id": ObjectId(sim_id)})
@@ -626,6 +837,18 @@ async def export_simulation_data(sim_id: str):
     if not await storage_manager.exists(csv_rel_path):
         raise HTTPException(status_code=404, detail="CSV not found")
     
+    # Dictionary-encoded results: join step metadata back in on request
+    steps_rel_path = sim.get("file_steps_csv")
+    if expand_metadata and steps_rel_path and await storage_manager.exists(steps_rel_path):
+        csv_bytes = await storage_manager.load_file(csv_rel_path)
+        steps_bytes = await storage_manager.load_file(steps_rel_path)
+        df = aes.join_step_metadata(
+            pd.read_csv(io.BytesIO(csv_bytes)),
+            pd.read_csv(io.BytesIO(steps_bytes))
+        )
+        expanded = df.to_csv(index=False)
+        return StreamingResponse(iter([expanded]), media_type="text/csv", headers={"Content-Disposition": f"attachment; filename={sim_id}.csv"})
+    
     # FIXED: Load file content first, then create generator
     if storage_manager.storage_type == "local":
         def iterfile():
@@ -1,6 +1,18 @@
+from typing import Optional
 from app.config import storage_manager, DRIVE_CYCLES_DIR
+from CoreLogic.schedule import load_compiled_schedule
 
 async def save_csv_async(sim_id: str, csv_data: str) -> str:
     rel_path = f"{DRIVE_CYCLES_DIR}/{sim_id}.csv"
     await storage_manager.save_file(rel_path, csv_data, is_text=True)
-    return f"/uploads/simulation_cycle/{sim_id}.csv"
\ No newline at end of file
+    return f"/uploads/simulation_cycle/{sim_id}.csv"
+
+async def load_schedule_artifact(rel_path: Optional[str]):
+    """CompiledSchedule stored by /generate, or None if missing/unreadable (caller parses the CSV instead)."""
+    if not rel_path or not await storage_manager.exists(rel_path):
+        return None
+    try:
+        return load_compiled_schedule(await storage_manager.load_file(rel_path))
+    except Exception as e:
+        print(f"⚠️ Could not load compiled schedule {rel_path}: {e}; parsing the CSV instead")
+        return None
@@ -0,0 +1,280 @@
+# FILE: Backend/app/utils/job_queue.py
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+# Priority classes, most urgent first; queued jobs run by class, then in arrival order
+PRIORITIES = ("interactive", "batch")
+QUEUED = "queued"
+# Statuses of a job a node has claimed and not finished yet (it holds the node's lease)
+ACTIVE = ("starting", "running", "stopping", "pausing")
+# Completed jobs averaged for the start-time estimate
+ETA_HISTORY = 20
+
+
+class SimulationQueue:
+    """
+    Simulation job queue kept in the simulations collection.
+
+    A queued simulation has status 'queued' and a `job` sub-document (priority class,
+    enqueue time and the spec its runner needs to start it). Each API node runs at most
+    max_concurrent jobs: its dispatcher claims the next job atomically (interactive before
+    batch, oldest first), so several nodes can share one queue and queued jobs survive
+    restarts. Payloads handed to enqueue() are kept in memory and passed to the runner when
+    the job starts on the same node; otherwise the runner rebuilds them from the document.
+
+    Stop/pause requests go straight to the control channel of a job running on this node;
+    for a job running elsewhere they are stored as job.control_request and applied by
+    that node's dispatcher on its next pass.
+
+    A claimed job is leased: its node's dispatcher refreshes job.heartbeat_at on every
+    pass. Once a job's heartbeat is older than lease_s its node is taken as gone: a job
+    that never started is queued again, a stopping one is marked stopped and any other
+    is marked failed, so its slot and status recover.
+    """
+
+    def __init__(self, max_concurrent: int, node_id: str, poll_interval_s: float = 5.0, lease_s: float = 60.0):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.node_id = node_id
+        self.poll_interval_s = poll_interval_s
+        self.lease_s = max(float(lease_s), 2 * poll_interval_s)
+        self.collection = None
+        self.runner = None
+        self.control = None
+        self.running = {}  # sim_id → asyncio.Task
+        self.payloads = {}
+        self._wakeup = asyncio.Event()
+        self._dispatcher = None
+
+    async def start(
+        self,
+        collection,
+        runner: Callable[[Dict[str, Any], Optional[Dict[str, Any]]], Awaitable[None]],
+        control: Optional[Callable[[str, str], bool]] = None
+    ):
+        """
+        Start dispatching jobs of collection to runner(sim_doc, payload); control(sim_id,
+        action) delivers 'stop'/'pause' to a running job (False if it is not running here).
+        """
+        self.collection = collection
+        self.runner = runner
+        self.control = control
+        await collection.create_index([("status", 1), ("job.priority_rank", 1), ("job.enqueued_at", 1)])
+        # Jobs claimed by this node before a restart never started: queue them again
+        result = await collection.update_many(
+            {"status": "starting", "job.node": self.node_id},
+            {"$set": {"status": QUEUED}, "$unset": {"job.node": "", "job.claimed_at": "", "job.heartbeat_at": ""}}
+        )
+        if result.modified_count:
+            print(f"♻️ Requeued {result.modified_count} interrupted simulation jobs")
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        print(f"🚦 Simulation queue started on node {self.node_id}: max {self.max_concurrent} concurrent jobs")
+
+    async def shutdown(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+
+    async def enqueue(self, sim_id: str, job: Dict[str, Any], priority: str = "interactive", payload: Optional[Dict[str, Any]] = None):
+        """Queue a simulation; job is the persistent spec stored on its document."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Invalid priority: {priority}. Use one of {list(PRIORITIES)}")
+        if payload is not None:
+            self.payloads[sim_id] = payload
+        await self.collection.update_one(
+            {"_id": ObjectId(sim_id)},
+            {"$set": {
+                "status": QUEUED,
+                "job": {
+                    **job,
+                    "priority": priority,
+                    "priority_rank": PRIORITIES.index(priority),
+                    "enqueued_at": datetime.utcnow(),
+                },
+                "updated_at": datetime.utcnow(),
+            }}
+        )
+        self._wakeup.set()
+
+    async def cancel(self, sim_id: str) -> bool:
+        """Drop a job that has not started yet (status → stopped). False if it already left the queue."""
+        result = await self.collection.update_one(
+            {"_id": ObjectId(sim_id), "status": QUEUED},
+            {"$set": {"status": "stopped", "updated_at": datetime.utcnow()}}
+        )
+        if result.modified_count:
+            self.payloads.pop(sim_id, None)
+            return True
+        return False
+
+    async def request_control(self, sim_id: str, action: str) -> bool:
+        """
+        Ask a running simulation to 'stop' or 'pause'. Returns True if it runs on this node
+        and got the request at once, False if the request was left for the node running it.
+        """
+        if self.control is not None and sim_id in self.running and self.control(sim_id, action):
+            return True
+        await self.collection.update_one(
+            {"_id": ObjectId(sim_id)},
+            {"$set": {"job.control_request": action}}
+        )
+        return False
+
+    async def _apply_control_requests(self):
+        """Deliver control requests stored for jobs running on this node."""
+        if not self.running or self.control is None:
+            return
+        cursor = self.collection.find(
+            {"_id": {"$in": [ObjectId(sim_id) for sim_id in self.running]}, "job.control_request": {"$ne": None}},
+            {"job.control_request": 1}
+        )
+        async for sim in cursor:
+            sim_id = str(sim["_id"])
+            if self.control(sim_id, sim["job"]["control_request"]):
+                await self.collection.update_one({"_id": sim["_id"]}, {"$unset": {"job.control_request": ""}})
+
+    async def _heartbeat(self):
+        """Renew the lease of every job running on this node."""
+        if self.running:
+            await self.collection.update_many(
+                {"_id": {"$in": [ObjectId(sim_id) for sim_id in self.running]}},
+                {"$set": {"job.heartbeat_at": datetime.utcnow()}}
+            )
+
+    async def _recover_expired(self):
+        """Requeue or close jobs whose node stopped renewing their lease."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lease_s)
+        cursor = self.collection.find({
+            "_id": {"$nin": [ObjectId(sim_id) for sim_id in self.running]},
+            "status": {"$in": list(ACTIVE)},
+            "job.node": {"$ne": None},
+            "$or": [
+                {"job.heartbeat_at": {"$lt": cutoff}},
+                {"job.heartbeat_at": None, "job.claimed_at": {"$lt": cutoff}},
+            ],
+        }, {"status": 1, "job": 1})
+        async for sim in cursor:
+            job, status = sim["job"], sim["status"]
+            # Only the lease seen here: another node may have recovered the job meanwhile
+            expired = {"_id": sim["_id"], "status": status, "job.heartbeat_at": job.get("heartbeat_at")}
+            if status == "starting":
+                update = {
+                    "$set": {"status": QUEUED, "updated_at": datetime.utcnow()},
+                    "$unset": {"job.node": "", "job.claimed_at": "", "job.heartbeat_at": "", "job.control_request": ""},
+                }
+            else:
+                stopped = status == "stopping" or job.get("control_request") == "stop"
+                update = {
+                    "$set": {
+                        "status": "stopped" if stopped else "failed",
+                        "job.finished_at": datetime.utcnow(),
+                        "updated_at": datetime.utcnow(),
+                    },
+                    "$unset": {"job.control_request": ""},
+                }
+                if not stopped:
+                    update["$set"]["error"] = f"Lost node {job['node']}: no heartbeat for {self.lease_s:.0f}s"
+            result = await self.collection.update_one(expired, update)
+            if result.modified_count:
+                print(f"♻️ Lease of simulation {sim['_id']} on node {job['node']} expired ({status} → {update['$set']['status']})")
+                if status == "starting":
+                    self._wakeup.set()
+
+    async def _claim_next(self) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"status": QUEUED},
+            {"$set": {"status": "starting", "job.node": self.node_id, "job.claimed_at": now, "job.heartbeat_at": now}},
+            sort=[("job.priority_rank", 1), ("job.enqueued_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _dispatch_loop(self):
+        while True:
+            try:
+                await self._heartbeat()
+                await self._recover_expired()
+                await self._apply_control_requests()
+                while len(self.running) < self.max_concurrent:
+                    sim = await self._claim_next()
+                    if sim is None:
+                        break
+                    sim_id = str(sim["_id"])
+                    self.running[sim_id] = asyncio.create_task(self._run(sim_id, sim))
+            except Exception as e:
+                print(f"⚠️ Queue dispatch error: {e}")
+            # Other nodes' enqueues are only seen by polling
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _run(self, sim_id: str, sim: Dict[str, Any]):
+        started_at = datetime.utcnow()
+        print(f"▶️ Starting queued simulation {sim_id} ({sim['job'].get('priority')})")
+        try:
+            await self.collection.update_one(
+                {"_id": ObjectId(sim_id)},
+                {"$set": {"job.started_at": started_at}}
+            )
+            await self.runner(sim, self.payloads.pop(sim_id, None))
+        except Exception as e:
+            print(f"❌ Queued simulation {sim_id} failed to start: {e}")
+            await self.collection.update_one(
+                {"_id": ObjectId(sim_id)},
+                {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.utcnow()}}
+            )
+        finally:
+            await self.collection.update_one(
+                {"_id": ObjectId(sim_id)},
+                {"$set": {"job.finished_at": datetime.utcnow()}}
+            )
+            self.running.pop(sim_id, None)
+            self._wakeup.set()
+
+    async def average_runtime_s(self) -> Optional[float]:
+        """Mean run time of the last finished jobs, or None without history."""
+        cursor = self.collection.find(
+            {"job.started_at": {"$ne": None}, "job.finished_at": {"$ne": None}},
+            {"job.started_at": 1, "job.finished_at": 1}
+        ).sort("job.finished_at", -1).limit(ETA_HISTORY)
+        durations = [
+            (s["job"]["finished_at"] - s["job"]["started_at"]).total_seconds()
+            async for s in cursor
+        ]
+        return sum(durations) / len(durations) if durations else None
+
+    async def queue_info(self, sim: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Queue position (0 = next to start), priority and estimated start of a queued
+        simulation document, or None if it is not queued.
+        """
+        job = sim.get("job") or {}
+        if sim.get("status") != QUEUED or "enqueued_at" not in job:
+            return None
+        position = await self.collection.count_documents({
+            "status": QUEUED,
+            "$or": [
+                {"job.priority_rank": {"$lt": job["priority_rank"]}},
+                {"job.priority_rank": job["priority_rank"], "job.enqueued_at": {"$lt": job["enqueued_at"]}},
+            ]
+        })
+        # Jobs ahead start in waves of max_concurrent, after the slots held by running jobs free up
+        estimated_start = None
+        average_s = await self.average_runtime_s()
+        if average_s is not None:
+            waves = position // self.max_concurrent + (1 if len(self.running) >= self.max_concurrent else 0)
+            estimated_start = datetime.utcnow() + timedelta(seconds=waves * average_s)
+        return {
+            "position": position,
+            "priority": job.get("priority"),
+            "enqueued_at": job["enqueued_at"],
+            "estimated_start": estimated_start,
+        }
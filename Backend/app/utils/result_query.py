@@ -0,0 +1,203 @@
+# FILE: Backend/app/utils/result_query.py
+import io
+import asyncio
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from CoreLogic import NEW_electrical_solver as aes
+from app.utils.result_stream import ResultTail, PROBE_BYTES
+
+# Columns /data serves: pack scalars and per-cell values
+SERIES_STEP_FIELDS = ('time_global_s', 'I_module', 'V_module')
+SERIES_CELL_FIELDS = ('SOC', 'Vterm', 'Qgen_cumulative')
+
+
+def _usecols(column) -> bool:
+    """pandas usecols filter keeping the /data columns of either results layout."""
+    if column == 'cell_id' or column in SERIES_STEP_FIELDS or column in SERIES_CELL_FIELDS:
+        return True
+    name = str(column).split('[', 1)[0]
+    return name in SERIES_CELL_FIELDS and str(column).endswith(']')
+
+
+class CellSeries:
+    """
+    One cell's /data columns as numpy arrays in time order (its time index), grown by
+    appending parsed chunks and consolidated on the next query.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self.columns: Dict[str, np.ndarray] = {}
+
+    def append(self, columns: Dict[str, np.ndarray]) -> None:
+        self._chunks.append(columns)
+
+    def consolidate(self) -> Dict[str, np.ndarray]:
+        if self._chunks:
+            parts = ([self.columns] if self.columns else []) + self._chunks
+            fields = [name for name in parts[-1] if all(name in p for p in parts)]
+            columns = {name: np.concatenate([p[name] for p in parts]) for name in fields}
+            times = columns['time_global_s']
+            if len(times) > 1 and np.any(np.diff(times) < 0):
+                order = np.argsort(times, kind='stable')
+                columns = {name: values[order] for name, values in columns.items()}
+            self.columns = columns
+            self._chunks = []
+        return self.columns
+
+
+class _IndexedResults:
+    def __init__(self, tail: ResultTail):
+        self.tail = tail
+        self.cells: Dict[int, CellSeries] = {}
+        self.lock = asyncio.Lock()
+
+    def clear(self) -> None:
+        self.cells = {}
+
+    def add_rows(self, df: pd.DataFrame) -> None:
+        """Split a parsed chunk (file layout) into the per-cell series."""
+        if df.empty:
+            return
+        step = {name: df[name].to_numpy(float) for name in SERIES_STEP_FIELDS if name in df.columns}
+        if self.tail.wide:
+            for cell_id in aes.wide_cell_ids(df.columns):
+                columns = dict(step)
+                for name in SERIES_CELL_FIELDS:
+                    column = aes.wide_cell_column(name, cell_id)
+                    if column in df.columns:
+                        columns[name] = df[column].to_numpy(float)
+                self.cells.setdefault(cell_id, CellSeries()).append(columns)
+            return
+        # Long layout: group the chunk's rows by cell, keeping their order within a cell
+        cell_ids = df['cell_id'].to_numpy()
+        order = np.argsort(cell_ids, kind='stable')
+        ids, starts = np.unique(cell_ids[order], return_index=True)
+        bounds = list(starts[1:]) + [len(order)]
+        cell_values = {name: df[name].to_numpy(float) for name in SERIES_CELL_FIELDS if name in df.columns}
+        for cell_id, start, end in zip(ids, starts, bounds):
+            rows = order[start:end]
+            columns = {name: values[rows] for name, values in step.items()}
+            columns.update({name: values[rows] for name, values in cell_values.items()})
+            self.cells.setdefault(int(cell_id), CellSeries()).append(columns)
+
+
+def select_series(
+    columns: Dict[str, np.ndarray],
+    time_range: Optional[Tuple[float, float]],
+    max_points: int
+) -> Dict[str, Any]:
+    """
+    Slice a time-ordered series to time_range (inclusive, binary search on the time
+    index) and keep every k-th point so that about max_points remain, like /data always did.
+
+    Returns:
+    --------
+    Dict with t_min, t_max (whole series), total_points (in range), sampled_points,
+    sampling_ratio and columns (the sampled arrays)
+    """
+    times = columns['time_global_s']
+    t_min, t_max = (float(times[0]), float(times[-1])) if len(times) else (np.nan, np.nan)
+    lo, hi = 0, len(times)
+    if time_range is not None:
+        lo = int(np.searchsorted(times, time_range[0], side='left'))
+        hi = int(np.searchsorted(times, time_range[1], side='right'))
+    total_points = max(0, hi - lo)
+    step = max(1, total_points // max_points) if total_points > max_points else 1
+    sampled = {name: values[lo:hi:step] for name, values in columns.items()}
+    sampled_points = len(sampled['time_global_s'])
+    return {
+        "t_min": t_min,
+        "t_max": t_max,
+        "total_points": total_points,
+        "sampled_points": sampled_points,
+        "sampling_ratio": total_points // sampled_points if sampled_points > 0 else 1,
+        "columns": sampled,
+    }
+
+
+class ResultQueryEngine:
+    """
+    Query engine behind /simulations/{id}/data.
+
+    Each results file read is parsed (only the /data columns) into per-cell columnar
+    series with a sorted time index, so switching cells reads one cell's arrays and
+    a time range is a binary search. Files are kept up to date through a ResultTail:
+    appended rows are parsed and added, and a file rewritten in place (smaller, new
+    modification time without new bytes, or changed bytes before the read offset) is
+    parsed again. The max_entries most recently queried files are kept.
+    """
+
+    def __init__(self, storage, max_entries: int = 8):
+        self.storage = storage
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # rel_path → _IndexedResults
+        self.start_times = OrderedDict()  # rel_path → time of its first timestep
+
+    async def _refresh(self, rel_path: str) -> _IndexedResults:
+        entry = self.entries.get(rel_path)
+        if entry is None:
+            entry = _IndexedResults(ResultTail(self.storage, rel_path))
+            self.entries[rel_path] = entry
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        self.entries.move_to_end(rel_path)
+
+        async with entry.lock:
+            new_rows = await entry.tail.read_new(long=False, usecols=_usecols)
+            if new_rows is None:
+                entry.clear()
+                self.start_times.pop(rel_path, None)
+                new_rows = await entry.tail.read_new(long=False, usecols=_usecols)
+            if new_rows is not None:
+                entry.add_rows(new_rows)
+        return entry
+
+    async def start_time(self, rel_path: str) -> Optional[float]:
+        """
+        Time of the first timestep of a results file (the t_min /data reports), read from
+        its header and first row only and remembered; None while it has no complete row.
+        """
+        if rel_path in self.start_times:
+            self.start_times.move_to_end(rel_path)
+            return self.start_times[rel_path]
+        data = b""
+        while data.count(b"\n") < 2:
+            chunk = await self.storage.load_file_range(rel_path, len(data), len(data) + PROBE_BYTES)
+            if not chunk:
+                return None
+            data += chunk
+        header, first_row, _ = data.split(b"\n", 2)
+        df = pd.read_csv(io.BytesIO(header + b"\n" + first_row + b"\n"), usecols=['time_global_s'])
+        self.start_times[rel_path] = float(df['time_global_s'].iloc[0])
+        while len(self.start_times) > self.max_entries:
+            self.start_times.popitem(last=False)
+        return self.start_times[rel_path]
+
+    async def query(
+        self,
+        rel_path: str,
+        cell_id: int,
+        time_range: Optional[Tuple[float, float]] = None,
+        max_points: int = 5000
+    ) -> Optional[Dict[str, Any]]:
+        """
+        One cell's series of a results file (the first cell if cell_id is not in it),
+        restricted to time_range and downsampled to about max_points (select_series).
+
+        Returns:
+        --------
+        select_series() dict plus cell_id and available_cells, or None while the
+        file has no timesteps
+        """
+        entry = await self._refresh(rel_path)
+        if not entry.cells:
+            return None
+        available_cells = sorted(entry.cells)
+        if cell_id not in entry.cells:
+            cell_id = available_cells[0]
+        result = select_series(entry.cells[cell_id].consolidate(), time_range, max_points)
+        result.update({"cell_id": cell_id, "available_cells": available_cells})
+        return result
@@ -0,0 +1,390 @@
+# FILE: Backend/app/utils/result_stream.py
+import io
+import json
+import asyncio
+import numpy as np
+import pandas as pd
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from bson import ObjectId
+from CoreLogic import NEW_electrical_solver as aes
+from CoreLogic.result_ring import ResultRing
+
+# Statuses after which a simulation's results file no longer grows
+TERMINAL_STATUSES = ("completed", "failed", "stopped", "paused", "error")
+# Fields of a /data point, in order
+POINT_FIELDS = ("time", "voltage", "soc", "current", "temperature", "power", "qgen")
+# Bytes probed at a time when looking for line boundaries
+PROBE_BYTES = 65536
+# Bytes before the read offset re-read to detect a file rewritten in place
+ANCHOR_BYTES = 256
+# Bytes parsed at a time when a whole results file is summarized
+SUMMARY_CHUNK_BYTES = 8 * 2**20
+
+
+class ResultTail:
+    """
+    Incremental reader of a results CSV that is still being appended to.
+
+    Each read fetches only the bytes appended since the previous read and parses their
+    complete lines; a half-written last line stays in the file for the next read. The
+    bytes just before the offset are fetched along and compared with what was read
+    there, which tells a rewritten file from a grown one (and a new modification time
+    without new bytes means a rewrite of the same size). Frames are returned in the long
+    layout whatever the file's layout, unless long=False.
+    """
+
+    def __init__(self, storage, rel_path: str):
+        self.storage = storage
+        self.rel_path = rel_path
+        self.header = None  # header line (bytes, with its newline)
+        self.wide = False
+        self.offset = None  # start of the first line not read yet
+        self.anchor = b""  # last bytes before offset
+        self.mtime = None  # modification time at the last read
+
+    async def _read_header(self) -> bool:
+        data = b""
+        while b"\n" not in data:
+            chunk = await self.storage.load_file_range(self.rel_path, len(data), len(data) + PROBE_BYTES)
+            if not chunk:
+                return False
+            data += chunk
+        self.header = data[:data.index(b"\n") + 1]
+        self.wide = aes.is_wide_layout(self.header.decode("utf-8").strip().split(","))
+        self.offset = len(self.header)
+        self.anchor = self.header[-ANCHOR_BYTES:]
+        return True
+
+    def _reset(self) -> None:
+        self.header, self.offset, self.anchor, self.mtime = None, None, b"", None
+
+    async def seek_end(self) -> None:
+        """Skip the rows already in the file: the next read returns rows appended after now."""
+        stat = await self.storage.stat(self.rel_path)
+        if not stat or not stat[0] or not await self._read_header():
+            return
+        size, self.mtime = stat
+        # Back up from the end to the start of the last (possibly incomplete) line
+        end = size
+        while end > self.offset:
+            start = max(self.offset, end - PROBE_BYTES)
+            window = await self.storage.load_file_range(self.rel_path, start, end)
+            newline = window.rfind(b"\n")
+            if newline >= 0:
+                self.offset = start + newline + 1
+                self.anchor = window[max(0, newline + 1 - ANCHOR_BYTES):newline + 1]
+                return
+            end = start
+
+    async def read_new(self, long: bool = True, usecols=None, max_bytes: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        Rows appended since the last read; with max_bytes, only the complete lines in
+        the next max_bytes (at least one line), so a long file can be read in chunks.
+
+        Returns:
+        --------
+        DataFrame in the long (or, with long=False, the file's) layout, restricted to
+        usecols (a pandas usecols filter) if given; empty if nothing new, or None when the
+        file was rewritten from the start (the tail then restarts from its top)
+        """
+        stat = await self.storage.stat(self.rel_path)
+        if stat is None:
+            return pd.DataFrame()
+        size, mtime = stat
+        if self.header is None and not await self._read_header():
+            return pd.DataFrame()
+        if size < self.offset or (size == self.offset and self.mtime is not None and mtime != self.mtime):
+            self._reset()
+            return None
+        self.mtime = mtime
+        if size == self.offset:
+            return pd.DataFrame()
+        stop = size if max_bytes is None else min(size, self.offset + max_bytes)
+        data = await self.storage.load_file_range(self.rel_path, self.offset - len(self.anchor), stop)
+        if not data.startswith(self.anchor):
+            self._reset()
+            return None
+        data = data[len(self.anchor):]
+        end = data.rfind(b"\n") + 1
+        # A line longer than max_bytes: read on up to its end
+        while end == 0 and stop < size:
+            data += await self.storage.load_file_range(self.rel_path, stop, min(size, stop + max_bytes))
+            stop = min(size, stop + max_bytes)
+            end = data.rfind(b"\n") + 1
+        if end == 0:
+            return pd.DataFrame()
+        self.offset += end
+        self.anchor = (self.anchor + data[:end])[-ANCHOR_BYTES:]
+        df = pd.read_csv(io.BytesIO(self.header + data[:end]), usecols=usecols)
+        return aes.wide_to_long(df) if self.wide and long else df
+
+
+def _summary_usecols(column) -> bool:
+    """pandas usecols filter keeping the columns ResultSummary needs, in either layout."""
+    name = str(column).split('[', 1)[0]
+    return column == 'cell_id' or name in ('time_global_s', 'SOC', 'Qgen_cumulative')
+
+
+class ResultSummary:
+    """
+    Running aggregates behind a run's summary, fed long-layout chunks of its results in
+    any order: the mean SOC over the rows at the first and at the last timestep, and the
+    peak cumulative heat. Only the aggregates are kept, not the rows.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.complete = True  # False once a chunk lacked time_global_s or SOC
+        self.t_start, self.start_sum, self.start_count = np.inf, 0.0, 0
+        self.t_end, self.end_sum, self.end_count = -np.inf, 0.0, 0
+        self.max_qgen = None
+
+    def add(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        if 'time_global_s' not in df.columns or 'SOC' not in df.columns:
+            self.complete = False
+            return
+        self.rows += len(df)
+        times = df['time_global_s'].to_numpy(float)
+        soc = df['SOC'].to_numpy(float)
+        valid = ~np.isnan(times)
+        if valid.any():
+            t_lo, t_hi = times[valid].min(), times[valid].max()
+            if t_lo < self.t_start:
+                self.t_start, self.start_sum, self.start_count = t_lo, 0.0, 0
+            if t_hi > self.t_end:
+                self.t_end, self.end_sum, self.end_count = t_hi, 0.0, 0
+            at_start = soc[(times == self.t_start) & ~np.isnan(soc)]
+            at_end = soc[(times == self.t_end) & ~np.isnan(soc)]
+            self.start_sum += float(at_start.sum())
+            self.start_count += len(at_start)
+            self.end_sum += float(at_end.sum())
+            self.end_count += len(at_end)
+        if 'Qgen_cumulative' in df.columns:
+            qgen = df['Qgen_cumulative'].to_numpy(float)
+            qgen = qgen[~np.isnan(qgen)]
+            if len(qgen):
+                self.max_qgen = max(float(qgen.max()), self.max_qgen if self.max_qgen is not None else -np.inf)
+
+    @property
+    def start_soc(self) -> float:
+        return self.start_sum / self.start_count if self.start_count else np.nan
+
+    @property
+    def end_soc(self) -> float:
+        return self.end_sum / self.end_count if self.end_count else np.nan
+
+
+async def summarize_results(storage, rel_path: str, chunk_bytes: int = SUMMARY_CHUNK_BYTES) -> ResultSummary:
+    """
+    ResultSummary of a results file, from one pass over it in chunks of about
+    chunk_bytes (only the summary columns are parsed). A file rewritten while it is
+    read is summarized again from its top.
+    """
+    tail = ResultTail(storage, rel_path)
+    summary = ResultSummary()
+    while True:
+        rows = await tail.read_new(usecols=_summary_usecols, max_bytes=chunk_bytes)
+        if rows is None:
+            summary = ResultSummary()
+            continue
+        if rows.empty:
+            return summary
+        summary.add(rows)
+
+
+def downsample(df: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """Every k-th row so that at most max_points remain, always keeping the last one."""
+    if max_points <= 0 or len(df) <= max_points:
+        return df
+    step = -(-len(df) // max_points)
+    keep = np.arange(len(df) - 1, -1, -step)[::-1]
+    return df.iloc[keep]
+
+
+def pack_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pack aggregate of long-layout rows, one row per timestep: module current and voltage,
+    cell-average SOC and cumulative heat, with the pack voltage as Vterm.
+    """
+    agg = {'Vterm': ('V_module', 'first'), 'SOC': ('SOC', 'mean'), 'I_module': ('I_module', 'first'), 'V_module': ('V_module', 'first')}
+    if 'Qgen_cumulative' in df.columns:
+        agg['Qgen_cumulative'] = ('Qgen_cumulative', 'mean')
+    return df.groupby('time_global_s', sort=True).agg(**agg).reset_index()
+
+
+def data_points(df) -> List[Dict[str, Any]]:
+    """
+    /data points (POINT_FIELDS) of a frame, or a dict of column arrays, with one row per
+    timestep, built column-wise.
+    """
+    times = np.asarray(df['time_global_s'], dtype=float)
+    qgen = np.asarray(df['Qgen_cumulative'], dtype=float) if 'Qgen_cumulative' in df else np.zeros(len(times))
+    i_module = np.asarray(df['I_module'], dtype=float)
+    columns = (
+        np.round(times).astype(np.int64),
+        np.round(np.asarray(df['Vterm'], dtype=float), 3),
+        np.round(np.asarray(df['SOC'], dtype=float), 4),
+        np.round(i_module, 2),
+        25.0 + np.round(qgen * 0.01, 2),
+        np.round(np.asarray(df['V_module'], dtype=float) * i_module / 1000, 2),
+        np.round(qgen, 2),
+    )
+    return [dict(zip(POINT_FIELDS, values)) for values in zip(*(c.tolist() for c in columns))]
+
+
+class Subscriber:
+    """One client of a simulation's live stream: its view and its pending events."""
+
+    def __init__(self, cell_id: Optional[int], max_points: int, max_pending: int = 100):
+        self.cell_id = cell_id  # None: pack aggregate
+        self.max_points = max_points
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    def put(self, event: Optional[tuple]) -> None:
+        # A client that does not keep up loses its oldest events, not the newest
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+
+class LiveResultHub:
+    """
+    Push channel for results of running simulations.
+
+    A simulation with subscribers has one pump that, every interval_s, reads its status
+    and the timesteps added since its last pass: from the job's shared memory result ring
+    (rings(sim_id)) while it runs on this node, otherwise by tailing its results file
+    (ResultTail: only appended rows are fetched and parsed). It then hands every
+    subscriber the new timesteps of its view (one cell or the pack aggregate, downsampled
+    to max_points per event) and any status change. Subscribers
+    joining a running simulation get rows appended after they joined; the pump stops when
+    the simulation reaches a terminal status or loses its last subscriber.
+    """
+
+    def __init__(
+        self,
+        storage,
+        collection,
+        interval_s: float = 1.0,
+        keepalive_s: float = 15.0,
+        rings: Optional[Callable[[str], Optional[ResultRing]]] = None
+    ):
+        self.storage = storage
+        self.collection = collection
+        self.rings = rings
+        self.interval_s = interval_s
+        self.keepalive_s = keepalive_s
+        self.channels = {}  # sim_id → set of Subscriber
+        self._pumps = {}  # sim_id → asyncio.Task
+
+    def subscribe(self, sim_id: str, cell_id: Optional[int] = 0, max_points: int = 500) -> Subscriber:
+        subscriber = Subscriber(cell_id, max_points)
+        self.channels.setdefault(sim_id, set()).add(subscriber)
+        if sim_id not in self._pumps:
+            self._pumps[sim_id] = asyncio.create_task(self._pump(sim_id))
+        return subscriber
+
+    def unsubscribe(self, sim_id: str, subscriber: Subscriber) -> None:
+        subscribers = self.channels.get(sim_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self.channels[sim_id]
+            pump = self._pumps.pop(sim_id, None)
+            if pump is not None:
+                pump.cancel()
+
+    def _broadcast(self, sim_id: str, event: Optional[tuple]) -> None:
+        for subscriber in self.channels.get(sim_id, ()):
+            subscriber.put(event)
+
+    def _send_rows(self, sim_id: str, df: pd.DataFrame) -> None:
+        views = {}  # (cell_id, max_points) → points, shared by subscribers with the same view
+        for subscriber in self.channels.get(sim_id, ()):
+            key = (subscriber.cell_id, subscriber.max_points)
+            if key not in views:
+                if subscriber.cell_id is None:
+                    view = pack_frame(df)
+                else:
+                    view = df[df['cell_id'] == subscriber.cell_id].sort_values('time_global_s')
+                views[key] = data_points(downsample(view, subscriber.max_points)) if not view.empty else []
+            if views[key]:
+                subscriber.put(("data", {"cell_id": subscriber.cell_id, "data": views[key]}))
+
+    async def _pump(self, sim_id: str):
+        tail = None
+        ring_in_use, ring_pos = None, 0
+        first_pass = True
+        last_status = None
+        try:
+            while self.channels.get(sim_id):
+                sim = await self.collection.find_one(
+                    {"_id": ObjectId(sim_id)},
+                    {"status": 1, "file_csv": 1, "metadata.progress": 1, "metadata.live": 1}
+                )
+                if sim is None:
+                    self._broadcast(sim_id, ("end", {"status": "deleted"}))
+                    break
+                metadata = sim.get("metadata") or {}
+                status = {"status": sim.get("status"), "progress": metadata.get("progress"), "live": metadata.get("live")}
+                if status != last_status:
+                    self._broadcast(sim_id, ("status", status))
+                    last_status = status
+
+                new_rows = pd.DataFrame()
+                rel_path = sim.get("file_csv")
+                ring = self.rings(sim_id) if self.rings is not None else None
+                if ring is not None:
+                    # Running on this node: read shared memory, not the file
+                    if ring is not ring_in_use:
+                        ring_in_use, ring_pos = ring, (ring.count if first_pass else 0)
+                        tail = None
+                    new_rows, _, ring_pos = ring.read(ring_pos)
+                    if not new_rows.empty:
+                        self._send_rows(sim_id, new_rows)
+                elif rel_path:
+                    if tail is None or tail.rel_path != rel_path:
+                        tail = ResultTail(self.storage, rel_path)
+                        # Rows already in the file were delivered (ring) or predate the stream
+                        if first_pass or ring_in_use is not None:
+                            await tail.seek_end()
+                    new_rows = await tail.read_new()
+                    if new_rows is None:
+                        self._broadcast(sim_id, ("reset", {}))
+                    elif not new_rows.empty:
+                        self._send_rows(sim_id, new_rows)
+                first_pass = False
+
+                # The status was read before the file, so a terminal run's last rows are in
+                if status["status"] in TERMINAL_STATUSES and new_rows is not None and new_rows.empty:
+                    self._broadcast(sim_id, ("end", {"status": status["status"]}))
+                    break
+                await asyncio.sleep(self.interval_s)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Live stream of {sim_id} failed: {e}")
+            self._broadcast(sim_id, ("error", {"detail": str(e)}))
+        # Close the streams of the remaining subscribers
+        self._broadcast(sim_id, None)
+        self.channels.pop(sim_id, None)
+        self._pumps.pop(sim_id, None)
+
+    async def events(self, sim_id: str, subscriber: Subscriber) -> AsyncIterator[str]:
+        """Server-Sent Events of a subscriber until its stream ends; unsubscribes when closed."""
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscriber.queue.get(), timeout=self.keepalive_s)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if item is None:
+                    break
+                event, payload = item
+                yield f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+        finally:
+            self.unsubscribe(sim_id, subscriber)
@@ -1,13 +1,39 @@
+import asyncio
 import csv
+import hashlib
 from io import StringIO
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.config import storage_manager
+from CoreLogic.schedule import compile_day_templates, prepend_idle_row
+from CoreLogic.day_calendar import DayCalendar, DAYS_PER_YEAR
+import numpy as np
+import pandas as pd
 import json
 
-DAYS_OF_WEEK = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
 UPLOAD_SUBCYCLES_DIR = "subcycles"
 
+SIMULATION_TABLE_HEADER = [
+    "Global Step Index",
+    "Day_of_year",
+    "DriveCycle_ID",
+    "drive cycle trigger",
+    "Subcycle_ID",
+    "Subcycle Step Index",
+    "Value Type",
+    "Value",
+    "Unit",
+    "Step Type",
+    "Step Duration (s)",
+    "Timestep (s)",
+    "Ambient Temp (°C)",
+    "Location",
+    "step Trigger(s)",
+    "Label"
+]
+# Columns that differ between days running the same template; the rest is rendered once per template
+DAY_COLUMNS = 3
+
 
 async def load_subcycle_steps_if_needed(sc: Dict[str, Any]) -> Dict[str, Any]:
     """Load steps from file if source=import_file."""
@@ -31,175 +57,344 @@ async def load_subcycle_steps_if_needed(sc: Dict[str, Any]) -> Dict[str, Any]:
     return sc
 
 
-async def generate_simulation_cycle(
+async def fetch_subcycles(db: AsyncIOMotorDatabase, subcycle_ids) -> Dict[str, Dict[str, Any]]:
+    """Subcycle documents by ID, without their imported step files."""
+    # Fetch subcycles from database
+    subcycles_cursor = db.subcycles.find({
+        "_id": {"$in": list(subcycle_ids)},
+        "deleted_at": None
+    })
+    return {sc["_id"]: sc async for sc in subcycles_cursor}
+
+
+async def load_subcycles(subcycles: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Load the imported step files of subcycle documents concurrently."""
+    
+    async def load_one(sc: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            loaded_sc = await load_subcycle_steps_if_needed(sc)
+        except Exception as e:
+            print(f"ERROR loading subcycle {sc.get('_id')}: {str(e)}")
+            raise ValueError(f"Failed to load subcycle {sc.get('_id')}: {str(e)}")
+        
+        # Debug logging
+        step_count = len(loaded_sc.get("steps", []))
+        print(f"Subcycle {loaded_sc['_id']} ({loaded_sc.get('name')}): {step_count} steps, source={loaded_sc.get('source')}")
+        return loaded_sc
+    
+    # CRITICAL FIX: Load all subcycles AND their steps from files if needed
+    loaded = await asyncio.gather(*(load_one(sc) for sc in subcycles))
+    return {sc["_id"]: sc for sc in loaded}
+
+
+def fingerprint_day_template(
+    dc_id: str,
+    dc_def: Optional[Dict[str, Any]],
+    subcycle_docs: Dict[str, Dict[str, Any]]
+) -> str:
+    """
+    Content fingerprint of the day a drive cycle runs: its composition and the stored
+    version of every subcycle it uses. Imported step files are never rewritten (updates
+    of import_file subcycles are metadata-only), so the subcycle document covers them.
+    Every day resolved to dc_id shares this fingerprint.
+    """
+    composition = dc_def.get("composition", []) if dc_def else []
+    payload = {
+        "drivecycleId": dc_id,
+        "composition": composition,
+        "subcycles": {row["subcycleId"]: subcycle_docs.get(row["subcycleId"]) for row in composition},
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def reusable_day_templates(schedule) -> Dict[str, List[str]]:
+    """
+    Fingerprint → rendered rows of the day templates in a stored schedule artifact
+    (empty for artifacts without fingerprints, which are regenerated in full).
+    """
+    fingerprints = getattr(schedule, "template_fingerprints", None)
+    if not fingerprints or schedule.template_rows is None:
+        return {}
+    rows = schedule.template_rows.tolist()
+    offsets = np.concatenate([[0], np.cumsum(schedule.template_len)])
+    return {
+        fingerprint: rows[offsets[k]:offsets[k + 1]]
+        for k, fingerprint in enumerate(fingerprints)
+    }
+
+
+async def generate_day_templates(
     sim_doc: Dict[str, Any],
-    db: AsyncIOMotorDatabase
-) -> List[Dict[str, Any]]:
-    """Generate the full simulation cycle with all steps for 364 days."""
+    db: AsyncIOMotorDatabase,
+    reusable: Optional[Dict[str, List[str]]] = None
+) -> Tuple[Dict[str, Dict[str, Any]], DayCalendar]:
+    """
+    Generate the simulation cycle as day templates: the steps of each drive cycle the
+    calendar uses, built once, and the DayCalendar that resolves days to them lazily.
+    The horizon is sim_doc['simulation_days'] (one 364-day year by default).
+    
+    Templates whose fingerprint is in reusable (see reusable_day_templates) take their
+    rendered rows from there; only the subcycles of the other templates are loaded.
+    
+    Returns:
+    --------
+    (templates, calendar)
+        templates: drivecycleId → {"drivecycleName", "fingerprint", "rows", "steps"}, in
+            order of first use; "rows" are the rendered CSV rows (render_template_rows),
+            "steps" is only set for templates generated in this call
+        calendar: DayCalendar; iterating it yields {"dayOfYear", "drivecycleId", "notes"}
+    """
+    reusable = reusable or {}
     
-    calendar_assignments = sim_doc.get("calendar_assignments", [])
+    calendar = DayCalendar(
+        sim_doc.get("calendar_assignments", []),
+        sim_doc.get("simulation_days") or DAYS_PER_YEAR
+    )
     drive_cycles_meta = sim_doc.get("drive_cycles_metadata", [])
     
     drive_cycle_map = {dc["id"]: dc for dc in drive_cycles_meta}
+    used_dc_ids = list(calendar.first_days())
     
-    # Collect all subcycle IDs
+    # Collect the subcycle IDs of the drive cycles in use
     subcycle_ids = set()
-    for dc in drive_cycles_meta:
-        for row in dc.get("composition", []):
+    for dc_id in used_dc_ids:
+        for row in drive_cycle_map.get(dc_id, {}).get("composition", []):
             subcycle_ids.add(row["subcycleId"])
     
     if not subcycle_ids:
         print("WARNING: No subcycles found in drive cycles")
     
-    # Fetch subcycles from database
-    subcycles_cursor = db.subcycles.find({
-        "_id": {"$in": list(subcycle_ids)},
-        "deleted_at": None
-    })
+    subcycle_docs = await fetch_subcycles(db, subcycle_ids)
+    fingerprints = {
+        dc_id: fingerprint_day_template(dc_id, drive_cycle_map.get(dc_id), subcycle_docs)
+        for dc_id in used_dc_ids
+    }
     
-    # CRITICAL FIX: Load all subcycles AND their steps from files if needed
-    subcycles_map = {}
-    async for sc in subcycles_cursor:
-        try:
-            loaded_sc = await load_subcycle_steps_if_needed(sc)
-            subcycles_map[loaded_sc["_id"]] = loaded_sc
-            
-            # Debug logging
-            step_count = len(loaded_sc.get("steps", []))
-            print(f"Subcycle {loaded_sc['_id']} ({loaded_sc.get('name')}): {step_count} steps, source={loaded_sc.get('source')}")
-            
-        except Exception as e:
-            print(f"ERROR loading subcycle {sc.get('_id')}: {str(e)}")
-            raise ValueError(f"Failed to load subcycle {sc.get('_id')}: {str(e)}")
+    # Only the subcycles of templates that changed need their steps
+    stale_subcycle_ids = {
+        row["subcycleId"]
+        for dc_id in used_dc_ids if fingerprints[dc_id] not in reusable
+        for row in drive_cycle_map.get(dc_id, {}).get("composition", [])
+    }
+    subcycles_map = await load_subcycles([
+        sc for sc_id, sc in subcycle_docs.items() if sc_id in stale_subcycle_ids
+    ])
     
     print(f"Total subcycles loaded: {len(subcycles_map)}")
     
-    default_rule = next((r for r in calendar_assignments if r.get("id") == "DEFAULT_RULE"), None)
-    default_drivecycle_id = default_rule["drivecycleId"] if default_rule else "DC_IDLE"
+    # Steps depend only on the drive cycle: one template per drive cycle in use
+    default_rule = calendar.default_rule
+    templates = {}
+    block_cache = {}
+    for dc_id in used_dc_ids:
+        dc_def = drive_cycle_map.get(dc_id)
+        template = {
+            "drivecycleName": (
+                dc_def["name"]
+                if dc_def
+                else default_rule.get("drivecycleName", "Idle") if default_rule else "Idle"
+            ),
+            "fingerprint": fingerprints[dc_id],
+        }
+        if template["fingerprint"] in reusable:
+            template["rows"] = reusable[template["fingerprint"]]
+        else:
+            template["steps"] = build_day_steps(dc_id, dc_def, subcycles_map, block_cache)
+            template["rows"] = render_template_rows(template["steps"])
+        templates[dc_id] = template
     
-    simulation_cycle = []
+    regenerated = sum(1 for t in templates.values() if "steps" in t)
+    print(f"Calendar of {len(calendar)} days over {len(templates)} day templates ({regenerated} regenerated)")
+    return templates, calendar
+
+
+def expand_subcycle_block(
+    row: Dict[str, Any],
+    subcycle: Dict[str, Any],
+    block_cache: Optional[Dict[tuple, List[Dict[str, Any]]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Steps of one repetition of a drive cycle composition row. Blocks are memoized in
+    block_cache by subcycle and row settings, so a subcycle used by several drive
+    cycles or rows is expanded once.
+    """
+    sc_id = row["subcycleId"]
+    subcycle_triggers_str = (
+        "; ".join(f"{t['type']}:{t['value']}" for t in row.get("triggers", []))
+        if row.get("triggers")
+        else ""
+    )
+    key = (sc_id, repr(row.get("ambientTemp")), str(row.get("location", "")), subcycle_triggers_str)
+    if block_cache is not None and key in block_cache:
+        return block_cache[key]
     
-    for day_of_year in range(1, 365):
-        matched_rule = None
+    block = []
+    for step in subcycle.get("steps", []):
+        triggers_str = (
+            "; ".join(f"{t['type']}:{t['value']}" for t in step.get("triggers", []))
+            if step.get("triggers")
+            else ""
+        )
         
-        # Find matching calendar rule
-        for rule in calendar_assignments:
-            if rule.get("id") == "DEFAULT_RULE":
-                continue
-            
-            day_of_week_idx = (day_of_year - 1) % 7
-            month_day = ((day_of_year - 1) % 30) + 1
-            month = ((day_of_year - 1) // 30) + 1
+        block.append({
+            "valueType": step.get("valueType", "current"),
+            "value": step.get("value", 0),
+            "unit": step.get("unit", "A"),
+            "duration": step.get("duration"),
+            "timestep": step.get("timestep"),
+            "stepType": step.get("stepType", ""),
+            "triggers": step.get("triggers", []),
+            "triggers_str": triggers_str,
+            "label": step.get("label", ""),
+            "subcycleId": sc_id,
+            "subcycleName": subcycle.get("name", sc_id),
+            "ambientTemp": row.get("ambientTemp"),
+            "location": row.get("location", ""),
+            "subcycleTriggers": subcycle_triggers_str,
+        })
+    if block_cache is not None:
+        block_cache[key] = block
+    return block
+
+
+def build_day_steps(
+    dc_id: str,
+    dc_def: Dict[str, Any],
+    subcycles_map: Dict[str, Dict[str, Any]],
+    block_cache: Optional[Dict[tuple, List[Dict[str, Any]]]] = None
+) -> List[Dict[str, Any]]:
+    """Steps of one day running the given drive cycle (idle step at the end)."""
+    day_steps = []
+    last_comp = dc_def["composition"][-1] if dc_def and dc_def.get("composition") else {
+        "ambientTemp": 25.0, 
+        "location": ""
+    }
+    
+    # Build steps for this day
+    if dc_def and dc_def.get("composition"):
+        for row in dc_def["composition"]:
+            sc_id = row["subcycleId"]
+            subcycle = subcycles_map.get(sc_id)
             
-            month_match = month in rule.get("months", [])
-            day_match = False
+            if not subcycle:
+                print(f"WARNING Drive cycle {dc_id}: Subcycle {sc_id} not found in map")
+                continue
             
-            if rule.get("daysOfWeek"):
-                day_match = DAYS_OF_WEEK[day_of_week_idx] in rule["daysOfWeek"]
-            elif rule.get("dates"):
-                day_match = month_day in rule["dates"]
+            # CRITICAL: Ensure steps are loaded
+            subcycle_steps = subcycle.get("steps", [])
+            if not subcycle_steps:
+                print(f"WARNING Drive cycle {dc_id}: Subcycle {sc_id} has no steps!")
+                continue
             
-            if month_match and day_match:
-                matched_rule = rule
-                break
-        
-        target_dc_id = matched_rule["drivecycleId"] if matched_rule else default_drivecycle_id
-        dc_def = drive_cycle_map.get(target_dc_id)
-        
-        day_steps = []
-        last_comp = dc_def["composition"][-1] if dc_def and dc_def.get("composition") else {
-            "ambientTemp": 25.0, 
-            "location": ""
+            # Add steps with repetitions (the block is the same for every repetition)
+            block = expand_subcycle_block(row, subcycle, block_cache)
+            day_steps.extend(block * row.get("repetitions", 1))
+    
+    # Always append idle step at end of day
+    idle_step = {
+        "valueType": "current",
+        "value": 0,
+        "unit": "A",
+        "duration": 0,
+        "timestep": 1.0,
+        "stepType": "trigger_only",
+        "triggers": [{"type": "time_elapsed", "value": None}],
+        "triggers_str": "[time_elapsed] -",
+        "label": "Default Idle cycle",
+        "subcycleId": "idle",
+        "subcycleName": "Default Idle",
+        "ambientTemp": last_comp.get("ambientTemp", 25.0),
+        "location": last_comp.get("location", ""),
+        "subcycleTriggers": "",
+    }
+    day_steps.append(idle_step)
+    return day_steps
+
+
+def expand_day_templates(
+    templates: Dict[str, Dict[str, Any]],
+    calendar: DayCalendar
+) -> List[Dict[str, Any]]:
+    """Per-day simulation cycle; days running the same drive cycle share its steps list."""
+    return [
+        {
+            "dayOfYear": day["dayOfYear"],
+            "drivecycleId": day["drivecycleId"],
+            "drivecycleName": templates[day["drivecycleId"]]["drivecycleName"],
+            "notes": day["notes"],
+            "steps": templates[day["drivecycleId"]]["steps"],
         }
+        for day in calendar
+    ]
+
+
+async def generate_simulation_cycle(
+    sim_doc: Dict[str, Any],
+    db: AsyncIOMotorDatabase
+) -> List[Dict[str, Any]]:
+    """Generate the full simulation cycle with all steps for every day of the horizon."""
+    templates, calendar = await generate_day_templates(sim_doc, db)
+    return expand_day_templates(templates, calendar)
+
+
+def escape_csv_value(val) -> str:
+    """Escape CSV values properly."""
+    str_val = str(val).strip()
+    if '"' in str_val:
+        str_val = str_val.replace('"', '""')
+    return f'"{str_val}"'
+
+
+def render_template_rows(steps: List[Dict[str, Any]]) -> List[str]:
+    """
+    CSV text of a template's rows after the DAY_COLUMNS leading columns (global index,
+    day, drive cycle), which render_simulation_csv adds per day.
+    """
+    rows = []
+    current_subcycle_id = None
+    subcycle_step_idx = 1
+    
+    for step in steps:
+        # Reset subcycle step index when subcycle changes
+        if step["subcycleId"] != current_subcycle_id:
+            current_subcycle_id = step["subcycleId"]
+            subcycle_step_idx = 1
         
-        # Build steps for this day
-        if dc_def and dc_def.get("composition"):
-            for row in dc_def["composition"]:
-                sc_id = row["subcycleId"]
-                subcycle = subcycles_map.get(sc_id)
-                
-                if not subcycle:
-                    print(f"WARNING Day {day_of_year}: Subcycle {sc_id} not found in map")
-                    continue
-                
-                # CRITICAL: Ensure steps are loaded
-                subcycle_steps = subcycle.get("steps", [])
-                if not subcycle_steps:
-                    print(f"WARNING Day {day_of_year}: Subcycle {sc_id} has no steps!")
-                    continue
-                
-                subcycle_triggers_str = (
-                    "; ".join(f"{t['type']}:{t['value']}" for t in row.get("triggers", []))
-                    if row.get("triggers")
-                    else ""
-                )
-                
-                # Add steps with repetitions
-                for rep_idx in range(row.get("repetitions", 1)):
-                    for step_idx, step in enumerate(subcycle_steps):
-                        triggers_str = (
-                            "; ".join(f"{t['type']}:{t['value']}" for t in step.get("triggers", []))
-                            if step.get("triggers")
-                            else ""
-                        )
-                        
-                        day_steps.append({
-                            "valueType": step.get("valueType", "current"),
-                            "value": step.get("value", 0),
-                            "unit": step.get("unit", "A"),
-                            "duration": step.get("duration"),
-                            "timestep": step.get("timestep"),
-                            "stepType": step.get("stepType", ""),
-                            "triggers": step.get("triggers", []),
-                            "triggers_str": triggers_str,
-                            "label": step.get("label", ""),
-                            "subcycleId": sc_id,
-                            "subcycleName": subcycle.get("name", sc_id),
-                            "ambientTemp": row.get("ambientTemp"),
-                            "location": row.get("location", ""),
-                            "subcycleTriggers": subcycle_triggers_str,
-                        })
-        
-        # Always append idle step at end of day
-        idle_step = {
-            "valueType": "current",
-            "value": 0,
-            "unit": "A",
-            "duration": 0,
-            "timestep": 1.0,
-            "stepType": "trigger_only",
-            "triggers": [{"type": "time_elapsed", "value": None}],
-            "triggers_str": "[time_elapsed] -",
-            "label": "Default Idle cycle",
-            "subcycleId": "idle",
-            "subcycleName": "Default Idle",
-            "ambientTemp": last_comp.get("ambientTemp", 25.0),
-            "location": last_comp.get("location", ""),
-            "subcycleTriggers": "",
+        row = {
+            "drive cycle trigger": step.get("subcycleTriggers", ""),
+            "Subcycle_ID": step.get("subcycleName", step.get("subcycleId", "")),
+            "Subcycle Step Index": subcycle_step_idx,
+            "Value Type": step.get("valueType", ""),
+            "Value": step.get("value", ""),
+            "Unit": step.get("unit", ""),
+            "Step Type": step.get("stepType", ""),
+            "Step Duration (s)": step["duration"] if step.get("duration") is not None else "",
+            "Timestep (s)": step["timestep"] if step.get("timestep") is not None else "",
+            "Ambient Temp (°C)": step["ambientTemp"] if step.get("ambientTemp") is not None else "",
+            "Location": step.get("location", ""),
+            "step Trigger(s)": step.get("triggers_str", ""),
+            "Label": step.get("label", ""),
         }
-        day_steps.append(idle_step)
-        
-        drivecycle_name = (
-            dc_def["name"]
-            if dc_def
-            else default_rule.get("drivecycleName", "Idle") if default_rule else "Idle"
-        )
-        
-        notes = (
-            matched_rule.get("notes", "")
-            if matched_rule
-            else "Default drive cycle" if default_rule and not matched_rule else ""
-        )
-        
-        simulation_cycle.append({
-            "dayOfYear": day_of_year,
-            "drivecycleId": target_dc_id,
-            "drivecycleName": drivecycle_name,
-            "notes": notes,
-            "steps": day_steps,
-        })
+        rows.append(",".join(escape_csv_value(row[field]) for field in SIMULATION_TABLE_HEADER[DAY_COLUMNS:]))
+        subcycle_step_idx += 1
+    
+    return rows
+
+
+def render_simulation_csv(
+    templates: Dict[str, Dict[str, Any]],
+    calendar: DayCalendar
+) -> str:
+    """Simulation table CSV; each template's rows are rendered once and reused for its days."""
+    csv_lines = [",".join(escape_csv_value(h) for h in SIMULATION_TABLE_HEADER)]
+    global_index = 1
+    for day in calendar:
+        day_prefix = f"{escape_csv_value(day['dayOfYear'])},{escape_csv_value(day['drivecycleId'])},"
+        for tail in templates[day["drivecycleId"]]["rows"]:
+            csv_lines.append(f"{escape_csv_value(global_index)},{day_prefix}{tail}")
+            global_index += 1
     
-    return simulation_cycle
+    return "\n".join(csv_lines)
 
 
 async def generate_simulation_csv(
@@ -207,77 +402,44 @@ async def generate_simulation_csv(
     db: AsyncIOMotorDatabase
 ) -> str:
     """Generate CSV string from simulation cycle."""
+    templates, calendar = await generate_day_templates(sim_doc, db)
+    return render_simulation_csv(templates, calendar)
+
+
+def compile_simulation_schedule(
+    templates: Dict[str, Dict[str, Any]],
+    calendar: DayCalendar,
+    table_fingerprint: Optional[str] = None
+) -> bytes:
+    """
+    Compiled schedule artifact (DayTemplateSchedule.to_bytes) of the table
+    render_simulation_csv produces, with the idle init row /run prepends.
     
-    simulation_cycle = await generate_simulation_cycle(sim_doc, db)
-    
-    all_rows = []
-    global_index = 1
-    
-    for day_data in simulation_cycle:
-        day_num = day_data["dayOfYear"]
-        dc_id = day_data["drivecycleId"]
-        
-        current_subcycle_id = None
-        subcycle_step_idx = 1
-        
-        for step in day_data["steps"]:
-            # Reset subcycle step index when subcycle changes
-            if step["subcycleId"] != current_subcycle_id:
-                current_subcycle_id = step["subcycleId"]
-                subcycle_step_idx = 1
-            
-            row = {
-                "Global Step Index": global_index,
-                "Day_of_year": day_num,
-                "DriveCycle_ID": dc_id,
-                "drive cycle trigger": step.get("subcycleTriggers", ""),
-                "Subcycle_ID": step.get("subcycleName", step.get("subcycleId", "")),
-                "Subcycle Step Index": subcycle_step_idx,
-                "Value Type": step.get("valueType", ""),
-                "Value": step.get("value", ""),
-                "Unit": step.get("unit", ""),
-                "Step Type": step.get("stepType", ""),
-                "Step Duration (s)": step["duration"] if step.get("duration") is not None else "",
-                "Timestep (s)": step["timestep"] if step.get("timestep") is not None else "",
-                "Ambient Temp (°C)": step["ambientTemp"] if step.get("ambientTemp") is not None else "",
-                "Location": step.get("location", ""),
-                "step Trigger(s)": step.get("triggers_str", ""),
-                "Label": step.get("label", ""),
-            }
-            all_rows.append(row)
-            global_index += 1
-            subcycle_step_idx += 1
-    
-    # Build CSV with proper escaping
-    header = [
-        "Global Step Index",
-        "Day_of_year",
-        "DriveCycle_ID",
-        "drive cycle trigger",
-        "Subcycle_ID",
-        "Subcycle Step Index",
-        "Value Type",
-        "Value",
-        "Unit",
-        "Step Type",
-        "Step Duration (s)",
-        "Timestep (s)",
-        "Ambient Temp (°C)",
-        "Location",
-        "step Trigger(s)",
-        "Label"
-    ]
-    
-    def escape_csv_value(val):
-        """Escape CSV values properly."""
-        str_val = str(val).strip()
-        if '"' in str_val:
-            str_val = str_val.replace('"', '""')
-        return f'"{str_val}"'
+    Each template is rendered and parsed once, on the first day that runs it: the
+    template table holds the same values as the full table, so pandas types its
+    columns the same way and the solver sees identical rows. Days are not expanded;
+    the schedule resolves them from the calendar as the solver reaches them. The
+    templates' fingerprints and rendered rows are stored as well, for the next
+    /generate to reuse (reusable_day_templates), and table_fingerprint, the
+    fingerprint of the CSV saved with the artifact.
+    """
+    first_day = calendar.first_days()
     
-    csv_lines = [",".join(escape_csv_value(h) for h in header)]
-    for row in all_rows:
-        csv_line = ",".join(escape_csv_value(row[field]) for field in header)
-        csv_lines.append(csv_line)
+    csv_lines = [",".join(escape_csv_value(h) for h in SIMULATION_TABLE_HEADER)]
+    base_row = 1  # Row 0 is the idle init row
+    for dc_id, day_of_year in first_day.items():
+        day_prefix = f"{escape_csv_value(day_of_year)},{escape_csv_value(dc_id)},"
+        for tail in templates[dc_id]["rows"]:
+            csv_lines.append(f"{escape_csv_value(base_row)},{day_prefix}{tail}")
+            base_row += 1
+    template_table = prepend_idle_row(pd.read_csv(StringIO("\n".join(csv_lines))))
     
-    return "\n".join(csv_lines)
\ No newline at end of file
+    template_ids = list(first_day)
+    template_len = np.array([len(templates[dc_id]["rows"]) for dc_id in template_ids])
+    schedule = compile_day_templates(
+        template_table, template_ids, template_len, calendar,
+        fingerprints=[templates[dc_id]["fingerprint"] for dc_id in template_ids],
+        rows=[tail for dc_id in template_ids for tail in templates[dc_id]["rows"]]
+    )
+    schedule.table_fingerprint = table_fingerprint
+    return schedule.to_bytes()
@@ -0,0 +1,190 @@
+# FILE: Backend/app/utils/solver_pool.py
+import os
+import asyncio
+import concurrent.futures
+from multiprocessing import resource_tracker
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+from CoreLogic import solver_worker
+from CoreLogic.solver_control import SolverControl, create_control_block
+from CoreLogic.result_ring import ResultRing
+from CoreLogic.schedule import estimate_timesteps
+
+# Jobs (running or waiting for a batch) that can be controlled at once
+CONTROL_SLOTS = 256
+
+
+class SolverPool:
+    """
+    Long-lived pool of solver worker processes, started with the app.
+
+    Workers are spawned and prewarmed once (imports, compiled parameter tables) instead
+    of per simulation, and keep their parameter-table caches between jobs. Short jobs
+    (cells x estimated solver timesteps up to small_job_size, see job_size) arriving
+    within batch_window_s of each other are sent to one worker as a single batch.
+
+    Every job gets a slot of a shared control block (CoreLogic.solver_control) through
+    which request() stops or pauses it, progress() reads the progress the solver
+    publishes, and the solver acknowledges its final status, which run_solver returns.
+    Jobs with a sim_id also publish their last ring_steps timesteps to a shared memory
+    ResultRing, readable through ring() while the job runs and ring_linger_s after it.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        small_job_size: int = 50000,
+        batch_window_s: float = 0.05,
+        max_batch: int = 8,
+        ring_steps: int = 16384,
+        ring_linger_s: float = 10.0
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.small_job_size = small_job_size
+        self.batch_window_s = batch_window_s
+        self.max_batch = max_batch
+        self.ring_steps = ring_steps
+        self.ring_linger_s = ring_linger_s
+        self.executor = None
+        self._pending = []  # (job, future) of small jobs waiting for the batch window
+        self._flush_handle = None
+        self.control_block = create_control_block(CONTROL_SLOTS)
+        self._free_slots = list(range(CONTROL_SLOTS))
+        self.controls: Dict[str, SolverControl] = {}  # sim_id → control of its running job
+        self.rings: Dict[str, ResultRing] = {}  # sim_id → result ring of its latest job
+
+    async def start(self):
+        """Create the worker processes and wait until they accept jobs."""
+        if self.executor is not None:
+            return
+        # Workers inherit this process's resource tracker, so result rings they attach to
+        # are not reported as leaked once this process removes them
+        resource_tracker.ensure_running()
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=solver_worker.prewarm_worker,
+            initargs=(self.control_block,)
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self.executor, solver_worker.ping) for _ in range(self.max_workers)
+        ))
+        print(f"🔥 Solver pool started: {self.max_workers} workers")
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            for sim_id in list(self.rings):
+                self._release_ring(sim_id)
+            print("Solver pool shut down")
+
+    @staticmethod
+    def job_size(args: tuple) -> float:
+        """
+        Estimated work of a run_electrical_solver argument tuple: cells x solver timesteps
+        (an upper bound from the drive cycle's durations and timesteps, estimate_timesteps),
+        so a long simulated horizon counts as large however few rows it has.
+        """
+        setup, dc_table = args[0], args[1]
+        return len(setup.get('cells', [])) * estimate_timesteps(dc_table)
+
+    def request(self, sim_id: str, action: str) -> bool:
+        """Ask the job of sim_id to 'stop' or 'pause'; False if it is not running in this pool."""
+        control = self.controls.get(sim_id)
+        if control is None:
+            return False
+        control.request(action)
+        return True
+
+    def progress(self, sim_id: str) -> Optional[Dict]:
+        """Live progress of the job of sim_id (SolverControl.progress), None if not running here."""
+        control = self.controls.get(sim_id)
+        return control.progress() if control is not None else None
+
+    def ring(self, sim_id: str) -> Optional[ResultRing]:
+        """Result ring of the running (or just finished) job of sim_id, None if there is none here."""
+        return self.rings.get(sim_id)
+
+    def _release_ring(self, sim_id: str, ring: Optional[ResultRing] = None):
+        # Only the given ring: sim_id may already have a newer job (e.g. resumed)
+        current = self.rings.get(sim_id)
+        if current is not None and (ring is None or current is ring):
+            del self.rings[sim_id]
+            current.close()
+
+    async def run_solver(self, *args) -> str:
+        """
+        Run NEW_electrical_solver.run_electrical_solver(*args) on a pool worker and
+        return the final status it acknowledged (exceptions are re-raised here).
+        """
+        await self.start()
+        if not self._free_slots:
+            raise RuntimeError("No free solver control slot; too many simulations in flight")
+        sim_id = args[2] if len(args) > 2 else None
+        slot = self._free_slots.pop()
+        control = SolverControl(self.control_block, slot)
+        control.reset()
+        ring = None
+        if sim_id:
+            self.controls[sim_id] = control
+            if self.ring_steps > 0:
+                ring = ResultRing.create(self.ring_steps, len(args[0].get('cells', [])))
+                self._release_ring(sim_id)
+                self.rings[sim_id] = ring
+        try:
+            return await self._run_job(args, slot, ring.name if ring is not None else None)
+        finally:
+            if sim_id and self.controls.get(sim_id) is control:
+                del self.controls[sim_id]
+            self._free_slots.append(slot)
+            if ring is not None:
+                # Readers get a little time to drain the last timesteps
+                asyncio.get_running_loop().call_later(self.ring_linger_s, self._release_ring, sim_id, ring)
+
+    async def _run_job(self, args: tuple, slot: int, ring_name: Optional[str]) -> str:
+        if self.job_size(args) > self.small_job_size:
+            return await self._submit(solver_worker.run_solver_job, args, slot, ring_name)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(((args, slot, ring_name), future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window_s, self._flush)
+        return await future
+
+    async def _submit(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed); start a fresh pool for the next jobs
+            if self.executor is executor:
+                self.executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[tuple, asyncio.Future]]):
+        if len(batch) > 1:
+            print(f"📦 Running {len(batch)} small simulations on one solver worker")
+        try:
+            results = await self._submit(solver_worker.run_solver_batch, [job for job, _ in batch])
+        except Exception as e:
+            results = [(False, e)] * len(batch)
+        for (_, future), (ok, value) in zip(batch, results):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
@@ -1,7 +1,7 @@
 # Backend/app/utils/storage.py
 import os
 from pathlib import Path
-from typing import Union
+from typing import Optional, Tuple, Union
 import boto3
 from botocore.exceptions import ClientError
 from fastapi import HTTPException
@@ -61,6 +61,45 @@ class StorageManager:
                     raise HTTPException(404, "File not found")
                 raise
 
+    async def load_file_range(self, rel_path: str, start: int, end: Optional[int] = None) -> bytes:
+        """Bytes [start, end) of a file (to its end when end is None); empty past the end."""
+        if end is not None and end <= start:
+            return b""
+        if self.storage_type == "local":
+            full_path = self.root / rel_path
+            if not full_path.exists():
+                raise HTTPException(404, "File not found")
+            with open(full_path, "rb") as f:
+                f.seek(start)
+                return f.read() if end is None else f.read(end - start)
+        else:
+            byte_range = f"bytes={start}-" if end is None else f"bytes={start}-{end - 1}"
+            try:
+                obj = self.s3_client.get_object(Bucket=self.bucket, Key=rel_path, Range=byte_range)
+                return obj['Body'].read()
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                if code == 'InvalidRange':
+                    return b""
+                if code == 'NoSuchKey':
+                    raise HTTPException(404, "File not found")
+                raise
+
+    async def stat(self, rel_path: str) -> Optional[Tuple[int, float]]:
+        """(size in bytes, modification time) of a file, or None if it does not exist."""
+        if self.storage_type == "local":
+            full_path = self.root / rel_path
+            if not full_path.exists():
+                return None
+            st = full_path.stat()
+            return st.st_size, st.st_mtime
+        else:
+            try:
+                head = self.s3_client.head_object(Bucket=self.bucket, Key=rel_path)
+                return head['ContentLength'], head['LastModified'].timestamp()
+            except ClientError:
+                return None
+
     async def delete_file(self, rel_path: str):
         if self.storage_type == "local":
             full_path = self.root / rel_path